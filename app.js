@@ -965,45 +965,29 @@ async function generateReport() {
       return;
     }
 
-    const clusterPlotHost = document.getElementById('clusterPlot');
-    if (!clusterPlotHost?.querySelector('canvas')) {
-      renderClusterPlot(currentRankingData.items, currentRankingData.decimals, currentPriorities);
-    }
-    
-    const canvas = clusterPlotHost?.querySelector('canvas');
-    let graphImage = null;
-    
-    if (canvas) {
-      graphImage = canvas.toDataURL('image/png');
-    } else {
-      console.warn('Gráfico não disponível para captura');
-    }
-
+    // O gráfico Nota x Classificação é desenhado pelo servidor no PDF (vetorial), a partir dos itens
     const sortedItems = [...currentRankingData.items].sort((a, b) => b.nota - a.nota);
     const clusterIds = sortedItems.map(x => x.cluster).filter(c => c != null && !isNaN(c) && c > 0);
     const maxCluster = clusterIds.length > 0 ? Math.max(...clusterIds) : 8;
-    const rankingTable = sortedItems.map((item, index) => {
+    const itemKey = item => `${item.coordStr || ''}\u0000${item.nome ?? item.name ?? ''}`;
+    const rowOf = new Map();
+    // Relatório compacto: só coordenada, nome, nota e margem; o servidor formata e
+    // busca as descrições das soluções do pódio no próprio índice
+    const items = sortedItems.map((item, index) => {
       const clusterId = item.cluster != null && !isNaN(item.cluster) && item.cluster > 0 ? item.cluster : null;
       const clusterName = clusterId ? getClusterName(clusterId, maxCluster) : 'N/A';
       const rawName = item.nome ?? item.name ?? item.id ?? item.coordStr;
       const safeName = (typeof rawName === 'string' && rawName.trim().length > 0)
         ? rawName.trim()
         : (rawName != null ? String(rawName) : 'N/A');
-      const coord = item.coordStr || '';
-      const safeNota = Number.isFinite(item.nota)
-        ? item.nota.toFixed(currentRankingData.decimals)
-        : (item.nota != null ? String(item.nota) : 'N/A');
-      const safeMargem = Number.isFinite(item.margemErro)
-        ? item.margemErro.toFixed(currentRankingData.decimals)
-        : (item.margemErro != null ? String(item.margemErro) : 'N/A');
+      if (!rowOf.has(itemKey(item))) rowOf.set(itemKey(item), index);
 
       return {
-        position: index + 1,
-        categoria: clusterName || 'N/A',
-        name: safeName,
-        coord,
-        nota: safeNota,
-        margemErro: safeMargem
+        coord: item.coordStr || '',
+        nome: safeName,
+        nota: item.nota,
+        margemErro: item.margemErro,
+        categoria: clusterName || 'N/A'
       };
     });
     
@@ -1025,44 +1009,12 @@ async function generateReport() {
     const ordered = [...clusters.entries()].sort((a,b)=> b[1].maxNota - a[1].maxNota);
     const podiumClusters = ordered.slice(0, 3);
     
-    const podiumData = podiumClusters.map(([cid, group], index) => {
+    const podium = podiumClusters.map(([cid, group]) => {
       group.items.sort((a,b)=> b.nota - a.nota);
       const clusterName = cid ? getClusterName(cid, ordered.length) : 'N/A';
       return {
         categoria: clusterName,
-        items: group.items.map(item => {
-          let solutionInfo = null;
-          if(item.coordStr) {
-            solutionInfo = findSolutionById(item.coordStr);
-          }
-          if(!solutionInfo && item.nome) {
-            solutionInfo = findSolutionByName(item.nome);
-          }
-
-          const rawName = item.nome ?? item.name ?? item.id ?? item.coordStr;
-          const safeName = (typeof rawName === 'string' && rawName.trim().length > 0)
-            ? rawName.trim()
-            : (rawName != null ? String(rawName) : 'N/A');
-          const coord = item.coordStr || '';
-          const safeNota = Number.isFinite(item.nota)
-            ? item.nota.toFixed(currentRankingData.decimals)
-            : (item.nota != null ? String(item.nota) : 'N/A');
-          const safeMargem = Number.isFinite(item.margemErro)
-            ? item.margemErro.toFixed(currentRankingData.decimals)
-            : (item.margemErro != null ? String(item.margemErro) : 'N/A');
-
-          return {
-            nome: safeName,
-            coord,
-            nota: safeNota,
-            margemErro: safeMargem,
-            solutionData: solutionInfo ? {
-              ...solutionInfo,
-              nome: solutionInfo.nome_curto || solutionInfo.nome,
-              tronco: solutionInfo.linha || solutionInfo.tronco
-            } : null
-          };
-        })
+        items: group.items.map(item => rowOf.get(itemKey(item))).filter(i => i !== undefined)
       };
     });
 
@@ -1079,14 +1031,16 @@ async function generateReport() {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
-        rankingTable,
-        podiumData,
+        format: 'compact',
+        decimals: currentRankingData.decimals,
+        items,
+        podium,
+        solutions: SOLUTION_DESC,
         priorities: {
           r: parseFloat(rPct),
           g: parseFloat(gPct),
           b: parseFloat(bPct)
         },
-        graphImage,
         sessionId
       })
     });
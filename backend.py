@@ -4,7 +4,7 @@ Simple Flask Backend for Noetika Tracking System
 This receives and stores user tracking data to CSV files
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 import csv
 import requests
@@ -52,10 +52,23 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.pdfgen import canvas
 from threading import Thread
 
+import cluster_1d
+import ranking
+import ranking_regions
+import report_archive
+import report_chart
+import report_inputs
+import report_pdf
+import report_request
+import reports_index
+import solutions_index
+import tiering
+import zscores
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
 
@@ -68,15 +81,23 @@ SESSIONS_CSV = DATA_DIR / 'sessions.csv'
 EVENTS_CSV = DATA_DIR / 'events.csv'
 REPORTS_CSV = DATA_DIR / 'reports.csv'
 
+# 'pdf' (padrão): arquivo de PDFs; 'inputs' (opcional): só o registro compacto das entradas, com o
+# PDF re-renderizado sob demanda; 'both': os dois
+REPORT_STORE = os.getenv('REPORT_STORE', 'pdf').strip().lower()
+
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify backend is running"""
-    return jsonify({
+    return jsonify(health_payload()), 200
+
+
+def health_payload() -> Dict[str, Any]:
+    return {
         'status': 'ok',
         'service': 'Noetika Tracking Backend',
         'timestamp': datetime.now().isoformat()
-    }), 200
+    }
 
 # Initialize CSV files if they don't exist
 def init_csv_files():
@@ -104,6 +125,7 @@ def init_csv_files():
             ])
 
 init_csv_files()
+reports_index.index.sync()  # reconstrói o índice de reports.csv se estiver ausente
 
 
 def env_truthy(name: str, default: str = 'false') -> bool:
@@ -146,83 +168,209 @@ def serve_static(path):
     """Serve static files"""
     return send_from_directory('.', path)
 
+LOCALHOST_IPS = ('127.0.0.1', '::1', 'localhost')
+IPAPI_BASE_URL = 'https://ipapi.co'
+
+
+def get_client_ip(headers, remote_addr) -> str:
+    """Resolve the client IP from X-Forwarded-For, falling back to the socket address."""
+    client_ip_header = headers.get('X-Forwarded-For', remote_addr)
+    client_ip = client_ip_header.split(',')[0].strip() if client_ip_header else remote_addr
+    return normalize_ip(client_ip)
+
+
+def location_lookup_url(client_ip: str):
+    """URL to query on ipapi.co for this client, or None when no lookup makes sense."""
+    # For localhost, query API without IP to get server's public IP and location
+    if client_ip in LOCALHOST_IPS:
+        return f'{IPAPI_BASE_URL}/json/'
+    if client_ip and not is_local_ip(client_ip):
+        return f'{IPAPI_BASE_URL}/{client_ip}/json/'
+    return None
+
+
+def location_from_ipapi(client_ip: str, data: Dict[str, Any]):
+    """Shape an ipapi.co response into our location payload (None if unusable)."""
+    if 'error' in data:
+        return None
+    is_localhost = client_ip in LOCALHOST_IPS
+    if is_localhost and not data.get('ip'):
+        return None
+    return {
+        'ip': data.get('ip', '' if is_localhost else client_ip),
+        'city': data.get('city', ''),
+        'region': data.get('region', ''),
+        'country': data.get('country_name', ''),
+        'country_code': data.get('country_code', ''),
+        'latitude': data.get('latitude', ''),
+        'longitude': data.get('longitude', ''),
+        'timezone': data.get('timezone', '')
+    }
+
+
+def fallback_location(client_ip: str, remote_addr) -> Dict[str, Any]:
+    """Location payload without geodata (localhost or failed lookup)."""
+    return {
+        'ip': '127.0.0.1' if client_ip in LOCALHOST_IPS else (client_ip or remote_addr),
+        'city': '',
+        'region': '',
+        'country': '',
+        'country_code': '',
+        'latitude': '',
+        'longitude': '',
+        'timezone': ''
+    }
+
+
 @app.route('/api/get-location', methods=['GET'])
 def get_location():
     """Get user location from IP using backend (avoids CORS issues)"""
     try:
-        # Get client IP
-        client_ip_header = request.headers.get('X-Forwarded-For', request.remote_addr)
-        client_ip = client_ip_header.split(',')[0].strip() if client_ip_header else request.remote_addr
-        client_ip = normalize_ip(client_ip)
-        
-        # If localhost, try to get public IP from API (without specifying IP)
-        if client_ip in ['127.0.0.1', '::1', 'localhost']:
-            # For localhost, query API without IP to get server's public IP and location
-            try:
-                response = requests.get('https://ipapi.co/json/', timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'error' not in data and data.get('ip'):
-                        return jsonify({
-                            'ip': data.get('ip', ''),
-                            'city': data.get('city', ''),
-                            'region': data.get('region', ''),
-                            'country': data.get('country_name', ''),
-                            'country_code': data.get('country_code', ''),
-                            'latitude': data.get('latitude', ''),
-                            'longitude': data.get('longitude', ''),
-                            'timezone': data.get('timezone', '')
-                        }), 200
-            except Exception as e:
-                print(f"Erro ao buscar localização pública via API: {e}")
-            # Fallback: return localhost IP
-            return jsonify({
-                'ip': '127.0.0.1',
-                'city': '',
-                'region': '',
-                'country': '',
-                'country_code': '',
-                'latitude': '',
-                'longitude': '',
-                'timezone': ''
-            }), 200
-        
-        # If we have a real IP, query API with that IP
-        if client_ip and not is_local_ip(client_ip):
+        client_ip = get_client_ip(request.headers, request.remote_addr)
+
+        lookup_url = location_lookup_url(client_ip)
+        if lookup_url:
             try:
-                response = requests.get(f'https://ipapi.co/{client_ip}/json/', timeout=5)
+                response = requests.get(lookup_url, timeout=5)
                 if response.status_code == 200:
-                    data = response.json()
-                    if 'error' not in data:
-                        return jsonify({
-                            'ip': data.get('ip', client_ip),
-                            'city': data.get('city', ''),
-                            'region': data.get('region', ''),
-                            'country': data.get('country_name', ''),
-                            'country_code': data.get('country_code', ''),
-                            'latitude': data.get('latitude', ''),
-                            'longitude': data.get('longitude', ''),
-                            'timezone': data.get('timezone', '')
-                        }), 200
+                    location = location_from_ipapi(client_ip, response.json())
+                    if location:
+                        return jsonify(location), 200
             except Exception as e:
                 print(f"Erro ao buscar localização via API: {e}")
-        
+
         # Final fallback
-        return jsonify({
-            'ip': client_ip or request.remote_addr,
-            'city': '',
-            'region': '',
-            'country': '',
-            'country_code': '',
-            'latitude': '',
-            'longitude': '',
-            'timezone': ''
-        }), 200
+        return jsonify(fallback_location(client_ip, request.remote_addr)), 200
         
     except Exception as e:
         print(f"Erro em get-location: {e}")
         return jsonify({'error': str(e)}), 500
 
+
+def apply_client_ip(session: Dict[str, Any], client_ip: str) -> None:
+    """Normalize session['ip'] and replace it by the request IP when missing or local."""
+    session_ip = normalize_ip(session.get('ip', ''))
+    if session_ip:
+        session['ip'] = session_ip
+
+    # Try to get IP from request if not present or local
+    if not session_ip or is_local_ip(session_ip):
+        if client_ip and not is_local_ip(client_ip):
+            session['ip'] = client_ip
+
+
+def _session_row(session_id: str, session: Dict[str, Any], session_ip: str, location) -> List[str]:
+    return [
+        session_id,
+        session.get('startTime', ''),
+        session.get('userAgent', ''),
+        session.get('screenResolution', ''),
+        session.get('language', ''),
+        session.get('referrer', ''),
+        session_ip,
+        location.get('city', '') if location else '',
+        location.get('region', '') if location else '',
+        location.get('country', '') if location else '',
+        location.get('country_code', '') if location else '',
+        str(location.get('latitude', '')) if location else '',
+        str(location.get('longitude', '')) if location else '',
+        location.get('timezone', '') if location else ''
+    ]
+
+
+def save_session(session: Dict[str, Any]) -> None:
+    """Save session info (insert if new, update if location became available)."""
+    session_id = session.get('sessionId')
+    if not session_id:
+        return
+
+    location = session.get('location', {})
+    session_ip = normalize_ip(session.get('ip', ''))
+    session['ip'] = session_ip
+    has_location_data = (
+        (session_ip and not is_local_ip(session_ip)) or
+        (location and not location.get('error') and any(location.get(key) for key in ('city', 'region', 'country')))
+    )
+    
+    # Check if session already exists
+    session_exists = False
+    session_has_location = False
+    existing_has_real_ip = False
+    
+    if SESSIONS_CSV.exists():
+        with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row['session_id'] == session_id:
+                    session_exists = True
+                    # Check if session already has location data
+                    existing_ip = normalize_ip(row.get('ip', ''))
+                    existing_has_real_ip = bool(existing_ip and not is_local_ip(existing_ip))
+                    if existing_has_real_ip or row.get('city') or row.get('region') or row.get('country'):
+                        session_has_location = True
+                    break
+    
+    # Always save session if it's new
+    # Update existing session only if location data is now available and wasn't before
+    if not session_exists:
+        with open(SESSIONS_CSV, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(_session_row(session_id, session, session_ip, location))
+    elif has_location_data and (
+        not session_has_location or (
+            session_ip and not is_local_ip(session_ip) and not existing_has_real_ip
+        )
+    ):
+        # Update existing session - read all rows, update, rewrite
+        updated_rows = []
+        with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row['session_id'] == session_id:
+                    # Update this row with new location data
+                    incoming_ip_is_real = session_ip and not is_local_ip(session_ip)
+                    existing_ip = normalize_ip(row.get('ip', ''))
+                    existing_ip_is_real = existing_ip and not is_local_ip(existing_ip)
+                    if incoming_ip_is_real or not existing_ip_is_real:
+                        row['ip'] = session_ip if session_ip else row.get('ip', '')
+                    row['city'] = location.get('city', '') if location else row.get('city', '')
+                    row['region'] = location.get('region', '') if location else row.get('region', '')
+                    row['country'] = location.get('country', '') if location else row.get('country', '')
+                    row['country_code'] = location.get('country_code', '') if location else row.get('country_code', '')
+                    row['latitude'] = str(location.get('latitude', '')) if location else row.get('latitude', '')
+                    row['longitude'] = str(location.get('longitude', '')) if location else row.get('longitude', '')
+                    row['timezone'] = location.get('timezone', '') if location else row.get('timezone', '')
+                updated_rows.append(row)
+        
+        # Rewrite CSV with updated data
+        with open(SESSIONS_CSV, 'w', newline='', encoding='utf-8') as f:
+            if updated_rows:
+                writer = csv.DictWriter(f, fieldnames=updated_rows[0].keys())
+                writer.writeheader()
+                writer.writerows(updated_rows)
+
+
+def save_event(session_id, event: Dict[str, Any]) -> None:
+    """Append a tracking event to EVENTS_CSV."""
+    if not event:
+        return
+    with open(EVENTS_CSV, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            session_id,
+            event.get('type', ''),
+            event.get('timestamp', ''),
+            event.get('page', ''),
+            json.dumps(event.get('data', {}))
+        ])
+
+
+def persist_tracking(session: Dict[str, Any], event: Dict[str, Any]) -> None:
+    """Persist one /api/track payload (session upsert + event append)."""
+    save_session(session)
+    save_event(session.get('sessionId'), event)
+
+
 @app.route('/api/track', methods=['POST'])
 def track_event():
     """Receive and store tracking event"""
@@ -238,138 +386,8 @@ def track_event():
                   f"Remote-Addr: {request.remote_addr}, "
                   f"Payload session.ip: {session.get('ip')}")
         
-        # Normalize session IP
-        session_ip = normalize_ip(session.get('ip', ''))
-        if session_ip:
-            session['ip'] = session_ip
-
-        # Try to get IP from request if not present or local
-        if not session_ip or is_local_ip(session_ip):
-            client_ip_header = request.headers.get('X-Forwarded-For', request.remote_addr)
-            client_ip = client_ip_header.split(',')[0].strip() if client_ip_header else request.remote_addr
-            client_ip = normalize_ip(client_ip)
-            if client_ip and not is_local_ip(client_ip):
-                session['ip'] = client_ip
-                session_ip = client_ip
-        
-        # Save session info (update if exists or if location was updated)
-        session_id = session.get('sessionId')
-        if session_id:
-            location = session.get('location', {})
-            session_ip = normalize_ip(session.get('ip', ''))
-            session['ip'] = session_ip
-            has_location_data = (
-                (session_ip and not is_local_ip(session_ip)) or
-                (location and not location.get('error') and any(location.get(key) for key in ('city', 'region', 'country')))
-            )
-            
-            # Check if session already exists
-            session_exists = False
-            session_has_location = False
-            existing_has_real_ip = False
-            
-            if SESSIONS_CSV.exists():
-                with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
-                    for row in rows:
-                        if row['session_id'] == session_id:
-                            session_exists = True
-                            # Check if session already has location data
-                            existing_ip = normalize_ip(row.get('ip', ''))
-                            existing_has_real_ip = bool(existing_ip and not is_local_ip(existing_ip))
-                            if existing_has_real_ip or row.get('city') or row.get('region') or row.get('country'):
-                                session_has_location = True
-                            break
-            
-            # Always save session if it's new
-            # Update existing session only if location data is now available and wasn't before
-            if not session_exists:
-                # Add new session
-                with open(SESSIONS_CSV, 'a', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        session_id,
-                        session.get('startTime', ''),
-                        session.get('userAgent', ''),
-                        session.get('screenResolution', ''),
-                        session.get('language', ''),
-                        session.get('referrer', ''),
-                        session_ip,
-                        location.get('city', '') if location else '',
-                        location.get('region', '') if location else '',
-                        location.get('country', '') if location else '',
-                        location.get('country_code', '') if location else '',
-                        str(location.get('latitude', '')) if location else '',
-                        str(location.get('longitude', '')) if location else '',
-                        location.get('timezone', '') if location else ''
-                    ])
-            elif has_location_data and (
-                not session_has_location or (
-                    session_ip and not is_local_ip(session_ip) and not existing_has_real_ip
-                )
-            ):
-                # Update existing session with new location data
-                if session_exists:
-                    # Update existing session - read all rows, update, rewrite
-                    updated_rows = []
-                    with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            if row['session_id'] == session_id:
-                                # Update this row with new location data
-                                incoming_ip_is_real = session_ip and not is_local_ip(session_ip)
-                                existing_ip = normalize_ip(row.get('ip', ''))
-                                existing_ip_is_real = existing_ip and not is_local_ip(existing_ip)
-                                if incoming_ip_is_real or not existing_ip_is_real:
-                                    row['ip'] = session_ip if session_ip else row.get('ip', '')
-                                row['city'] = location.get('city', '') if location else row.get('city', '')
-                                row['region'] = location.get('region', '') if location else row.get('region', '')
-                                row['country'] = location.get('country', '') if location else row.get('country', '')
-                                row['country_code'] = location.get('country_code', '') if location else row.get('country_code', '')
-                                row['latitude'] = str(location.get('latitude', '')) if location else row.get('latitude', '')
-                                row['longitude'] = str(location.get('longitude', '')) if location else row.get('longitude', '')
-                                row['timezone'] = location.get('timezone', '') if location else row.get('timezone', '')
-                            updated_rows.append(row)
-                    
-                    # Rewrite CSV with updated data
-                    with open(SESSIONS_CSV, 'w', newline='', encoding='utf-8') as f:
-                        if updated_rows:
-                            writer = csv.DictWriter(f, fieldnames=updated_rows[0].keys())
-                            writer.writeheader()
-                            writer.writerows(updated_rows)
-                else:
-                    # Add new session
-                    with open(SESSIONS_CSV, 'a', newline='', encoding='utf-8') as f:
-                        writer = csv.writer(f)
-                        writer.writerow([
-                            session_id,
-                            session.get('startTime', ''),
-                            session.get('userAgent', ''),
-                            session.get('screenResolution', ''),
-                            session.get('language', ''),
-                            session.get('referrer', ''),
-                            session_ip,
-                            location.get('city', '') if location else '',
-                            location.get('region', '') if location else '',
-                            location.get('country', '') if location else '',
-                            location.get('country_code', '') if location else '',
-                            str(location.get('latitude', '')) if location else '',
-                            str(location.get('longitude', '')) if location else '',
-                            location.get('timezone', '') if location else ''
-                        ])
-        
-        # Save event
-        if event:
-            with open(EVENTS_CSV, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    session_id,
-                    event.get('type', ''),
-                    event.get('timestamp', ''),
-                    event.get('page', ''),
-                    json.dumps(event.get('data', {}))
-                ])
+        apply_client_ip(session, get_client_ip(request.headers, request.remote_addr))
+        persist_tracking(session, event)
         
         return jsonify({'status': 'success'}), 200
     
@@ -377,17 +395,53 @@ def track_event():
         print(f"Error tracking event: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def read_sessions() -> List[Dict[str, str]]:
+    sessions = []
+    if SESSIONS_CSV.exists():
+        with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            sessions = list(reader)
+    return sessions
+
+
+def read_session_events(session_id: str) -> List[Dict[str, str]]:
+    events = []
+    if EVENTS_CSV.exists():
+        with open(EVENTS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            events = [row for row in reader if row['session_id'] == session_id]
+    return events
+
+
+def compute_stats() -> Dict[str, Any]:
+    stats = {
+        'total_sessions': 0,
+        'total_events': 0,
+        'events_by_type': {},
+        'recent_sessions': []
+    }
+    
+    # Count sessions
+    sessions = read_sessions()
+    stats['total_sessions'] = len(sessions)
+    stats['recent_sessions'] = sessions[-10:]
+    
+    # Count events
+    if EVENTS_CSV.exists():
+        with open(EVENTS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                stats['total_events'] += 1
+                event_type = row['event_type']
+                stats['events_by_type'][event_type] = stats['events_by_type'].get(event_type, 0) + 1
+    return stats
+
+
 @app.route('/api/sessions', methods=['GET'])
 def get_sessions():
     """Get all sessions"""
     try:
-        sessions = []
-        if SESSIONS_CSV.exists():
-            with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                sessions = list(reader)
-        
-        return jsonify(sessions), 200
+        return jsonify(read_sessions()), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -395,13 +449,7 @@ def get_sessions():
 def get_session_events(session_id):
     """Get events for a specific session"""
     try:
-        events = []
-        if EVENTS_CSV.exists():
-            with open(EVENTS_CSV, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                events = [row for row in reader if row['session_id'] == session_id]
-        
-        return jsonify(events), 200
+        return jsonify(read_session_events(session_id)), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -409,43 +457,181 @@ def get_session_events(session_id):
 def get_stats():
     """Get tracking statistics"""
     try:
-        stats = {
-            'total_sessions': 0,
-            'total_events': 0,
-            'events_by_type': {},
-            'recent_sessions': []
+        return jsonify(compute_stats()), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/rank', methods=['POST'])
+def rank():
+    """Compute the ranking server-side (same results as computeRanking in app.js).
+
+    Body: {"priorities": {"r", "g", "b"}, "matrix"?: Z-score or raw matrix file in data/, "names"?: file in data/,
+           "clusters"?: true to add the cluster_1d_sigma label of each item (0 = ruído),
+           "tiers"?: true or {"weighted": true} to add the optimal podium tier (Ouro, Prata, ...)}
+    Response "sigma_model": "file" (s_Z/cov from the Z-score CSV) or "propagated" (raw matrix: same Z as
+    the shipped Z-score files, but s_Z <= 1 and cov = 0, so margins, clusters and tiers differ from theirs).
+    """
+    try:
+        data = request.json or {}
+        priorities = data.get('priorities', {})
+        r, g, b = ranking.normalize_priorities(priorities.get('r', 0), priorities.get('g', 0), priorities.get('b', 0))
+
+        matrix = zscores.cached_matrix(data.get('matrix'))
+        try:
+            names = ranking.cached_names(data.get('names'))
+        except FileNotFoundError:
+            names = None
+
+        result = ranking.compute_ranking(matrix, r, g, b)
+        payload = {
+            'items': ranking.ranking_items(result, names),
+            'decimals': result['decimals'],
+            'priorities': {'r': r, 'g': g, 'b': b},
+            'sigma_model': zscores.sigma_model(data.get('matrix'))
         }
-        
-        # Count sessions
-        if SESSIONS_CSV.exists():
-            with open(SESSIONS_CSV, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                sessions = list(reader)
-                stats['total_sessions'] = len(sessions)
-                stats['recent_sessions'] = sessions[-10:]
-        
-        # Count events
-        if EVENTS_CSV.exists():
-            with open(EVENTS_CSV, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    stats['total_events'] += 1
-                    event_type = row['event_type']
-                    stats['events_by_type'][event_type] = stats['events_by_type'].get(event_type, 0) + 1
-        
-        return jsonify(stats), 200
+        if data.get('clusters'):
+            clusters = cluster_1d.cluster_ranking(result)
+            for item in payload['items']:
+                item['cluster'] = clusters['labels'][item['idx']]
+            payload['clusters'] = {k: v for k, v in clusters.items() if k != 'labels'}
+        if data.get('tiers'):
+            options = data['tiers'] if isinstance(data['tiers'], dict) else {}
+            tiers = tiering.cached_tiers(matrix, r, g, b, result, weighted=bool(options.get('weighted')))
+            for item in payload['items']:
+                item['tier'] = int(tiers['labels'][item['idx']])
+                item['tierName'] = tiering.tier_name(item['tier'])
+            payload['tiers'] = {'k': tiers['k'], 'names': tiers['names'], 'centers': tiers['centers']}
+        return jsonify(payload), 200
+    except FileNotFoundError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except KeyError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
+        print(f"Erro ao calcular ranking: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/rank/batch', methods=['POST'])
+def rank_batch():
+    """Score many priority vectors in one pass.
+
+    Body: {"priorities": [[r, g, b], ...] or [{"r", "g", "b"}, ...], "matrix"?: file in data/}
+    Returns K×N Zranking/s_Zrank matrices, the winner index of each row and the sigma_model (see /api/rank).
+    """
+    try:
+        data = request.json or {}
+        P = ranking.priority_matrix(data.get('priorities', []))
+        matrix = zscores.cached_matrix(data.get('matrix'))
+        scores, sigmas = ranking.rank_batch(matrix, P)
+        return jsonify({
+            'Zranking': scores.tolist(),
+            's_Zrank': sigmas.tolist(),
+            'winner': ranking.winners(scores).tolist() if len(matrix) else [],
+            'sigma_model': zscores.sigma_model(data.get('matrix'))
+        }), 200
+    except FileNotFoundError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Erro ao calcular ranking em lote: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/rank/regions', methods=['GET'])
+def rank_regions():
+    """Precomputed regions of the priority simplex (polygons in r, g, b).
+
+    Query: ?mode=winner|order&matrix=<file in data/>
+    """
+    try:
+        region_map = ranking_regions.region_map_for_file(request.args.get('matrix'), request.args.get('mode', 'winner'))
+        return jsonify({'mode': region_map.mode, 'regions': region_map.polygons_rgb()}), 200
+    except FileNotFoundError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Erro ao calcular regiões: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/rank/locate', methods=['POST'])
+def rank_locate():
+    """Winner (and order) at a clicked point, answered from the region map.
+
+    Body: {"priorities": {"r", "g", "b"}, "mode"?: "winner"|"order", "matrix"?: file in data/}
+    """
+    try:
+        data = request.json or {}
+        priorities = data.get('priorities', {})
+        r, g, b = ranking.normalize_priorities(priorities.get('r', 0), priorities.get('g', 0), priorities.get('b', 0))
+        region_map = ranking_regions.region_map_for_file(data.get('matrix'), data.get('mode', 'winner'))
+        payload = {'winner': region_map.winner_at(r, g, b)}
+        if region_map.mode == 'order':
+            payload['order'] = region_map.ranking_at(r, g, b).tolist()
+        return jsonify(payload), 200
+    except FileNotFoundError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Erro ao localizar prioridade: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def etag_response(payload: Dict[str, Any], etag: str):
+    """JSON response with a strong ETag; 304 when If-None-Match matches."""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # sempre revalida (ETag muda com o arquivo)
+    return response.make_conditional(request)
+
+@app.route('/api/solutions', methods=['GET'])
+def list_solutions():
+    """Ids and names of the solutions in one description version (?version=5 or file name)."""
+    try:
+        listing, etag = solutions_index.store.listing(request.args.get('version'))
+        return etag_response(listing, etag)
+    except FileNotFoundError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except Exception as e:
+        print(f"Erro ao listar soluções: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/solutions/<path:coord>', methods=['GET'])
+def get_solution(coord):
+    """Solution description by tree coordinate (III.1a = III.1.a), with ETag.
+
+    Query: ?version=<5 | solution_description5.json>&nome=<name used when the coordinate is not found>
+    """
+    try:
+        found = solutions_index.store.find(coord, request.args.get('nome'), request.args.get('version'))
+        if found is None:
+            return jsonify({'status': 'error', 'message': f'Solução não encontrada: {coord}'}), 404
+        payload, etag = found
+        return etag_response(payload, etag)
+    except FileNotFoundError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except Exception as e:
+        print(f"Erro ao buscar solução: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/generate-report', methods=['POST'])
 def generate_report():
-    """Generate PDF report and send via email"""
+    """Generate PDF report and send via email.
+
+    Accepts the legacy body (rankingTable + podiumData with solutionData) or the compact
+    one ({"format": "compact", "items", "podium": indices, ...}, see report_request).
+    """
     try:
         data = request.json
-        ranking = data.get('rankingTable', data.get('ranking', []))  # Suporta ambos para compatibilidade
+        if report_request.is_compact(data):
+            # detalhes das soluções do pódio vêm do índice do servidor
+            try:
+                data = report_request.expand(data)
+            except ValueError as e:  # corpo compacto malformado
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+        ranking_rows = data.get('rankingTable', data.get('ranking', []))  # Suporta ambos para compatibilidade
         podium = data.get('podiumData', data.get('podium', []))  # Dados do podium (Ouro, Prata, Bronze)
         priorities = data.get('priorities', {})
-        graph_image_base64 = data.get('graphImage', '')
         session_id = data.get('sessionId', '')
         
         # Get current date and time
@@ -468,264 +654,34 @@ def generate_report():
                         break
         
         # Generate hash - usa rankingTable para consistência
-        hash_data = f"{session_id}{now.isoformat()}{json.dumps(ranking, sort_keys=True)}"
+        hash_data = f"{session_id}{now.isoformat()}{json.dumps(ranking_rows, sort_keys=True)}"
         report_hash = hashlib.sha256(hash_data.encode()).hexdigest()[:16]
         
-        # Create PDF in memory
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                               rightMargin=72, leftMargin=72,
-                               topMargin=72, bottomMargin=72)
-        
-        # Container for the 'Flowable' objects
-        elements = []
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#000000'),
-            spaceAfter=30,
-            alignment=TA_CENTER
+        # Entradas normalizadas -> PDF determinístico (re-renderizável a partir do registro)
+        inputs = report_pdf.ReportInputs(
+            report_hash, now.isoformat(), session_id, user_ip, user_city, priorities,
+            report_pdf.normalize_ranking(ranking_rows), report_pdf.normalize_podium(podium)
         )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#000000'),
-            spaceAfter=12
+        pdf_data = report_pdf.render(inputs)
+        
+        # Save hash to tracking data (reports.csv + índice por hash)
+        reports_index.index.append(
+            report_hash,
+            session_id,
+            now.isoformat(),
+            user_ip,
+            user_city,
+            json.dumps(priorities)
         )
         
-        # Title
-        elements.append(Paragraph("Tribússula report", title_style))
-        elements.append(Spacer(1, 12))
-        
-        # Hash
-        elements.append(Paragraph(f"<b>Hash:</b> {report_hash}", styles['Normal']))
-        elements.append(Spacer(1, 6))
-        
-        # IP and City
-        elements.append(Paragraph(
-            f"Requisitado a partir de: {user_ip}, {user_city}",
-            styles['Normal']
-        ))
-        elements.append(Spacer(1, 20))
-        
-        # Subtitle with priorities - converte r, g, b para percentuais
-        r_pct = priorities.get('r', 0)
-        g_pct = priorities.get('g', 0)
-        b_pct = priorities.get('b', 0)
-        # Se vier como decimal (0-1), converte para percentual
-        if r_pct <= 1 and g_pct <= 1 and b_pct <= 1:
-            r_pct = r_pct * 100
-            g_pct = g_pct * 100
-            b_pct = b_pct * 100
-        priorities_text = f"Ranking priorizando {r_pct:.1f}% custo, {g_pct:.1f}% qualidade e {b_pct:.1f}% prazo"
-        elements.append(Paragraph(priorities_text, styles['Normal']))
-        elements.append(Spacer(1, 30))
-        
-        # Ranking table - Centralizada
-        table_data = [['#', 'Categoria', 'Nome', 'Nota', 'Margem de Erro']]
-        for item in ranking:
-            safe_position = str(item.get('position', ''))
-            safe_category = item.get('categoria', item.get('cluster', 'N/A'))
-            safe_name = item.get('name') or item.get('nome') or 'N/A'
-            coord = item.get('coord')
-            if coord:
-                safe_name = f"{safe_name} ({coord})"
-            safe_score = item.get('nota', 'N/A')
-            safe_margin = item.get('margemErro', 'N/A')
-
-            table_data.append([
-                safe_position,
-                safe_category,
-                safe_name,
-                safe_score,
-                safe_margin
-            ])
-        
-        ranking_table = Table(table_data, colWidths=[0.5*inch, 1*inch, 3*inch, 0.8*inch, 1*inch])
-        ranking_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # TUDO CENTRALIZADO
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ]))
-        
-        elements.append(ranking_table)
-        elements.append(Spacer(1, 20))
-        
-        # Graph image - na mesma página do ranking
-        if graph_image_base64:
-            try:
-                # Remove data URL prefix if present
-                if ',' in graph_image_base64:
-                    graph_image_base64 = graph_image_base64.split(',')[1]
-                
-                # Decode base64 image
-                image_data = base64.b64decode(graph_image_base64)
-                
-                # Add image to PDF - ajusta tamanho para caber na mesma página
-                img_buffer = BytesIO(image_data)
-                img_buffer.seek(0)
-                reportlab_img = Image(img_buffer, width=6*inch, height=2.3*inch)
-                elements.append(reportlab_img)
-            except Exception as e:
-                print(f"Erro ao adicionar gráfico ao PDF: {e}")
-                elements.append(Paragraph(f"<i>Gráfico não disponível: {str(e)}</i>", styles['Normal']))
-        
-        # Podium section - Ouro, Prata, Bronze (nova página)
-        if podium and len(podium) > 0:
-            elements.append(PageBreak())
-            elements.append(Spacer(1, 20))
-            elements.append(Paragraph("Podium", heading_style))
-            elements.append(Spacer(1, 20))
-            
-            for podium_item in podium:
-                categoria = podium_item.get('categoria', 'N/A')
-                items = podium_item.get('items', [])
-                
-                if not items:
-                    continue
-                
-                # Título da categoria
-                elements.append(Paragraph(f"<b>{categoria}</b>", styles['Heading3']))
-                elements.append(Spacer(1, 12))
-                
-                # Para cada solução nesta categoria
-                for solution_item in items:
-                    solution_data = solution_item.get('solutionData')
-                    if not solution_data:
-                        # Se não tem dados completos, mostra só o básico
-                        elements.append(Paragraph(
-                            f"<b>{solution_item.get('nome', 'N/A')}</b> ({solution_item.get('coord', 'N/A')})",
-                            styles['Normal']
-                        ))
-                        elements.append(Paragraph(
-                            f"Nota: {solution_item.get('nota', 'N/A')} | Margem de Erro: {solution_item.get('margemErro', 'N/A')}",
-                            styles['Normal']
-                        ))
-                        elements.append(Spacer(1, 10))
-                        continue
-                    
-                    # Nome e ID
-                    elements.append(Paragraph(
-                        f"<b>{solution_data.get('nome', 'N/A')}</b> ({solution_data.get('id', 'N/A')}) • Tronco {solution_data.get('tronco', 'N/A')}",
-                        styles['Normal']
-                    ))
-                    elements.append(Spacer(1, 6))
-                    
-                    # Descrição
-                    if solution_data.get('descricao'):
-                        elements.append(Paragraph(f"<b>Descrição:</b> {solution_data.get('descricao')}", styles['Normal']))
-                        elements.append(Spacer(1, 6))
-                    
-                    # Escopo
-                    if solution_data.get('escopo') and isinstance(solution_data.get('escopo'), list):
-                        elements.append(Paragraph("<b>Escopo:</b>", styles['Normal']))
-                        for escopo_item in solution_data.get('escopo', []):
-                            elements.append(Paragraph(f"• {escopo_item}", styles['Normal']))
-                        elements.append(Spacer(1, 6))
-                    
-                    # Custo
-                    if solution_data.get('custo'):
-                        custo = solution_data.get('custo', {})
-                        custo_text = []
-                        if custo.get('mensal_brl'):
-                            custo_text.append(f"Mensal: R$ {custo.get('mensal_brl'):,.2f}")
-                        if custo.get('anual_brl'):
-                            custo_text.append(f"Anual: R$ {custo.get('anual_brl'):,.2f}")
-                        if custo.get('setup_brl'):
-                            custo_text.append(f"Setup: R$ {custo.get('setup_brl'):,.2f}")
-                        if custo_text:
-                            elements.append(Paragraph(f"<b>Custo:</b> {', '.join(custo_text)}", styles['Normal']))
-                            elements.append(Spacer(1, 6))
-                    
-                    # Prazos
-                    if solution_data.get('prazos_dias'):
-                        prazos = solution_data.get('prazos_dias', {})
-                        prazo_text = []
-                        if prazos.get('total'):
-                            prazo_text.append(f"Total: {prazos.get('total')} dias")
-                        if prazos.get('sigma'):
-                            prazo_text.append(f"σ (Incerteza): {prazos.get('sigma')} dias")
-                        if prazo_text:
-                            elements.append(Paragraph(f"<b>Prazo:</b> {', '.join(prazo_text)}", styles['Normal']))
-                            elements.append(Spacer(1, 6))
-                    
-                    # Qualidade Objetiva
-                    if solution_data.get('qualidade_objetiva'):
-                        qualidade = solution_data.get('qualidade_objetiva', {})
-                        qualidade_text = []
-                        if qualidade.get('deduplicacao_top3_pct'):
-                            qualidade_text.append(f"Deduplicação Top 3: {qualidade.get('deduplicacao_top3_pct')}")
-                        if qualidade.get('latencia_seg'):
-                            qualidade_text.append(f"Latência: {qualidade.get('latencia_seg')} seg")
-                        if qualidade.get('cobertura_classificacao_pct'):
-                            qualidade_text.append(f"Cobertura de Classificação: {qualidade.get('cobertura_classificacao_pct')}")
-                        if qualidade_text:
-                            elements.append(Paragraph(f"<b>Qualidade Objetiva:</b> {', '.join(qualidade_text)}", styles['Normal']))
-                            elements.append(Spacer(1, 6))
-                    
-                    # Riscos
-                    if solution_data.get('riscos') and isinstance(solution_data.get('riscos'), list):
-                        elements.append(Paragraph("<b>Riscos:</b>", styles['Normal']))
-                        for risco in solution_data.get('riscos', []):
-                            elements.append(Paragraph(f"⚠️ {risco}", styles['Normal']))
-                        elements.append(Spacer(1, 6))
-                    
-                    # Mitigações
-                    if solution_data.get('mitigacoes') and isinstance(solution_data.get('mitigacoes'), list):
-                        elements.append(Paragraph("<b>Mitigações:</b>", styles['Normal']))
-                        for mit in solution_data.get('mitigacoes', []):
-                            elements.append(Paragraph(f"✅ {mit}", styles['Normal']))
-                        elements.append(Spacer(1, 6))
-                    
-                    # Quando Escolher
-                    if solution_data.get('quando_escolher'):
-                        elements.append(Paragraph(f"<b>Quando Escolher:</b> {solution_data.get('quando_escolher')}", styles['Normal']))
-                        elements.append(Spacer(1, 6))
-                    
-                    # Benefícios
-                    if solution_data.get('beneficios') and isinstance(solution_data.get('beneficios'), list):
-                        elements.append(Paragraph("<b>Benefícios:</b>", styles['Normal']))
-                        for beneficio in solution_data.get('beneficios', []):
-                            elements.append(Paragraph(f"💡 {beneficio}", styles['Normal']))
-                        elements.append(Spacer(1, 6))
-                    
-                    # Nota e Margem de Erro
-                    elements.append(Paragraph(
-                        f"<b>Nota:</b> {solution_item.get('nota', 'N/A')} | <b>Margem de Erro:</b> {solution_item.get('margemErro', 'N/A')}",
-                        styles['Normal']
-                    ))
-                    
-                    elements.append(Spacer(1, 20))
-        
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-        pdf_data = buffer.getvalue()
-        
-        # Save hash to tracking data
-        with open(REPORTS_CSV, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                report_hash,
-                session_id,
-                now.isoformat(),
-                user_ip,
-                user_city,
-                json.dumps(priorities)
-            ])
+        # Guarda o relatório para /api/reports/<hash>: registro das entradas e/ou o PDF (REPORT_STORE)
+        try:
+            if REPORT_STORE in ('inputs', 'both'):
+                report_inputs.store.put(inputs, pdf_data)
+            if REPORT_STORE in ('pdf', 'both'):
+                report_archive.archive.put(report_hash, pdf_data, now)
+        except OSError as e:
+            print(f"⚠️ Não foi possível arquivar o relatório {report_hash}: {e}")
         
         # Send email with PDF
         send_email_with_pdf_async(pdf_data, date_str, time_str, report_hash)
@@ -736,7 +692,9 @@ def generate_report():
             pdf_data,
             mimetype='application/pdf',
             headers={
-                'Content-Disposition': f'attachment; filename=Tribussula_report_{date_str.replace("/", "")}_{time_str.replace(":", "")}.pdf'
+                'Content-Disposition': f'attachment; filename=Tribussula_report_{date_str.replace("/", "")}_{time_str.replace(":", "")}.pdf',
+                'X-Report-Hash': report_hash,
+                'Content-Location': f'/api/reports/{report_hash}'
             }
         )
     
@@ -746,6 +704,73 @@ def generate_report():
         traceback.print_exc()
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+
+def rerender_report(report_hash: str):
+    """Render a report again from its input record and keep it in the (bounded) PDF archive.
+
+    Raises report_inputs.RenderMismatch (nothing archived) if the PDF differs from the one served.
+    """
+    record = report_inputs.store.get(report_hash)
+    if record is None:
+        return None
+    try:
+        pdf_data = report_inputs.store.render_verified(record)
+    except report_inputs.RenderMismatch as e:
+        print(f"⚠️ {e} ReportLab {record.get('reportlab')} -> atual; veja report_inputs.py verify")
+        raise
+    return report_archive.archive.put(report_hash, pdf_data, datetime.fromisoformat(record['generated_at']))
+
+
+@app.route('/api/reports/<report_hash>', methods=['GET'])
+def get_report(report_hash):
+    """Archived report PDF by its hash (Range, If-None-Match and If-Modified-Since supported)."""
+    if not report_archive.is_report_hash(report_hash):
+        return jsonify({'status': 'error', 'message': 'Hash de relatório inválido.'}), 400
+    try:
+        entry = report_archive.archive.get(report_hash) or rerender_report(report_hash)
+    except ValueError as e:  # registro de outra versão de template
+        return jsonify({'status': 'error', 'message': str(e)}), 410
+    except report_inputs.RenderMismatch as e:  # não serve um PDF diferente do original
+        return jsonify({'status': 'error', 'message': str(e),
+                        'expected_sha256': e.expected, 'actual_sha256': e.actual}), 409
+    if entry is None:
+        return jsonify({'status': 'error', 'message': 'Relatório não encontrado no arquivo.'}), 404
+    # blob em disco sai direto do arquivo (sendfile quando o servidor WSGI oferece): sem gzip, ou
+    # gzip repassado como Content-Encoding; só um Range sobre blob gzip exige descompactar
+    gzip_ok = 'gzip' in request.accept_encodings and 'Range' not in request.headers
+    try:
+        if entry.compressed and not gzip_ok:
+            source, etag = BytesIO(report_archive.archive.read(entry)), entry.blob
+        else:
+            source, etag = report_archive.archive.path(entry), entry.blob + ('-gz' if entry.compressed else '')
+        response = send_file(
+            source,
+            mimetype='application/pdf',
+            as_attachment=request.args.get('download') == '1',
+            download_name=f'Tribussula_report_{report_hash}.pdf',
+            conditional=True,
+            etag=etag,
+            last_modified=datetime.fromisoformat(entry.generated_at),
+            max_age=None
+        )
+    except FileNotFoundError:  # removido pela retenção entre a busca e o envio
+        return jsonify({'status': 'error', 'message': 'Relatório não encontrado no arquivo.'}), 404
+    if entry.compressed and gzip_ok:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/api/reports/<report_hash>/verify', methods=['GET'])
+def verify_report(report_hash):
+    """Whether a report hash was issued here, with its session, date and priorities (index lookup)."""
+    if not report_archive.is_report_hash(report_hash):
+        return jsonify({'status': 'error', 'valid': False, 'message': 'Hash de relatório inválido.'}), 400
+    record = reports_index.index.lookup(report_hash)
+    if record is None:
+        return jsonify({'status': 'ok', 'valid': False, 'hash': report_hash}), 404
+    return jsonify({'status': 'ok', 'valid': True, **record.to_json()}), 200
+
 def send_email_with_pdf(pdf_data, date_str, time_str, report_hash):
     """Send PDF report via the configured email channel."""
     try:
@@ -833,7 +858,7 @@ def send_email_via_smtp(
     encoders.encode_base64(attachment)
     attachment.add_header(
         'Content-Disposition',
-        f'attachment; filename=Tribussula_report_{date_str.replace('/', '')}_{time_str.replace(':', '')}.pdf'
+        f'attachment; filename=Tribussula_report_{date_str.replace("/", "")}_{time_str.replace(":", "")}.pdf'
     )
     msg.attach(attachment)
 
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of the Noetika Tracking API.
+
+Serves the same tracking routes as backend.py on an asyncio event loop:
+CSV writes go through a single writer task (so appends never block the loop
+and never interleave) and geolocation uses an async HTTP client. Every other
+path (frontend, reports, ranking, solutions) falls through to the Flask
+(WSGI) app in backend.py, mounted after the tracking routes.
+
+Run with:
+    uvicorn backend_asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextlib
+from typing import Any, Callable, Dict
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.routing import Mount, Route
+
+import backend
+from backend import (
+    env_truthy,
+    get_client_ip,
+    location_lookup_url,
+    location_from_ipapi,
+    fallback_location,
+    apply_client_ip,
+    persist_tracking,
+    read_sessions,
+    read_session_events,
+    compute_stats,
+    health_payload,
+)
+
+WRITE_QUEUE_SIZE = 10000
+GEO_TIMEOUT = 5.0
+
+
+class CSVWriter:
+    """Single consumer for every CSV mutation.
+
+    Jobs are executed strictly in arrival order, in a worker thread, so the
+    event loop stays free while the files are being appended/rewritten.
+    """
+
+    def __init__(self, maxsize: int = WRITE_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task = None
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        await self.queue.join()
+        self.task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
+
+    async def submit(self, fn: Callable, *args) -> Any:
+        """Enqueue a blocking write and wait until it has been persisted."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fn, args, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            fn, args, future = await self.queue.get()
+            try:
+                result = await asyncio.to_thread(fn, *args)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+
+def _remote_addr(request: Request) -> str:
+    return request.client.host if request.client else ''
+
+
+async def health_check(request: Request):
+    """Health check endpoint to verify backend is running"""
+    return JSONResponse(health_payload())
+
+
+async def get_location(request: Request):
+    """Get user location from IP using the async HTTP client"""
+    try:
+        remote_addr = _remote_addr(request)
+        client_ip = get_client_ip(request.headers, remote_addr)
+
+        lookup_url = location_lookup_url(client_ip)
+        if lookup_url:
+            try:
+                response = await request.app.state.http.get(lookup_url)
+                if response.status_code == 200:
+                    location = location_from_ipapi(client_ip, response.json())
+                    if location:
+                        return JSONResponse(location)
+            except Exception as e:
+                print(f"Erro ao buscar localização via API: {e}")
+
+        return JSONResponse(fallback_location(client_ip, remote_addr))
+
+    except Exception as e:
+        print(f"Erro em get-location: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def track_event(request: Request):
+    """Receive a tracking event and hand it to the writer task"""
+    try:
+        data = await request.json()
+        session: Dict[str, Any] = data.get('session', {})
+        event: Dict[str, Any] = data.get('event', {})
+        remote_addr = _remote_addr(request)
+
+        if env_truthy('LOG_IP_DEBUG'):
+            print("[track_event] Header debug → "
+                  f"X-Forwarded-For: {request.headers.get('X-Forwarded-For')}, "
+                  f"X-Real-IP: {request.headers.get('X-Real-IP')}, "
+                  f"Remote-Addr: {remote_addr}, "
+                  f"Payload session.ip: {session.get('ip')}")
+
+        apply_client_ip(session, get_client_ip(request.headers, remote_addr))
+        await request.app.state.writer.submit(persist_tracking, session, event)
+
+        return JSONResponse({'status': 'success'})
+
+    except Exception as e:
+        print(f"Error tracking event: {e}")
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+async def get_sessions(request: Request):
+    """Get all sessions"""
+    try:
+        return JSONResponse(await asyncio.to_thread(read_sessions))
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+async def get_session_events(request: Request):
+    """Get events for a specific session"""
+    try:
+        session_id = request.path_params['session_id']
+        return JSONResponse(await asyncio.to_thread(read_session_events, session_id))
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+async def get_stats(request: Request):
+    """Get tracking statistics"""
+    try:
+        return JSONResponse(await asyncio.to_thread(compute_stats))
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    app.state.writer = CSVWriter()
+    app.state.writer.start()
+    app.state.http = httpx.AsyncClient(
+        timeout=GEO_TIMEOUT,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    try:
+        yield
+    finally:
+        await app.state.writer.stop()
+        await app.state.http.aclose()
+
+
+routes = [
+    Route('/api/health', health_check, methods=['GET']),
+    Route('/api/get-location', get_location, methods=['GET']),
+    Route('/api/track', track_event, methods=['POST']),
+    Route('/api/sessions', get_sessions, methods=['GET']),
+    Route('/api/events/{session_id}', get_session_events, methods=['GET']),
+    Route('/api/stats', get_stats, methods=['GET']),
+    # Demais rotas (frontend, relatórios, ranking, soluções) seguem no app Flask
+    Mount('/', WSGIMiddleware(backend.app)),
+]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+)
+
+
+def serve(host: str = '0.0.0.0', port: int = 5000) -> None:
+    """Run the ASGI app with uvicorn (single process, asyncio loop)."""
+    import uvicorn
+    uvicorn.run(app, host=host, port=port, proxy_headers=True,
+                timeout_keep_alive=75, log_level='warning')
+
+
+if __name__ == '__main__':
+    import os
+    serve(port=int(os.getenv('BACKEND_PORT', 5000)))
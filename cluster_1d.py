@@ -0,0 +1,261 @@
+"""
+1-D clustering with per-point uncertainty (Python port of cluster_1d_sigma.m).
+
+Same semantics as the MATLAB version: distance |xi - xj| / sqrt(si² + sj²)
+("combined sigmas"), eps picked automatically at the knee of the k-dist
+curve (pick_knee) and clamped to EpsBounds, DBSCAN with MinPts, labels
+1..K numbered in the order the MATLAB loop creates them and 0 for noise.
+
+The dense N×N matrix is never built. Points are sorted once; since
+sqrt(si² + sj²) <= sqrt(si² + smax²), every neighbor of i within eps lies in
+the x-window |xj - xi| <= eps·sqrt(si² + smax²), found with searchsorted.
+Windows are evaluated in chunks whose padded size stays under a fixed
+element budget, so memory is bounded independently of N and time grows with
+the total window size (N × typical neighborhood) instead of N².
+"""
+
+import argparse
+import math
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+MACHINE_EPS = 2.2204e-16
+DEFAULT_EPS_BOUNDS = (1.0, 4.0)
+CHUNK_BUDGET = 1 << 22  # elementos por bloco (pares ponto×vizinho candidatos)
+_WINDOW_SLACK = 1e-12
+
+
+class ClusterResult(NamedTuple):
+    idx: np.ndarray        # rótulos 1..K na ordem original, 0 = ruído
+    eps: float             # epsilon usado (em "sigmas")
+    min_pts: int
+    order: np.ndarray      # ordem dos pontos por x
+    knee: Dict
+
+
+def _round(v: float) -> int:
+    # round do MATLAB: metade se afasta do zero
+    return int(math.floor(abs(v) + 0.5)) * (1 if v >= 0 else -1)
+
+
+def default_min_pts(n: int) -> int:
+    return max(3, _round(math.log(max(n, 3))))
+
+
+# ------------------ Varredura em janelas ------------------
+def _chunks(lo: np.ndarray, hi: np.ndarray, budget: int) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """Yield (start, end, J, valid): padded neighbor indices for rows start..end-1."""
+    N = len(lo)
+    widths = hi - lo
+    start = 0
+    while start < N:
+        head = np.maximum.accumulate(widths[start:start + budget])
+        cost = head * np.arange(1, len(head) + 1)
+        n = max(1, int(np.searchsorted(cost, budget, side='right')))
+        end = start + n
+        W = max(1, int(head[n - 1]))
+        J = lo[start:end, None] + np.arange(W)
+        valid = J < hi[start:end, None]
+        np.minimum(J, N - 1, out=J)
+        yield start, end, J, valid
+        start = end
+
+
+def _window(xs: np.ndarray, ss: np.ndarray, radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """x-window that contains every j with D_ij <= radius_i."""
+    smax = ss.max()
+    half = radius * np.sqrt(ss * ss + smax * smax)
+    half = half * (1 + _WINDOW_SLACK) + _WINDOW_SLACK
+    lo = np.searchsorted(xs, xs - half, side='left')
+    hi = np.searchsorted(xs, xs + half, side='right')
+    return lo, hi
+
+
+def _block_dist(xs, ss, start, end, J, valid) -> np.ndarray:
+    """D for a chunk; invalid slots and self-pairs set to +inf."""
+    xi = xs[start:end, None]
+    si2 = ss[start:end, None] ** 2
+    D = np.abs(xi - xs[J]) / np.sqrt(si2 + ss[J] ** 2)
+    D[~valid] = np.inf
+    D[J == np.arange(start, end)[:, None]] = np.inf
+    return D
+
+
+def kth_neighbor_dist(xs: np.ndarray, ss: np.ndarray, k: int, budget: int = CHUNK_BUDGET) -> np.ndarray:
+    """Sorted k-dist curve (distance of each point to its k-th nearest neighbor)."""
+    N = len(xs)
+    k2 = min(k, N - 1)
+    pos = np.arange(N)
+
+    # 1) cota superior: k-ésimo vizinho entre os k2 vizinhos de posição de cada lado
+    lo = np.maximum(pos - k2, 0)
+    hi = np.minimum(pos + k2 + 1, N)
+    bound = np.empty(N)
+    for start, end, J, valid in _chunks(lo, hi, budget):
+        D = _block_dist(xs, ss, start, end, J, valid)
+        bound[start:end] = np.partition(D, k2 - 1, axis=1)[:, k2 - 1]
+
+    # 2) valor exato: todo vizinho mais próximo que a cota está na janela correspondente
+    lo, hi = _window(xs, ss, bound)
+    kd = np.empty(N)
+    for start, end, J, valid in _chunks(lo, hi, budget):
+        D = _block_dist(xs, ss, start, end, J, valid)
+        kd[start:end] = np.partition(D, k2 - 1, axis=1)[:, k2 - 1]
+    return np.sort(kd)
+
+
+def pick_knee(kd_sorted: np.ndarray, bounds=DEFAULT_EPS_BOUNDS) -> Tuple[float, Dict]:
+    """Triangle ("knee") method on the increasing k-dist curve; eps clamped to bounds.
+
+    idx_knee is 0-based.
+    """
+    y = np.asarray(kd_sorted, dtype=float).ravel()
+    if y.size < 3:
+        return float(np.median(y)) if y.size else float('nan'), {'kdist': y, 'idx_knee': y.size - 1}
+    x = np.arange(1, y.size + 1, dtype=float)
+    x1, y1, x2, y2 = x[0], y[0], x[-1], y[-1]
+    num = np.abs((y2 - y1) * x - (x2 - x1) * y + x2 * y1 - y2 * x1)
+    den = math.sqrt((y2 - y1) ** 2 + (x2 - x1) ** 2)
+    d = num / max(den, MACHINE_EPS)
+    idx_knee = int(np.argmax(d))
+    eps_raw = float(y[idx_knee])
+    eps = min(max(eps_raw, bounds[0]), bounds[1])
+    return eps, {'kdist': y, 'idx_knee': idx_knee, 'eps_raw': eps_raw}
+
+
+# ------------------ Union-find vetorizado ------------------
+def _find(parent: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    roots = parent[nodes]
+    while True:
+        up = parent[roots]
+        if np.array_equal(up, roots):
+            return roots
+        roots = up
+
+
+def _union(parent: np.ndarray, a: np.ndarray, b: np.ndarray) -> None:
+    while a.size:
+        ra, rb = _find(parent, a), _find(parent, b)
+        differ = ra != rb
+        if not differ.any():
+            return
+        a, b, ra, rb = a[differ], b[differ], ra[differ], rb[differ]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+
+
+def _dbscan_sorted(xs, ss, order, eps, min_pts, budget) -> np.ndarray:
+    N = len(xs)
+    lo, hi = _window(xs, ss, np.full(N, eps))
+
+    # vizinhanças: contagem (sem o próprio ponto) -> pontos núcleo
+    counts = np.empty(N, dtype=np.int64)
+    for start, end, J, valid in _chunks(lo, hi, budget):
+        counts[start:end] = (_block_dist(xs, ss, start, end, J, valid) <= eps).sum(axis=1)
+    core = counts + 1 >= min_pts
+
+    # componentes conexas entre núcleos
+    parent = np.arange(N)
+    for start, end, J, valid in _chunks(lo, hi, budget):
+        rows = np.arange(start, end)[:, None]
+        linked = (_block_dist(xs, ss, start, end, J, valid) <= eps) & core[rows] & core[J] & (J > rows)
+        if linked.any():
+            r, c = np.nonzero(linked)
+            _union(parent, r + start, J[r, c])
+        parent = _find(parent, np.arange(N))
+
+    labels_sorted = np.zeros(N, dtype=np.int64)
+    core_pos = np.nonzero(core)[0]
+    if core_pos.size == 0:
+        return np.zeros(N, dtype=np.int64)
+
+    # numeração como no laço do MATLAB: cluster k nasce no k-ésimo menor índice original de núcleo
+    roots = parent[core_pos]
+    first = np.full(N, np.iinfo(np.int64).max)
+    np.minimum.at(first, roots, order[core_pos])
+    uniq_roots = np.unique(roots)
+    rank = np.empty(N, dtype=np.int64)
+    rank[uniq_roots[np.argsort(first[uniq_roots], kind='stable')]] = np.arange(1, uniq_roots.size + 1)
+    labels_sorted[core_pos] = rank[roots]
+
+    # bordas: primeiro cluster (menor rótulo) que alcança o ponto
+    big = np.iinfo(np.int64).max
+    for start, end, J, valid in _chunks(lo, hi, budget):
+        rows = np.arange(start, end)
+        if core[rows].all():
+            continue
+        reach = (_block_dist(xs, ss, start, end, J, valid) <= eps) & core[J]
+        cand = np.where(reach, labels_sorted[J], big).min(axis=1)
+        border = ~core[rows] & (cand != big)
+        labels_sorted[rows[border]] = cand[border]
+
+    labels = np.empty(N, dtype=np.int64)
+    labels[order] = labels_sorted
+    return labels
+
+
+def cluster_1d_sigma(x, s, min_pts: Optional[float] = None, eps: Optional[float] = None,
+                     knee_k: Optional[float] = None, eps_bounds=DEFAULT_EPS_BOUNDS,
+                     verbose: bool = False, budget: int = CHUNK_BUDGET) -> ClusterResult:
+    """Cluster values x with uncertainties s (same options as the MATLAB function)."""
+    x = np.asarray(x, dtype=float).ravel()
+    s = np.asarray(s, dtype=float).ravel()
+    N = x.size
+    if s.size != N:
+        raise ValueError('x e s devem ter o mesmo tamanho.')
+    s = np.maximum(s, MACHINE_EPS)  # evita zero
+
+    min_pts = max(3, _round(min_pts if min_pts is not None else default_min_pts(N)))
+    knee_k = min_pts if knee_k is None else max(2, _round(knee_k))
+
+    order = np.argsort(x, kind='stable')
+    xs, ss = x[order], s[order]
+
+    if eps is None:
+        if N < 2:
+            eps_used, knee = float('nan'), {'kdist': np.zeros(0), 'idx_knee': -1}
+        else:
+            eps_used, knee = pick_knee(kth_neighbor_dist(xs, ss, knee_k, budget), eps_bounds)
+    else:
+        eps_used, knee = float(eps), {'kdist': np.zeros(0), 'idx_knee': -1}
+
+    if N == 0 or math.isnan(eps_used):
+        idx = np.zeros(N, dtype=np.int64)
+    else:
+        idx = _dbscan_sorted(xs, ss, order, eps_used, min_pts, budget)
+
+    if verbose:
+        K = np.unique(idx[idx > 0]).size
+        print(f'[cluster_1d_sigma] N={N} | eps={eps_used:.3f} | MinPts={min_pts} | '
+              f'clusters={K} | noise={int((idx == 0).sum())}')
+
+    return ClusterResult(idx, eps_used, min_pts, order, knee)
+
+
+def cluster_ranking(result: Dict[str, np.ndarray], **options) -> Dict:
+    """Cluster a ranking.compute_ranking result on (Zranking, s_Zrank); JSON-ready."""
+    res = cluster_1d_sigma(result['Zranking'], result['s_Zrank'], **options)
+    return {
+        'labels': res.idx.tolist(),
+        'eps': res.eps,
+        'min_pts': res.min_pts,
+        'n_clusters': int(np.unique(res.idx[res.idx > 0]).size),
+    }
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Benchmark de cluster_1d_sigma (varredura ordenada).')
+    p.add_argument('--n', type=int, default=1_000_000)
+    p.add_argument('--seed', type=int, default=0)
+    args = p.parse_args()
+
+    # grupos densos separados por lacunas ocasionais, sigmas heterogêneos
+    rng = np.random.default_rng(args.seed)
+    gaps = rng.exponential(0.2, size=args.n)
+    gaps[rng.random(args.n) < 1e-3] += 50.0
+    x = rng.permutation(np.cumsum(gaps))
+    s = rng.uniform(0.05, 0.5, size=args.n)
+    t0 = time.perf_counter()
+    res = cluster_1d_sigma(x, s, verbose=True)
+    print(f'{args.n} pontos em {time.perf_counter() - t0:.2f} s')
@@ -1,20 +1,59 @@
 # dash_app.py
-import base64, io, math
-import pandas as pd
-from dash import Dash, html, dcc, Input, Output, State, dash_table, callback_context
+import base64
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from dash import Dash, html, dcc, Input, Output, State, dash_table, DiskcacheManager
 import plotly.graph_objects as go
 
+import ingest
+import ranking
+import rank_stability
+import tiering
+import winner_heatmap
+
+# Jobs pesados (upload, mapa de vencedores, ranking, Monte Carlo, tiers) rodam fora da
+# requisição com o diskcache (dash[diskcache], em requirements.txt): processos locais +
+# resultados em disco, com progresso e cancelamento. Sem ele, os mesmos callbacks rodam síncronos.
+JOB_CACHE_DIR = Path(__file__).resolve().parent / 'cache' / 'dash_jobs'
+JOB_CACHE_BYTES = 1 << 30
+try:
+    import diskcache
+    _disk = diskcache.Cache(str(JOB_CACHE_DIR), size_limit=JOB_CACHE_BYTES)
+    background_manager = DiskcacheManager(_disk)
+except ImportError:
+    _disk = None
+    background_manager = None
+    print('⚠️ diskcache não instalado: jobs do dash_app rodam síncronos na requisição '
+          '(pip install "dash[diskcache]").')
+
 app = Dash(__name__)
 app.title = "Clique sobre o triângulo para definir sua prioridade"
 
-def ternary_fig(r=1/3, g=1/3, b=1/3):
+# Matrizes já interpretadas (por hash do conteúdo enviado) e rankings calculados (colunas já
+# na ordem do ranking, por matriz + prioridades); o navegador guarda só as chaves
+CACHE_SIZES = {"matrix": 8, "result": 16}
+_memory = {kind: OrderedDict() for kind in CACHE_SIZES}
+_memory_lock = threading.Lock()
+# Monte Carlo de estabilidade só até esse tamanho (a matriz de postos é N×N)
+STABILITY_MAX_ALTERNATIVES = 500
+PAGE_SIZE = 12
+
+def ternary_fig(r=1/3, g=1/3, b=1/3, overlay=None):
     # Plotly Ternary: a=Qualidade (topo), b=Prazo (direita), c=Custo (esquerda) por padrão.
     # Vamos mapear labels pra falar sua língua: Custo, Qualidade, Prazo.
-    fig = go.Figure(go.Scatterternary(
+    # O marcador é sempre o último traço (desenhado por cima do mapa de vencedores).
+    fig = go.Figure(([overlay] if overlay is not None else []) + [go.Scatterternary(
         a=[g], b=[b], c=[r],  # mapeamento: a=Qualidade(g), b=Prazo(b), c=Custo(r)
         mode="markers",
-        marker=dict(size=12, color="white", line=dict(width=2,color="black"))
-    ))
+        marker=dict(size=12, color="white", line=dict(width=2,color="black")),
+        hoverinfo="skip"
+    )])
     fig.update_layout(
         ternary=dict(
             sum=1,
@@ -28,9 +67,23 @@ def ternary_fig(r=1/3, g=1/3, b=1/3):
         font=dict(color="#eaeaea"),
         margin=dict(l=30, r=30, t=10, b=10),
         dragmode="pan",  # a interação de clique vamos capturar via clickData
+        showlegend=False,
     )
     return fig
 
+def heatmap_trace(m):
+    """Scatterternary grid colored by the top-ranked alternative; hover text precomputed."""
+    grid = winner_heatmap.cached_grid(m)
+    names = list(m.labels) if m.labels else [f"Alternativa {i+1}" for i in range(len(m))]
+    colors = np.array([f"rgb({r},{g},{b})" for r, g, b in winner_heatmap.palette(len(m))], dtype=object)
+    text = [f"1º: {names[k]}" + ("" if math.isnan(d) else f"<br>margem {d:.3f}")
+            for k, d in zip(grid["winner"].tolist(), grid["margin"].tolist())]
+    return go.Scatterternary(
+        a=grid["g"], b=grid["b"], c=grid["r"], mode="markers",
+        marker=dict(size=9, color=colors[grid["winner"]].tolist(), opacity=0.55, line=dict(width=0)),
+        hovertext=text, hoverinfo="text"
+    )
+
 app.layout = html.Div(style={"background":"#000","color":"#eaeaea","fontFamily":"Segoe UI, Arial"},
     children=[
         html.H3("Clique sobre o triângulo para definir sua prioridade", style={"textAlign":"center"}),
@@ -48,7 +101,10 @@ app.layout = html.Div(style={"background":"#000","color":"#eaeaea","fontFamily":
             html.Label(["Prazo", dcc.Input(id="time", type="number", min=0, max=100, step=0.5, value=33.33,
                                            style={"width":"110px","fontWeight":"700"})]),
             html.Button("Confirma", id="confirm", n_clicks=0,
-                        style={"fontWeight":"800","padding":"10px 16px","borderRadius":"12px","background":"#21c999","color":"#071b14","border":"1px solid #17a97f"})
+                        style={"fontWeight":"800","padding":"10px 16px","borderRadius":"12px","background":"#21c999","color":"#071b14","border":"1px solid #17a97f"}),
+            html.Button("Cancelar", id="cancel_job", n_clicks=0, disabled=True,
+                        style={"padding":"10px 16px","borderRadius":"12px","background":"#2a2a2a","color":"#eaeaea","border":"1px solid #444"}),
+            html.Progress(id="progress", value="0", max="1", style={"width":"120px"})
         ]),
 
         html.Div(style={"maxWidth":"980px","margin":"0 auto","padding":"12px","background":"#0e0e0e","border":"1px solid #222","borderRadius":"12px"},
@@ -57,12 +113,21 @@ app.layout = html.Div(style={"background":"#000","color":"#eaeaea","fontFamily":
             dcc.Upload(id="csv_up", children=html.Div(["Arraste/solte ou ", html.B("selecione um CSV")]),
                        style={"width":"100%","height":"60px","lineHeight":"60px","borderWidth":"1px","borderStyle":"dashed",
                               "borderRadius":"10px","textAlign":"center","borderColor":"#333","color":"#b8b8b8"}),
+            dcc.Store(id="matrix_key"),
+            dcc.Store(id="result_key"),
             html.Div(id="msg", style={"marginTop":"10px","whiteSpace":"pre-line"}),
             dash_table.DataTable(id="table",
                                  columns=[{"name":"id","id":"id"},
                                           {"name":"Zranking","id":"Zranking","type":"numeric","format":dict(specifier=".5f")},
-                                          {"name":"s_Zrank","id":"s_Zrank","type":"numeric","format":dict(specifier=".5f")}],
-                                 sort_action="native", page_size=12,
+                                          {"name":"s_Zrank","id":"s_Zrank","type":"numeric","format":dict(specifier=".5f")},
+                                          {"name":"Nota","id":"nota","type":"numeric"},
+                                          {"name":"Margem de Erro","id":"margemErro","type":"numeric"},
+                                          {"name":"P(1º)","id":"p_top","type":"numeric","format":dict(specifier=".1%")},
+                                          {"name":"Rank esperado","id":"rank_esperado","type":"numeric","format":dict(specifier=".2f")},
+                                          {"name":"Tier","id":"tier"}],
+                                 page_action="custom", page_current=0, page_size=PAGE_SIZE, page_count=0,
+                                 sort_action="custom", sort_mode="single", sort_by=[],
+                                 filter_action="custom", filter_query="",
                                  style_header={"backgroundColor":"#151515","color":"#ddd","fontWeight":"700"},
                                  style_cell={"backgroundColor":"#0e0e0e","color":"#e6e6e6","border":"1px solid #1e1e1e",
                                              "fontFamily":"Segoe UI, Arial","fontSize":"14px"})
@@ -70,98 +135,290 @@ app.layout = html.Div(style={"background":"#000","color":"#eaeaea","fontFamily":
     ]
 )
 
-def normalize_triplet(c,q,t):
-    s = max(c+q+t, 1e-12)
-    return (100*c/s, 100*q/s, 100*t/s)
-
-@app.callback(
+# Sincronização triângulo <-> campos inteiramente no navegador: a figura completa vai uma
+# vez no layout e cada clique/tecla só troca as coordenadas do marcador (sem ida ao servidor).
+# Mesma normalização de antes: clique -> percentuais do ponto; entrada manual -> auto-balance.
+app.clientside_callback(
+    """
+    function(clickData, cost_v, qual_v, time_v, figure) {
+        const ctx = dash_clientside.callback_context;
+        const trig = ctx.triggered.length ? ctx.triggered[0].prop_id : "";
+        let rP, gP, bP;
+        if (trig.indexOf("tern.clickData") !== -1 && clickData) {
+            // Mapeamento ternário Plotly: a=Qualidade, b=Prazo, c=Custo
+            const p = clickData.points[0];
+            const r = +(p.c || 0), g = +(p.a || 0), b = +(p.b || 0);
+            const s = Math.max(r + g + b, 1e-12);
+            rP = 100 * r / s; gP = 100 * g / s; bP = 100 * b / s;
+        } else {
+            rP = +(cost_v || 0); gP = +(qual_v || 0); bP = +(time_v || 0);
+            const s = rP + gP + bP;
+            if (s <= 0) { rP = gP = bP = 33.3333; }
+            else { rP = rP / s * 100; gP = gP / s * 100; bP = bP / s * 100; }
+        }
+        const last = figure.data.length - 1;  // marcador = último traço
+        const marker = Object.assign({}, figure.data[last], {a: [gP / 100], b: [bP / 100], c: [rP / 100]});
+        return [rP, gP, bP, Object.assign({}, figure, {data: figure.data.slice(0, last).concat([marker])})];
+    }
+    """,
     Output("cost","value"), Output("qual","value"), Output("time","value"), Output("tern","figure"),
-    Input("tern","clickData"), Input("cost","value"), Input("qual","value"), Input("time","value")
+    Input("tern","clickData"), Input("cost","value"), Input("qual","value"), Input("time","value"),
+    State("tern","figure")
 )
-def sync_weights(clickData, cost_v, qual_v, time_v):
-    trig = [p["prop_id"] for p in callback_context.triggered][0] if callback_context.triggered else ""
-    # Mapeamento ternário Plotly: ponto tem chaves 'a','b','c' (a=Qualidade, b=Prazo, c=Custo)
-    if "tern.clickData" in trig and clickData:
-        p = clickData["points"][0]
-        g = float(p.get("a", 0.0))   # Qualidade
-        b = float(p.get("b", 0.0))   # Prazo
-        r = float(p.get("c", 0.0))   # Custo
-        rP, gP, bP = normalize_triplet(r, g, b)
-        fig = ternary_fig(rP/100, gP/100, bP/100)
-        return rP, gP, bP, fig
-    else:
-        # Entrada manual → auto-balance proporcional
-        rP = float(cost_v or 0.0); gP = float(qual_v or 0.0); bP = float(time_v or 0.0)
-        s = rP + gP + bP
-        if s <= 0: rP=gP=bP=33.3333
-        else: rP, gP, bP = [x/s*100 for x in (rP,gP,bP)]
-        fig = ternary_fig(rP/100, gP/100, bP/100)
-        return rP, gP, bP, fig
 
 def parse_contents(contents):
     # contents = "data:text/csv;base64,...."
     content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    return decoded.decode('utf-8', errors='ignore')
+    return base64.b64decode(content_string)
 
-@app.callback(
-    Output("table","data"), Output("msg","children"),
+def remember(kind, key, value):
+    with _memory_lock:
+        lru = _memory[kind]
+        lru[key] = value
+        lru.move_to_end(key)
+        while len(lru) > CACHE_SIZES[kind]:
+            lru.popitem(last=False)
+    if _disk is not None:
+        _disk.set((kind, key), value)  # visível para o processo web e para os jobs
+
+def recall(kind, key):
+    if not key:
+        return None
+    with _memory_lock:
+        value = _memory[kind].get(key)
+        if value is not None:
+            _memory[kind].move_to_end(key)
+            return value
+    value = _disk.get((kind, key)) if _disk is not None else None
+    if value is not None:
+        with _memory_lock:
+            _memory[kind][key] = value
+            while len(_memory[kind]) > CACHE_SIZES[kind]:
+                _memory[kind].popitem(last=False)
+    return value
+
+def cache_matrix(data):
+    """Parse the upload once and keep the typed matrix in the store; returns its key."""
+    key = hashlib.sha256(data).hexdigest()[:16]
+    if recall("matrix", key) is None:
+        # separador/vírgula decimal detectados num prefixo e aliases de colunas resolvidos
+        # uma vez por cabeçalho (ZCusto, ZQualidade, ZPrazo, sigmas e covariâncias, se houver)
+        remember("matrix", key, ingest.parse_zscores_bytes(data))
+    return key
+
+def cached_matrix(key):
+    return recall("matrix", key)
+
+def job_callback(*dependencies, progress=None, running=None, cancel=None, **kwargs):
+    """app.callback as a background job when a manager is available, synchronous otherwise.
+
+    The decorated function always receives set_progress as its first argument; other
+    keyword arguments (e.g. prevent_initial_call) go to app.callback unchanged.
+    """
+    def decorator(func):
+        def without_progress(*args):
+            return func(lambda *_: None, *args)
+        without_progress.__name__ = func.__name__
+
+        if background_manager is None:
+            return app.callback(*dependencies, **kwargs)(without_progress)
+        # o Dash só passa set_progress quando há saídas de progresso
+        return app.callback(*dependencies, background=True, manager=background_manager,
+                            progress=progress, running=running, cancel=cancel,
+                            **kwargs)(func if progress else without_progress)
+    return decorator
+
+@job_callback(
+    Output("matrix_key","data"),
+    Input("csv_up","contents")
+)
+def store_upload(set_progress, csv_contents):
+    if not csv_contents:
+        return None
+    try:
+        return {"key": cache_matrix(parse_contents(csv_contents))}
+    except KeyError as e:
+        return {"error": str(e.args[0])}
+
+# Mapa de vencedores: calculado uma vez por matriz (grade do simplex), como job; o hover só
+# lê o texto já pronto de cada ponto, sem ida ao servidor
+@job_callback(
+    Output("tern","figure", allow_duplicate=True),
+    Input("matrix_key","data"),
+    State("cost","value"), State("qual","value"), State("time","value"),
+    prevent_initial_call=True
+)
+def show_heatmap(set_progress, stored, rP, gP, bP):
+    m = cached_matrix(stored.get("key")) if stored else None
+    r = (rP or 0)/100.0; g = (gP or 0)/100.0; b = (bP or 0)/100.0
+    return ternary_fig(r, g, b, overlay=heatmap_trace(m) if m is not None and len(m) else None)
+
+@job_callback(
+    Output("result_key","data"), Output("msg","children"),
     Input("confirm","n_clicks"),
     State("cost","value"), State("qual","value"), State("time","value"),
-    State("csv_up","contents")
+    State("matrix_key","data"),
+    # Confirma fica habilitado durante o job: um novo clique substitui o job em andamento
+    # (o Dash encerra o anterior); Cancelar só o interrompe
+    progress=[Output("progress","value"), Output("progress","max")],
+    running=[(Output("cancel_job","disabled"), False, True)],
+    cancel=[Input("cancel_job","n_clicks")]
 )
-def compute(n_clicks, rP, gP, bP, csv_contents):
+def compute(set_progress, n_clicks, rP, gP, bP, stored):
     if not n_clicks:
-        return [], ""
-    if not csv_contents:
-        return [], "Selecione o CSV antes de confirmar."
+        return None, ""
+    if not stored:
+        return None, "Selecione o CSV antes de confirmar."
+    if stored.get("error"):
+        return None, stored["error"]
+    m = cached_matrix(stored.get("key"))
+    if m is None:
+        return None, "O CSV expirou no servidor; selecione-o novamente."
 
     # pesos puros 0..1
     r = (rP or 0)/100.0; g = (gP or 0)/100.0; b = (bP or 0)/100.0
-    text = parse_contents(csv_contents)
 
-    # tenta ; ou , e vírgula decimal
-    try:
-      df = pd.read_csv(io.StringIO(text), sep=None, engine="python")
-    except Exception:
-      df = pd.read_csv(io.StringIO(text), sep=';')
-
-    # tenta mapear nomes (ajuste se os seus forem diferentes)
-    # Esperados: ZCusto, ZQualidade, ZPrazo, s_Zcusto, s_ZQual, s_ZPrazo
-    cols = {c.lower().replace(" ", ""): c for c in df.columns}
-    def get_like(keys):
-        for k in keys:
-            if k in cols: return cols[k]
-        raise KeyError(keys)
-    ZC = get_like(["zcusto","zcost"])
-    ZQ = get_like(["zqualidade","zqual","zquality"])
-    ZP = get_like(["zprazo","zdeadline","ztime"])
-    sC = get_like(["s_zcusto","szcusto","s_zcost"])
-    sQ = get_like(["s_zqual","s_zqualidade","szqual"])
-    sP = get_like(["s_zprazo","szprazo","s_ztime"])
-    # id opcional
-    ID = None
-    for cand in ["id","nome","alternativa","opcao","item"]:
-        if cand in cols: ID = cols[cand]; break
-
-    # coerciona números (aceita vírgula)
-    for c in [ZC,ZQ,ZP,sC,sQ,sP]:
-        df[c] = (df[c].astype(str).str.replace(",", ".", regex=False)).astype(float)
-
-    # Zranking e s_Zrank
-    df["Zranking"] = (-r*df[ZC]) + (g*df[ZQ]) - (b*df[ZP])
-    df["s_Zrank"]  = ((r*df[sC])**2 + (g*df[sQ])**2 + (b*df[sP])**2).pow(0.5)
-
-    df["id"] = df[ID] if ID else range(1, len(df)+1)
-    df = df.sort_values("Zranking", ascending=False)[["id","Zranking","s_Zrank"]]
+    key = f"{stored['key']}:{r:.9f}:{g:.9f}:{b:.9f}"
+    if recall("result", key) is None:
+        remember("result", key, ranked_columns(m, r, g, b, set_progress))
 
     msg = (f"Suas prioridades de seleção da solução:\n\n"
            f"{r*100:.2f}% de peso para custo anual,\n"
            f"{g*100:.2f}% de qualidade (aderência a seus requisitos) e\n"
            f"{b*100:.2f}% para prazo.")
+    if len(m) > STABILITY_MAX_ALTERNATIVES:
+        msg += f"\n\n(P(1º) e rank esperado só são calculados até {STABILITY_MAX_ALTERNATIVES} alternativas.)"
+
+    return key, msg
+
+def ranked_columns(m, r, g, b, set_progress=lambda *_: None):
+    """Table columns as arrays, already in ranking order."""
+    steps = 3
+    set_progress(("0", str(steps)))
+    res = ranking.compute_ranking(m, r, g, b)
+    order = res["order"]
+    ids = np.asarray(m.labels, dtype=object) if m.labels else np.arange(1, len(m)+1)
+    cols = {"id": ids[order], "Zranking": res["Zranking"][order], "s_Zrank": res["s_Zrank"][order],
+            "nota": res["nota"][order], "margemErro": res["margemErro"][order]}
+    set_progress(("1", str(steps)))
+    if len(m) <= STABILITY_MAX_ALTERNATIVES:
+        # estabilidade do ranking (Monte Carlo sobre sigmas/covariâncias); semente fixa = tabela estável
+        mc = rank_stability.rank_probabilities(m, r, g, b, seed=0)
+        cols["p_top"] = mc["p_top"][order]
+        cols["rank_esperado"] = mc["expected_rank"][order]
+    set_progress(("2", str(steps)))
+    # tiers do pódio (Ouro, Prata, ...); tier_n é a chave numérica de ordenação
+    tiers = tiering.tiers(cols["nota"])
+    cols["tier_n"] = tiers["labels"]
+    cols["tier"] = np.array([tiering.tier_name(t) for t in range(tiers["k"] + 1)], dtype=object)[tiers["labels"]]
+    set_progress((str(steps), str(steps)))
+    return cols
+
+# ------------------ Tabela: paginação/ordenação/filtro no servidor ------------------
+SORT_KEYS = {"tier": "tier_n"}  # tiers ordenam pela posição, não pelo nome
+FILTER_OPERATORS = [['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'],
+                    ['ne ', '!='], ['eq ', '='], ['contains '], ['datestartswith ']]
+
+def split_filter_part(filter_part):
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1:-1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return [None] * 3
 
-    return df.to_dict("records"), msg
+def filter_mask(cols, filter_query):
+    n = len(next(iter(cols.values())))
+    mask = np.ones(n, dtype=bool)
+    for part in (filter_query or "").split(' && '):
+        name, op, value = split_filter_part(part)
+        col = cols.get(name)
+        if col is None:
+            continue
+        if op in ('contains', 'datestartswith'):
+            text = col.astype(str)
+            needle = str(value)
+            hit = np.char.find(text, needle) >= 0 if op == 'contains' else np.char.startswith(text, needle)
+            mask &= hit
+            continue
+        if col.dtype == object:
+            col, value = col.astype(str), str(value)
+        elif isinstance(value, str):
+            continue  # texto contra coluna numérica: ignora, como a tabela nativa
+        mask &= {'ge': col >= value, 'le': col <= value, 'lt': col < value,
+                 'gt': col > value, 'ne': col != value, 'eq': col == value}[op]
+    return mask
+
+def top_rows(key, k, descending):
+    """Positions of the k first rows ordered by key; partial selection instead of a full sort.
+
+    Ties keep ranking order, so consecutive pages are consistent with a stable full sort.
+    """
+    n = key.size
+    if key.dtype == object:
+        # posto de cada texto: negável, então a ordem decrescente também mantém os empates estáveis
+        _, codes = np.unique(key.astype(str), return_inverse=True)
+        return np.argsort(-codes if descending else codes, kind="stable")[:k]
+    values = -key if descending else key
+    values = np.where(np.isnan(values), np.inf, values)  # NaN por último, como no Dash
+    if k < n:
+        kth = np.partition(values, k - 1)[k - 1]
+        cand = np.nonzero(values <= kth)[0]
+    else:
+        cand = np.arange(n)
+    return cand[np.lexsort((cand, values[cand]))][:k]
+
+@app.callback(
+    Output("table","data"), Output("table","page_count"),
+    Input("table","page_current"), Input("table","page_size"),
+    Input("table","sort_by"), Input("table","filter_query"),
+    Input("result_key","data")
+)
+def update_table(page_current, page_size, sort_by, filter_query, result_key):
+    cols = recall("result", result_key)
+    if cols is None:
+        return [], 0
+    page_current = page_current or 0
+    page_size = page_size or PAGE_SIZE
+
+    rows = np.nonzero(filter_mask(cols, filter_query))[0]
+    page_count = max(1, math.ceil(rows.size / page_size))
+    end = min((page_current + 1) * page_size, rows.size)
+    sort_col = SORT_KEYS.get(sort_by[0]["column_id"], sort_by[0]["column_id"]) if sort_by else None
+    if sort_col in cols:
+        sel = top_rows(cols[sort_col][rows], end, sort_by[0]["direction"] == "desc")
+        page = rows[sel[page_current * page_size:end]]
+    else:
+        page = rows[page_current * page_size:end]  # já na ordem do ranking
+
+    data = []
+    for i in page.tolist():
+        row = {}
+        for name, col in cols.items():
+            v = col[i]
+            row[name] = v.item() if isinstance(v, np.generic) else v
+        data.append(row)
+    return data, page_count
 
 if __name__ == "__main__":
-    app.run(debug=True, port=8050)
+    DASH_PORT = int(os.getenv("DASH_PORT", 8050))
+    is_production = os.getenv("FLASK_ENV") == "production" or os.getenv("ENVIRONMENT") == "production"
+    print("⚙️ Jobs em segundo plano:", "diskcache" if background_manager else "desativados (síncrono)")
+    if is_production:
+        # Produção: Waitress servindo o Flask interno do Dash
+        from waitress import serve
+        print(f"🚀 Dash em produção: http://0.0.0.0:{DASH_PORT}")
+        serve(app.server, host="0.0.0.0", port=DASH_PORT, threads=int(os.getenv("DASH_THREADS", 8)))
+    else:
+        app.run(debug=True, port=DASH_PORT)
 
@@ -1,8 +1,21 @@
 import argparse
+import hashlib
+import json
+import tempfile
+import time
 import tkinter as tk
+from collections import deque
+from pathlib import Path
 from tkinter import ttk
+
+import numpy as np
 from PIL import Image, ImageTk, ImageOps
 
+import ranking
+import simplex_geometry
+import winner_heatmap
+import zscores
+
 # ====== CONFIG UI ======
 BG_COLOR = "#000000"               # fundo preto
 POINT_RADIUS = 8
@@ -10,6 +23,8 @@ FONT_LABEL = ("Segoe UI", 13, "bold")
 FONT_NUM   = ("Segoe UI", 14, "bold")  # campos (Spinbox) em negrito e maiores
 FONT_BTN   = ("Segoe UI", 13, "bold")  # botão Confirma maior
 SPIN_INCREMENT = 0.50                  # passo das setinhas (em %)
+FRAME_MS = 16                          # arrasto: no máximo um redesenho por quadro (~60 Hz)
+LATENCY_SAMPLES = 240                  # janela de medição evento -> pintura
 
 # Vértices (top,left,right) -> canais. Seu PNG: topo=B, esquerda=R, direita=G
 VERTEX_TO_CHANNEL = ("B","R","G")
@@ -20,37 +35,25 @@ LABEL_COLORS = {"R": "#ff4d4d", "G": "#baff38", "B": "#52b4ff"}
 VERTEX_LABEL_FONT = ("Segoe UI", 28, "bold")
 VERTEX_LABEL_OFFSET = 22  # deslocamento para fora do triângulo
 
-# ------------------ Geometria/básico ------------------
-def _area(x1,y1, x2,y2, x3,y3):
-    return (x2 - x1)*(y3 - y1) - (x3 - x1)*(y2 - y1)
+# Cache de geometria (vértices detectados) por hash da imagem + escala
+CACHE_DIR = Path(__file__).resolve().parent / "cache" / "triangle"
+VERTEX_CACHE_FILE = CACHE_DIR / "vertices.json"
 
+# ------------------ Geometria/básico ------------------
+# Escalares: um ponto por vez (eventos da UI); versões em lote em simplex_geometry
 def barycentric(px, py, a, b, c):
-    (x1,y1),(x2,y2),(x3,y3) = a,b,c
-    denom = _area(x1,y1,x2,y2,x3,y3)
-    if abs(denom) < 1e-9:
-        return (0.0,0.0,0.0)
-    w1 = _area(px,py,x2,y2,x3,y3) / denom    # peso do vértice 'a' (top)
-    w2 = _area(px,py,x3,y3,x1,y1) / denom    # peso do vértice 'b' (left)
-    w3 = 1.0 - w1 - w2                       # peso do vértice 'c' (right)
-    return (w1,w2,w3)
+    return tuple(float(v) for v in simplex_geometry.barycentric(px, py, a, b, c))
 
 def is_inside_simplex(w1, w2, w3, tol=1e-4):
-    return (w1 >= -tol) and (w2 >= -tol) and (w3 >= -tol)
+    return bool(simplex_geometry.is_inside_simplex((w1, w2, w3), tol))
 
 def to_cartesian(w1,w2,w3, a,b,c):
-    x = w1*a[0] + w2*b[0] + w3*c[0]
-    y = w1*a[1] + w2*b[1] + w3*c[1]
-    return (x,y)
+    x, y = simplex_geometry.to_cartesian((w1, w2, w3), a, b, c)
+    return (float(x), float(y))
 
 def bary_to_rgb(w_top, w_left, w_right, vertex_to_channel):
     """(w_top, w_left, w_right) -> (r,g,b) conforme mapeamento; normaliza."""
-    label_idx = {"R":0, "G":1, "B":2}
-    out = [0.0, 0.0, 0.0]
-    weights = [w_top, w_left, w_right]  # (top,left,right)
-    for i, label in enumerate(vertex_to_channel):
-        out[label_idx[label]] = weights[i]
-    s = max(sum(out), 1e-12)
-    return (out[0]/s, out[1]/s, out[2]/s)
+    return tuple(float(v) for v in simplex_geometry.bary_to_rgb((w_top, w_left, w_right), vertex_to_channel))
 
 # ------------------ Imagem ------------------
 def load_triangle_image(path):
@@ -64,33 +67,114 @@ def load_triangle_image(path):
         img = Image.merge("RGBA", (r,g,b,a))
     return img
 
-def _extreme_with_band(points, key_index, choose_min=True, band_px=3):
-    vals = [p[key_index] for p in points]
-    extreme_val = min(vals) if choose_min else max(vals)
-    band = [p for p in points if abs(p[key_index] - extreme_val) <= band_px]
-    other = 1 - key_index
-    if key_index == 1:  # topo: menor y -> preferir x central
-        cx = sum(p[0] for p in band)/max(len(band),1)
-        best = min(band, key=lambda p: abs(p[0]-cx))
-    else:
-        best = max(band, key=lambda p: p[1])  # base mais baixa
-    return best
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def _extreme_with_band(mask, key_index, choose_min=True, band_px=3):
+    """Same choice as the former point-list scan, over the boolean alpha mask (h, w).
+
+    Topo (key_index=1): faixa das band_px+1 primeiras linhas, x mais próximo da média.
+    Laterais (key_index=0): faixa de colunas no extremo, ponto mais baixo (menor x no empate).
+    """
+    if key_index == 1:
+        rows = np.flatnonzero(mask.any(axis=1))
+        y0 = rows[0] if choose_min else rows[-1] - band_px
+        y0 = max(int(y0), 0)
+        ys, xs = np.nonzero(mask[y0:y0 + band_px + 1])
+        i = int(np.argmin(np.abs(xs - xs.mean())))
+        return (int(xs[i]), int(ys[i]) + y0)
+
+    cols = np.flatnonzero(mask.any(axis=0))
+    x0 = int(cols[0]) if choose_min else max(int(cols[-1]) - band_px, 0)
+    band = mask[:, x0:x0 + band_px + 1]
+    y = int(np.flatnonzero(band.any(axis=1))[-1])
+    return (x0 + int(np.argmax(band[y])), y)
 
 def detect_vertices(img, alpha_threshold=8):
-    a = img.split()[-1]
     w,h = img.size
-    pix = a.load()
-    pts = [(x,y) for y in range(h) for x in range(w) if pix[x,y] >= alpha_threshold]
-    if not pts:
+    mask = np.asarray(img.getchannel("A")) >= alpha_threshold
+    if not mask.any():
         return (w//2,0),(0,h-1),(w-1,h-1)
-    top    = _extreme_with_band(pts, key_index=1, choose_min=True,  band_px=2)
-    left   = _extreme_with_band(pts, key_index=0, choose_min=True,  band_px=2)
-    right  = _extreme_with_band(pts, key_index=0, choose_min=False, band_px=2)
+    top    = _extreme_with_band(mask, key_index=1, choose_min=True,  band_px=2)
+    left   = _extreme_with_band(mask, key_index=0, choose_min=True,  band_px=2)
+    right  = _extreme_with_band(mask, key_index=0, choose_min=False, band_px=2)
     return top, left, right
 
+def cached_vertices(img, source_hash, scale, alpha_threshold=8):
+    """detect_vertices(img) memoized on disk per (source image hash, scale, threshold)."""
+    key = f"{source_hash}@{scale:.6f}@{alpha_threshold}"
+    try:
+        cache = json.loads(VERTEX_CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+    if key in cache:
+        return tuple(tuple(v) for v in cache[key])
+
+    vertices = detect_vertices(img, alpha_threshold)
+    cache[key] = [list(v) for v in vertices]
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = VERTEX_CACHE_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cache), encoding="utf-8")
+        tmp.replace(VERTEX_CACHE_FILE)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar cache de vértices: {e}")
+    return vertices
+
+def fit_size(src_size, max_img_h):
+    """(scale, new_w, new_h) so the image fits max_img_h (never enlarges)."""
+    w, h = src_size
+    scale = 1.0
+    if h > max_img_h:
+        scale = max_img_h / h
+    return scale, int(w * scale), int(h * scale)
+
+def prepared_triangle(path, max_img_h):
+    """(image, vertices, scale): alpha-keyed, resized image plus its vertices.
+
+    Cached in cache/triangle/ per (source hash, target size): a warm start only
+    decodes a small PNG and reads the JSON geometry, with no alpha keying,
+    LANCZOS resize or vertex scan.
+    """
+    src_hash = file_hash(path)
+    with Image.open(path) as im:  # só o cabeçalho: tamanho sem decodificar
+        src_size = im.size
+    scale, new_w, new_h = fit_size(src_size, max_img_h)
+    key = f"{src_hash}-{new_w}x{new_h}"
+    asset = CACHE_DIR / f"{key}.png"
+    meta = CACHE_DIR / f"{key}.json"
+
+    try:
+        vertices = json.loads(meta.read_text(encoding="utf-8"))["vertices"]
+        img = Image.open(asset)
+        img.load()
+        if img.mode == "RGBA" and img.size == (new_w, new_h):
+            return img, tuple(tuple(v) for v in vertices), scale
+    except (OSError, ValueError, KeyError):
+        pass
+
+    img = load_triangle_image(path)
+    if (new_w, new_h) != img.size:
+        img = img.resize((new_w, new_h), Image.LANCZOS)
+    vertices = cached_vertices(img, src_hash, scale)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = asset.with_suffix(".tmp")
+        img.save(tmp, format="PNG", compress_level=1)
+        tmp.replace(asset)
+        # meta por último: só existe com o PNG já completo
+        tmp = meta.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"source": str(path), "scale": scale, "vertices": [list(v) for v in vertices]}),
+                       encoding="utf-8")
+        tmp.replace(meta)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar cache do triângulo: {e}")
+    return img, vertices, scale
+
 # ------------------ App ------------------
 class RGBTriangleApp(tk.Tk):
-    def __init__(self, img_path, debug=False):
+    def __init__(self, img_path, debug=False, heatmap=None):
         super().__init__()
         self.title("Clique sobre o triângulo para definir sua prioridade")
 
@@ -101,7 +185,6 @@ class RGBTriangleApp(tk.Tk):
             pass
 
         self.debug = debug
-        self.src_img_orig = load_triangle_image(img_path)
 
         # ---- Fit automático na tela (mantém ponta e controles à vista) ----
         scr_h = self.winfo_screenheight()
@@ -110,12 +193,9 @@ class RGBTriangleApp(tk.Tk):
         max_canvas_h = max(300, scr_h - controls_h - 80)
         max_img_h = max_canvas_h - (pad_top + pad_bottom)
 
-        scale = 1.0
-        if self.src_img_orig.height > max_img_h:
-            scale = max_img_h / self.src_img_orig.height
-        new_w = int(self.src_img_orig.width * scale)
-        new_h = int(self.src_img_orig.height * scale)
-        self.src_img = self.src_img_orig.resize((new_w, new_h), Image.LANCZOS)
+        # imagem já com fundo transparente, redimensionada e com vértices (cache em disco)
+        self.src_img, vertices, scale = prepared_triangle(img_path, max_img_h)
+        new_w, new_h = self.src_img.size
 
         self.canvas_pad_top = pad_top
         self.canvas_pad_bottom = pad_bottom
@@ -130,17 +210,26 @@ class RGBTriangleApp(tk.Tk):
                                 bg=BG_COLOR, highlightthickness=0)
         self.canvas.pack(side=tk.TOP, fill=tk.BOTH)
 
-        self.img_tk = ImageTk.PhotoImage(self.src_img)
         self.img_x = (self.window_w - new_w) // 2
         self.img_y = self.canvas_pad_top
-        self.canvas.create_image(self.img_x, self.img_y, image=self.img_tk, anchor="nw")
 
         # Vértices (na imagem já redimensionada)
-        top, left, right = detect_vertices(self.src_img)
+        top, left, right = vertices
         self.V_top   = (top[0]  + self.img_x, top[1]  + self.img_y)
         self.V_left  = (left[0] + self.img_x, left[1] + self.img_y)
         self.V_right = (right[0]+ self.img_x, right[1]+ self.img_y)
 
+        # Mapa de vencedores (opcional): cor da alternativa em 1º em cada pixel
+        self.winners = None
+        shown = self.src_img
+        if heatmap is not None:
+            shown = self._load_heatmap(heatmap) or shown
+
+        self.img_tk = ImageTk.PhotoImage(shown)
+        self.canvas.create_image(self.img_x, self.img_y, image=self.img_tk, anchor="nw")
+        self.hover_id = self.canvas.create_text(10, self.canvas_h - 8, text="", fill="#eaeaea",
+                                                font=FONT_LABEL, anchor="sw")
+
         # RÓTULOS nos vértices (pra fora do triângulo)
         self._draw_vertex_labels()
 
@@ -191,15 +280,58 @@ class RGBTriangleApp(tk.Tk):
         self.point_id = None
         self.update_point_from_rgb()
 
+        # Arrasto: eventos de movimento agrupados por quadro
+        self._pending_drag = None   # (x, y, instante do 1º evento ainda não pintado)
+        self._frame_job = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # ms entre evento e pintura
+
         # Eventos (clique e arrasto)
         self.canvas.bind("<Button-1>", self.on_click)
-        self.canvas.bind("<B1-Motion>", self.on_click)  # arrastar com botão 1
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        if self.winners is not None:
+            self.canvas.bind("<Motion>", self.on_hover)
         for sp in (self.spin_r, self.spin_g, self.spin_b):
             sp.bind("<Return>", self.on_spin_commit)
             sp.bind("<FocusOut>", self.on_spin_commit)
             sp.bind("<<Increment>>", self.on_spin_commit)
             sp.bind("<<Decrement>>", self.on_spin_commit)
 
+    # ---------- Mapa de vencedores ----------
+    def _load_heatmap(self, zscores_csv):
+        """Overlay image for the winner raster of a Z-score CSV ('' = default file), or None."""
+        try:
+            m = zscores.cached_matrix(zscores_csv or None)
+        except (OSError, KeyError) as e:
+            print(f"⚠️ Mapa de vencedores indisponível: {e}")
+            return None
+        if m.labels:
+            self.winner_names = list(m.labels)
+        else:
+            try:
+                names = [n["nome"] for n in ranking.cached_names()]
+            except (OSError, KeyError):
+                names = []
+            self.winner_names = names if len(names) == len(m) else [f"Alternativa {i+1}" for i in range(len(m))]
+
+        # grade em coordenadas do canvas: o pixel sob o mouse tem o mesmo vencedor que o clique
+        self.winners = winner_heatmap.cached_raster(
+            m, self.src_img.size, (self.V_top, self.V_left, self.V_right), VERTEX_TO_CHANNEL,
+            origin=(self.img_x, self.img_y))
+        overlay = winner_heatmap.overlay_image(self.winners, len(m))
+        return Image.alpha_composite(self.src_img, overlay)
+
+    def on_hover(self, ev):
+        hit = self.winners.at(ev.x - self.img_x, ev.y - self.img_y)
+        if hit is None:
+            text = ""
+        else:
+            k, margin = hit
+            text = f"1º: {self.winner_names[k]}"
+            if margin == margin:  # NaN com uma só alternativa
+                text += f"  (margem {margin:.3f})"
+        self.canvas.itemconfigure(self.hover_id, text=text)
+
     # ---------- Rótulos nos vértices ----------
     def _draw_vertex_labels(self):
         # Mapeamento: topo=B (Prazo), esquerda=R (Custo), direita=G (Qualidade)
@@ -311,6 +443,45 @@ class RGBTriangleApp(tk.Tk):
         r, g, b = bary_to_rgb(w_top, w_left, w_right, VERTEX_TO_CHANNEL)
         self.set_rgb((r, g, b), update_entries=True, move_point=True)
 
+    def on_drag(self, ev):
+        # só guarda a última posição; o quadro agendado aplica uma vez
+        t0 = self._pending_drag[2] if self._pending_drag else time.perf_counter()
+        self._pending_drag = (ev.x, ev.y, t0)
+        if self._frame_job is None:
+            self._frame_job = self.after(FRAME_MS, self._commit_frame)
+
+    def on_release(self, ev):
+        if self._frame_job is not None:
+            self.after_cancel(self._frame_job)
+            self._commit_frame()
+        if self.debug and self.latencies:
+            st = self.latency_stats()
+            print(f"arrasto: {st['frames']} quadros | evento->pintura p50 {st['p50']:.1f} ms | p95 {st['p95']:.1f} ms")
+
+    def _commit_frame(self):
+        self._frame_job = None
+        if self._pending_drag is None:
+            return
+        x, y, t0 = self._pending_drag
+        self._pending_drag = None
+
+        a,b,c = self.V_top, self.V_left, self.V_right
+        w_top, w_left, w_right = barycentric(x, y, a, b, c)
+        if not is_inside_simplex(w_top, w_left, w_right):
+            return  # fora do triângulo: marcador fica onde está
+        r, g, b = bary_to_rgb(w_top, w_left, w_right, VERTEX_TO_CHANNEL)
+        self.set_rgb((r, g, b), update_entries=True, move_point=True)
+        # o redesenho do canvas já está na fila de idle; este callback roda depois dele
+        self.after_idle(lambda: self.latencies.append((time.perf_counter() - t0) * 1000.0))
+
+    def latency_stats(self):
+        """Event-to-paint latency of the recent drag frames (ms)."""
+        lat = np.asarray(self.latencies, dtype=float)
+        if lat.size == 0:
+            return {"frames": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {"frames": int(lat.size), "p50": float(np.percentile(lat, 50)),
+                "p95": float(np.percentile(lat, 95)), "max": float(lat.max())}
+
     # ----- Estado/UI -----
     def set_rgb(self, rgb, update_entries=False, move_point=False):
         r,g,b = rgb  # já normalizado
@@ -328,12 +499,11 @@ class RGBTriangleApp(tk.Tk):
         w_right= label_to_val[VERTEX_TO_CHANNEL[2]]
         x,y = to_cartesian(w_top, w_left, w_right, a, b, c)
 
-        if self.point_id is not None:
-            self.canvas.delete(self.point_id)
-        self.point_id = self.canvas.create_oval(
-            x-POINT_RADIUS, y-POINT_RADIUS, x+POINT_RADIUS, y+POINT_RADIUS,
-            fill="#ffffff", outline="#000000", width=2
-        )
+        box = (x-POINT_RADIUS, y-POINT_RADIUS, x+POINT_RADIUS, y+POINT_RADIUS)
+        if self.point_id is None:
+            self.point_id = self.canvas.create_oval(*box, fill="#ffffff", outline="#000000", width=2)
+        else:
+            self.canvas.coords(self.point_id, *box)  # move o marcador existente
 
     # ----- Diálogo de confirmação (Ok / Redefinir) -----
     def confirm_dialog(self, r, g, b):
@@ -401,6 +571,42 @@ if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--img", default="triangulo rgb soma 1.png")
     p.add_argument("--debug", action="store_true")
+    p.add_argument("--bench-startup", action="store_true",
+                   help="mede preparação do triângulo a frio (sem cache) e a quente")
+    p.add_argument("--max-img-h", type=int, default=800)
+    p.add_argument("--heatmap", nargs="?", const="", default=None, metavar="CSV",
+                   help="sobrepõe o vencedor de cada ponto (CSV de Zscores em data/; padrão do ranking)")
     args = p.parse_args()
-    app = RGBTriangleApp(args.img, debug=args.debug)
-    app.mainloop()
+
+    if args.bench_startup:
+        # cache temporário: o "frio" apaga arquivos, e não deve tocar no cache das execuções normais
+        bench_cache = tempfile.TemporaryDirectory()
+        CACHE_DIR = Path(bench_cache.name)
+        VERTEX_CACHE_FILE = CACHE_DIR / "vertices.json"
+
+        def timed(fn):
+            t0 = time.perf_counter()
+            fn()
+            return (time.perf_counter() - t0) * 1000
+
+        def clear():
+            src_hash = file_hash(args.img)
+            for f in CACHE_DIR.glob(f"{src_hash}-*"):
+                f.unlink()
+            VERTEX_CACHE_FILE.unlink(missing_ok=True)
+
+        cold, warm = [], []
+        for _ in range(5):
+            clear()
+            cold.append(timed(lambda: prepared_triangle(args.img, args.max_img_h)))
+            warm.append(timed(lambda: prepared_triangle(args.img, args.max_img_h)))
+        print(f"preparo do triângulo: frio {min(cold):.1f} ms | quente {min(warm):.1f} ms")
+        try:
+            t_app = timed(lambda: RGBTriangleApp(args.img).destroy())
+            print(f"RGBTriangleApp (cache quente) até destroy: {t_app:.1f} ms")
+        except tk.TclError as e:
+            print(f"(sem display para medir a janela Tk: {e})")
+        bench_cache.cleanup()
+    else:
+        app = RGBTriangleApp(args.img, debug=args.debug, heatmap=args.heatmap)
+        app.mainloop()
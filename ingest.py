@@ -0,0 +1,178 @@
+"""
+Fast typed ingestion of Z-score CSV uploads.
+
+The separator and the decimal mark are sniffed once from a small prefix
+(sniff), the column mapping (the header_like aliases of ranking) is resolved
+once per header into a Schema, and the file is then parsed by the pandas C
+engine with the right sep=/decimal= and float64 dtypes for the used columns
+only. Result is the same ZMatrix ranking.parse_zscores builds; content the C
+engine rejects (stray text in numeric cells) falls back to that parser, which
+keeps the coerceNum semantics of app.js.
+"""
+
+import argparse
+import csv
+import io
+import re
+import time
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import ranking
+
+SNIFF_BYTES = 64 * 1024
+SEPARATORS = (',', ';', '\t', '|')
+_DECIMAL_COMMA_RE = re.compile(r'^\s*[+-]?\d+,\d+(?:[eE][+-]?\d+)?\s*$')
+_DECIMAL_DOT_RE = re.compile(r'^\s*[+-]?(?:\d+\.\d*|\.\d+)(?:[eE][+-]?\d+)?\s*$')
+
+
+class Dialect(NamedTuple):
+    sep: str
+    decimal: str
+    encoding: str
+
+
+class Schema(NamedTuple):
+    """Header columns used for each field of ZMatrix (None = absent)."""
+    z: Tuple[str, str, str]
+    s: Optional[Tuple[str, str, str]]
+    cov: Optional[Tuple[str, str, str]]
+    id_col: Optional[str]
+
+    @property
+    def numeric(self) -> Tuple[str, ...]:
+        return self.z + (self.s or ()) + (self.cov or ())
+
+
+# ------------------ Detecção ------------------
+def _decode(prefix: bytes) -> Tuple[str, str]:
+    for encoding in ('utf-8-sig', 'latin-1'):
+        try:
+            return prefix.decode(encoding), encoding
+        except UnicodeDecodeError:
+            # o prefixo pode ter cortado um caractere multibyte no fim
+            try:
+                return prefix[:-3].decode(encoding), encoding
+            except UnicodeDecodeError:
+                continue
+    return prefix.decode('latin-1'), 'latin-1'
+
+
+def sniff(data: bytes, size: int = SNIFF_BYTES) -> Dialect:
+    """Separator, decimal mark and encoding from the first `size` bytes."""
+    text, encoding = _decode(data[:size])
+    lines = [l for l in text.replace('\r', '').split('\n') if l.strip()]
+    if len(data) > size and len(lines) > 1:
+        lines = lines[:-1]  # última linha possivelmente incompleta
+    if not lines:
+        return Dialect(',', '.', encoding)
+
+    # separador: maior número de campos no cabeçalho, constante nas linhas da amostra
+    best, best_fields = ',', 0
+    for sep in SEPARATORS:
+        widths = {len(row) for row in csv.reader(lines[:50], delimiter=sep)}
+        fields = len(next(csv.reader(lines[:1], delimiter=sep)))
+        if len(widths) == 1 and fields > best_fields:
+            best, best_fields = sep, fields
+
+    cells = [c for row in csv.reader(lines[1:200], delimiter=best) for c in row]
+    commas = sum(1 for c in cells if _DECIMAL_COMMA_RE.match(c))
+    dots = sum(1 for c in cells if _DECIMAL_DOT_RE.match(c))
+    return Dialect(best, ',' if commas > dots else '.', encoding)
+
+
+@lru_cache(maxsize=64)
+def resolve_schema(header: Tuple[str, ...]) -> Schema:
+    """Column mapping for a header, with the same aliases and rules as ranking.zmatrix_from_table."""
+    like = lambda keys: ranking.header_like(header, keys)
+    z = (like(ranking.ZC_KEYS), like(ranking.ZQ_KEYS), like(ranking.ZP_KEYS))
+    if not all(z):
+        raise KeyError('CSV de Zscores deve ter ZCusto, ZQualidade e ZPrazo.')
+    s = (like(ranking.SC_KEYS), like(ranking.SQ_KEYS), like(ranking.SP_KEYS))
+    cov = None
+    if all(s):
+        tail = tuple(header[-3:])
+        if len(tail) == 3 and any('cov' in c.lower() for c in tail):
+            cov = tail
+    cols = {c.lower().replace(' ', ''): c for c in header}
+    id_col = next((cols[k] for k in ranking.ID_KEYS if k in cols), None)
+    return Schema(z, s if all(s) else None, cov, id_col)
+
+
+# ------------------ Leitura ------------------
+def read_header(data: bytes, dialect: Dialect) -> Tuple[str, ...]:
+    text, _ = _decode(data[:SNIFF_BYTES])
+    first = next((l for l in text.replace('\r', '').split('\n') if l.strip()), '')
+    return tuple(c.strip() for c in next(csv.reader([first], delimiter=dialect.sep), []))
+
+
+def parse_zscores_bytes(data: bytes, dialect: Optional[Dialect] = None) -> ranking.ZMatrix:
+    """ZMatrix from raw CSV bytes using the C parser."""
+    dialect = dialect or sniff(data)
+    header = read_header(data, dialect)
+    schema = resolve_schema(header)
+
+    # colunas por posição (header=None): independe de como o pandas normaliza o cabeçalho
+    position = {h: i for i, h in reversed(list(enumerate(header)))}
+    numeric = [position[c] for c in dict.fromkeys(schema.numeric)]
+    id_pos = position[schema.id_col] if schema.id_col else None
+    dtype = {i: 'float64' for i in numeric}
+    if id_pos is not None:
+        dtype[id_pos] = str
+
+    try:
+        df = pd.read_csv(io.BytesIO(data), sep=dialect.sep, decimal=dialect.decimal,
+                         encoding=dialect.encoding, engine='c', header=None, skiprows=1,
+                         usecols=sorted(dtype), dtype=dtype, skipinitialspace=True,
+                         skip_blank_lines=True, keep_default_na=False, na_values=[''])
+    except (ValueError, pd.errors.ParserError):
+        return ranking.parse_zscores(data.decode(dialect.encoding, errors='ignore'))
+
+    def block(cols):
+        if cols is None:
+            return None
+        return np.nan_to_num(df[[position[c] for c in cols]].to_numpy(dtype=float), nan=0.0)  # vazio -> 0, como coerceNum
+
+    labels = df[id_pos].fillna('').str.strip().tolist() if id_pos is not None else None
+    return ranking.ZMatrix(block(schema.z), block(schema.s), block(schema.cov), labels)
+
+
+# ------------------ Benchmark ------------------
+def _synthetic_csv(n: int, sep: str, decimal: str, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    values = np.column_stack([rng.normal(0, 2, (n, 3)), rng.uniform(0.1, 2, (n, 3)), rng.uniform(-0.5, 0.5, (n, 3))])
+    header = ['id', 'ZCusto', 's_ZCusto', 'ZQualidade', 's_ZQual', 'ZPrazo', 's_ZPrazo',
+              'cov(Zcusto,Zqual)', 'cov(Zcusto,Zprazo)', 'cov(Zqual,Zprazo)']
+    quote = sep == ',' and decimal == ','
+    fmt = (lambda v: f'"{v:.10f}"'.replace('.', ',')) if quote else (lambda v: f'{v:.10f}'.replace('.', decimal))
+    out = [sep.join(f'"{h}"' if sep in h else h for h in header)]
+    order = [0, 3, 1, 4, 2, 5, 6, 7, 8]  # Z, s_Z intercalados como no data/
+    for i, row in enumerate(values):
+        out.append(sep.join([f'Sol {i + 1}'] + [fmt(row[j]) for j in order]))
+    return ('\n'.join(out) + '\n').encode('utf-8')
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Benchmark de leitura de CSV de Zscores.')
+    p.add_argument('--n', type=int, default=200_000)
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    for sep, decimal in ((',', '.'), (',', ','), (';', ',')):
+        data = _synthetic_csv(args.n, sep, decimal)
+
+        def best(fn):
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - t0)
+            return min(times)
+
+        fast = best(lambda: parse_zscores_bytes(data))
+        slow = best(lambda: ranking.parse_zscores(data.decode('utf-8')))
+        print(f"sep={sep!r} decimal={decimal!r} | {args.n} linhas, {len(data) / 1e6:.1f} MB | "
+              f"ingest {fast * 1000:.0f} ms | ranking.parse_zscores {slow * 1000:.0f} ms | {slow / fast:.1f}x")
@@ -0,0 +1,111 @@
+"""
+Monte Carlo rank stability from the sigma/covariance columns.
+
+Each alternative's (ZC, ZQ, ZP) is taken as a multivariate normal with the
+s_Z* sigmas and cov(...) columns. Zranking is linear in those coordinates,
+so for a priority triple its score is exactly N(Zranking, s_Zrank²) with the
+same covariance-aware s_Zrank as ranking.zranking: sampling that projection
+gives the same rank distribution as sampling the full 3-D normal, with a
+third of the draws and no Cholesky factorization (several rows in data/ do
+not have a positive semi-definite covariance, which the clamp to zero in
+s_Zrank already handles).
+
+Samples are drawn in (batch × N) blocks; ranks are counted with a single
+bincount per block; sampling stops early once every rank probability has a
+standard error below `tol`.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+import ranking
+
+DEFAULT_SAMPLES = 100_000
+DEFAULT_BATCH = 10_000
+DEFAULT_TOL = 2e-3
+MIN_SAMPLES = 10_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def _rank_counts(mu: np.ndarray, sd: np.ndarray, n: int, seed) -> np.ndarray:
+    """(N, N) counts[i, k] = draws in which alternative i finished at rank k (0 = first)."""
+    N = mu.shape[0]
+    rng = np.random.default_rng(seed)
+    draws = rng.standard_normal((n, N))
+    draws *= sd
+    draws += mu
+    order = np.argsort(-draws, axis=1)
+    flat = order * N + np.arange(N)
+    return np.bincount(flat.ravel(), minlength=N * N).reshape(N, N)
+
+
+def _max_standard_error(counts: np.ndarray, n: int) -> float:
+    p = counts / n
+    return float(np.sqrt((p * (1 - p)).max() / n))
+
+
+def rank_probabilities(m: ranking.ZMatrix, r: float, g: float, b: float,
+                       n_samples: int = DEFAULT_SAMPLES, batch: int = DEFAULT_BATCH,
+                       tol: Optional[float] = DEFAULT_TOL, workers: int = 1,
+                       seed=None) -> Dict[str, np.ndarray]:
+    """Rank distribution of every alternative for one priority triple.
+
+    Returns a dict with:
+        probabilities: (N, N) P(alternative i has rank k), k = 0 is the top
+        p_top:         (N,) P(rank = 1)
+        expected_rank: (N,) expected rank, 1-based
+        samples:       number of draws actually used
+        stderr:        largest standard error among the probabilities
+    Set tol=None to always draw n_samples; workers > 1 spreads batches over a
+    process pool.
+    """
+    mu, sd = ranking.zranking(m, r, g, b)
+    N = mu.shape[0]
+    counts = np.zeros((N, N), dtype=np.int64)
+    done = 0
+    seeds = np.random.SeedSequence(seed)
+    workers = max(1, min(int(workers), os.cpu_count() or 1))
+
+    while done < n_samples:
+        sizes = []
+        for _ in range(workers):
+            size = min(batch, n_samples - done - sum(sizes))
+            if size > 0:
+                sizes.append(size)
+        children = seeds.spawn(len(sizes))
+        if workers > 1 and len(sizes) > 1:
+            pool = _get_pool(workers)
+            futures = [pool.submit(_rank_counts, mu, sd, size, child) for size, child in zip(sizes, children)]
+            for f in futures:
+                counts += f.result()
+        else:
+            for size, child in zip(sizes, children):
+                counts += _rank_counts(mu, sd, size, child)
+        done += sum(sizes)
+
+        if tol is not None and done >= MIN_SAMPLES and _max_standard_error(counts, done) < tol:
+            break
+
+    probabilities = counts / max(done, 1)
+    return {
+        'probabilities': probabilities,
+        'p_top': probabilities[:, 0],
+        'expected_rank': probabilities @ np.arange(1, N + 1),
+        'samples': done,
+        'stderr': _max_standard_error(counts, max(done, 1)),
+    }
@@ -0,0 +1,335 @@
+"""
+Ranking engine shared by the backend (/api/rank) and dash_app.
+
+Vectorized NumPy port of computeRanking/enrichWithNames in app.js:
+Zranking = -r*ZC + g*ZQ - b*ZP, covariance-aware s_Zrank, 0-10 nota /
+margemErro rescaling and rounding to the significant decimal places of the
+smallest error. Results match the browser implementation bit for bit.
+"""
+
+import csv
+import hashlib
+import io
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+DEFAULT_ZSCORES_CSV = 'Matriz de Decisão - Zscores para dash.csv'
+DEFAULT_NAMES_CSV = 'Matriz de Decisão - só nomes e coordenadas.csv'
+
+# Reescalonamento para nota absoluta 0-10 (distribuição gaussiana)
+Z_MIN = -3.0
+Z_MAX = 3.0
+Z_RANGE = Z_MAX - Z_MIN  # 6
+
+# Aliases por coluna: os do app.js primeiro, depois os aceitos pelo dash_app
+ZC_KEYS = ('zcusto', 'zcost')
+ZQ_KEYS = ('zqual', 'zquality')
+ZP_KEYS = ('zprazo', 'zdeadline', 'ztime')
+SC_KEYS = ('s_zcusto', 'szcusto', 's_zcost')
+SQ_KEYS = ('s_zqual', 'szqual')
+SP_KEYS = ('s_zprazo', 'szprazo', 's_ztime')
+ID_KEYS = ('id', 'nome', 'alternativa', 'opcao', 'item')
+
+_JS_FLOAT_RE = re.compile(r'^\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+
+
+class ZMatrix(NamedTuple):
+    """Decision matrix already coerced to float arrays.
+
+    z:      (N, 3) ZCusto, ZQualidade, ZPrazo
+    s:      (N, 3) s_ZCusto, s_ZQual, s_ZPrazo, or None
+    cov:    (N, 3) cov(C,Q), cov(C,P), cov(Q,P), or None
+    labels: values of the optional id/nome column, or None
+    """
+    z: np.ndarray
+    s: Optional[np.ndarray]
+    cov: Optional[np.ndarray]
+    labels: Optional[List[str]]
+
+    def __len__(self):
+        return self.z.shape[0]
+
+
+def matrix_key(m: ZMatrix) -> str:
+    """Content fingerprint of a matrix (z, s, cov), for caches keyed by matrix."""
+    h = hashlib.sha256()
+    for a in (m.z, m.s, m.cov):
+        h.update(np.ascontiguousarray(a, dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+
+# ------------------ CSV ------------------
+def parse_csv(text: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    """parseCSV in app.js (';' only when there is no ',' at all), plus ';' with decimal commas.
+
+    A header split by ';' without any ',' selects ';' even when the data has
+    decimal commas; app.js would split those rows on ',' and read every Z as 0.
+    """
+    lines = [l for l in text.replace('\r', '').split('\n') if l.strip()]
+    if not lines:
+        return [], []
+    if ';' in lines[0] and ',' not in lines[0]:
+        sep = ';'
+    else:
+        sep = ';' if (';' in text and ',' not in text) else ','
+    reader = csv.reader(io.StringIO('\n'.join(lines)), delimiter=sep)
+    parsed = [[c.strip() for c in row] for row in reader]
+    header = parsed[0]
+    rows = [{h: (cols[j] if j < len(cols) else '') for j, h in enumerate(header)}
+            for cols in parsed[1:]]
+    return header, rows
+
+
+def _norm(s: str) -> str:
+    return re.sub(r'\s+', '', s.lower())
+
+
+def header_like(header: Sequence[str], keys) -> Optional[str]:
+    """First header containing any of the keys (case/space insensitive), like headerLike in app.js."""
+    if isinstance(keys, str):
+        keys = (keys,)
+    for key in keys:
+        k = _norm(key)
+        for h in header:
+            if k in _norm(h):
+                return h
+    return None
+
+
+def coerce_num(values: Sequence[str]) -> np.ndarray:
+    """Vector version of coerceNum in app.js (decimal comma, quotes, invalid -> 0)."""
+    cleaned = [str(v).replace('"', '').replace(',', '.') if v is not None else '' for v in values]
+    try:
+        return np.array(cleaned, dtype=float)
+    except ValueError:
+        pass
+    out = np.zeros(len(cleaned))
+    for i, s in enumerate(cleaned):
+        m = _JS_FLOAT_RE.match(s)  # parseFloat aceita prefixo numérico
+        if m:
+            out[i] = float(m.group(1))
+    return out
+
+
+def zmatrix_from_table(header: Sequence[str], rows: Sequence[Dict[str, str]]) -> ZMatrix:
+    ZC = header_like(header, ZC_KEYS)
+    ZQ = header_like(header, ZQ_KEYS)
+    ZP = header_like(header, ZP_KEYS)
+    if not ZC or not ZQ or not ZP:
+        raise KeyError('CSV de Zscores deve ter ZCusto, ZQualidade e ZPrazo.')
+    sC = header_like(header, SC_KEYS)
+    sQ = header_like(header, SQ_KEYS)
+    sP = header_like(header, SP_KEYS)
+
+    def column(name):
+        return coerce_num([row.get(name, '') for row in rows])
+
+    z = np.column_stack([column(ZC), column(ZQ), column(ZP)]) if rows else np.zeros((0, 3))
+    s = cov = None
+    if sC and sQ and sP:
+        s = np.column_stack([column(sC), column(sQ), column(sP)]) if rows else np.zeros((0, 3))
+        # Covariâncias: últimas 3 colunas, se alguma tiver "cov" no nome
+        cov_cols = list(header[-3:])
+        if len(cov_cols) == 3 and any('cov' in c.lower() for c in cov_cols):
+            cov = np.column_stack([column(c) for c in cov_cols]) if rows else np.zeros((0, 3))
+
+    cols = {c.lower().replace(' ', ''): c for c in header}
+    id_col = next((cols[k] for k in ID_KEYS if k in cols), None)
+    labels = [row.get(id_col, '') for row in rows] if id_col else None
+    return ZMatrix(z, s, cov, labels)
+
+
+def parse_zscores(text: str) -> ZMatrix:
+    return zmatrix_from_table(*parse_csv(text))
+
+
+def load_zscores(path) -> ZMatrix:
+    return parse_zscores(Path(path).read_text(encoding='utf-8', errors='ignore'))
+
+
+# ------------------ Ranking ------------------
+def significant_decimal_places(n: float) -> int:
+    """Casas decimais a partir do menor erro: |expoente| se < 1, senão 2."""
+    if n == 0:
+        return 2
+    exp = math.floor(math.log10(abs(n)))
+    return abs(exp) if exp < 0 else 2
+
+
+def _round_half_up(x: np.ndarray, decimals: int) -> np.ndarray:
+    # Math.round do JS: arredonda .5 para cima (não é o round-half-even do NumPy)
+    multiplier = 10.0 ** decimals
+    return np.floor(x * multiplier + 0.5) / multiplier
+
+
+def normalize_priorities(r: float, g: float, b: float) -> Tuple[float, float, float]:
+    """Accept weights as fractions (0-1) or percentages (0-100)."""
+    r, g, b = float(r or 0), float(g or 0), float(b or 0)
+    if r > 1 or g > 1 or b > 1:
+        return r / 100.0, g / 100.0, b / 100.0
+    return r, g, b
+
+
+def zranking(m: ZMatrix, r: float, g: float, b: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Zranking and s_Zrank for every alternative (one priority triple)."""
+    zc, zq, zp = m.z[:, 0], m.z[:, 1], m.z[:, 2]
+    Z = (-r * zc) + (g * zq) + (-b * zp)
+
+    if m.s is None:
+        return Z, np.zeros_like(Z)
+
+    sc, sq, sp = m.s[:, 0], m.s[:, 1], m.s[:, 2]
+    s0_squared = (r * sc) ** 2 + (g * sq) ** 2 + (b * sp) ** 2
+    if m.cov is None:
+        return Z, np.sqrt(s0_squared)
+
+    # Var(Z) = r²Var(C) + g²Var(Q) + b²Var(P) - 2rgCov(C,Q) + 2rbCov(C,P) - 2gbCov(Q,P)
+    cov_CQ, cov_CP, cov_QP = m.cov[:, 0], m.cov[:, 1], m.cov[:, 2]
+    correction = 2 * ((-r * g) * cov_CQ + (r * b) * cov_CP + (-g * b) * cov_QP)
+    return Z, np.sqrt(np.maximum(0, s0_squared + correction))
+
+
+def rescale(Z: np.ndarray, s_Zrank: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """nota/margemErro em 0-10, arredondados pelo menor erro; retorna também as casas."""
+    positive = s_Zrank[s_Zrank > 0]
+    decimals = significant_decimal_places(float(positive.min())) if positive.size else 2
+
+    nota = np.where(Z <= Z_MIN, 0.0,
+                    np.where(Z >= Z_MAX, 10.0, ((Z - Z_MIN) / Z_RANGE) * 10))
+    margem = (s_Zrank / Z_RANGE) * 10
+    return _round_half_up(nota, decimals), _round_half_up(margem, decimals), decimals
+
+
+def compute_ranking(m: ZMatrix, r: float, g: float, b: float) -> Dict[str, np.ndarray]:
+    """Arrays in the original row order: Zranking, s_Zrank, nota, margemErro, order, decimals.
+
+    `order` holds the row indices sorted by Zranking (desc, stable), as the
+    frontend sorts them.
+    """
+    Z, sZ = zranking(m, r, g, b)
+    nota, margem, decimals = rescale(Z, sZ)
+    return {
+        'Zranking': Z,
+        's_Zrank': sZ,
+        'nota': nota,
+        'margemErro': margem,
+        'order': np.argsort(-Z, kind='stable'),
+        'decimals': decimals,
+    }
+
+
+# ------------------ Lote de prioridades ------------------
+# Sinais de cada critério em Zranking = -r*ZC + g*ZQ - b*ZP
+CRITERIA_SIGNS = np.array([-1.0, 1.0, -1.0])
+
+
+def priority_matrix(priorities) -> np.ndarray:
+    """(K, 3) array of (r, g, b) rows from triples or {'r','g','b'} dicts (fractions or %)."""
+    rows = [(p.get('r', 0), p.get('g', 0), p.get('b', 0)) if isinstance(p, dict) else tuple(p)
+            for p in priorities]
+    P = np.asarray(rows, dtype=float).reshape(-1, 3)
+    percent = (P > 1).any(axis=1)
+    P[percent] /= 100.0
+    return P
+
+
+def rank_batch(m: ZMatrix, P: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Zranking and s_Zrank for K priority vectors at once: two (K, N) arrays.
+
+    Scores are a single (K×3)·(3×N) product; variances are the quadratic form
+    wᵀΣᵢw with w = (-r, g, -b), expanded as (W∘W)·(S∘S)ᵀ + 2·(cross terms)·covᵀ.
+    Agrees with zranking() up to float rounding (summation order differs).
+    """
+    W = np.asarray(P, dtype=float).reshape(-1, 3) * CRITERIA_SIGNS
+    scores = W @ m.z.T
+
+    if m.s is None:
+        return scores, np.zeros_like(scores)
+
+    var = (W * W) @ (m.s * m.s).T
+    if m.cov is not None:
+        # Pares na ordem das colunas: (C,Q), (C,P), (Q,P)
+        cross = np.column_stack([W[:, 0] * W[:, 1], W[:, 0] * W[:, 2], W[:, 1] * W[:, 2]])
+        var += 2.0 * (cross @ m.cov.T)
+    np.maximum(var, 0, out=var)
+    return scores, np.sqrt(var, out=var)
+
+
+def winners(scores: np.ndarray) -> np.ndarray:
+    """Index of the top-ranked alternative for each row of a (K, N) score matrix."""
+    return np.argmax(scores, axis=1)
+
+
+# ------------------ Nomes/coordenadas ------------------
+def load_names(path) -> List[Dict[str, str]]:
+    """[{nome, coordStr, coordOriginal}] per row of the names CSV (enrichWithNames)."""
+    header, rows = parse_csv(Path(path).read_text(encoding='utf-8', errors='ignore'))
+    name_col = header_like(header, 'nome') or (header[0] if header else None)
+    coord_col = header_like(header, 'coordenadas') or header_like(header, 'coord')
+    out = []
+    for row in rows:
+        coord_original = row.get(coord_col, '') if coord_col else ''
+        out.append({
+            'nome': row.get(name_col, ''),
+            # Normaliza: III.1a -> III.1.a
+            'coordStr': re.sub(r'(\d+)([a-z])', r'\1.\2', coord_original, count=1, flags=re.I),
+            'coordOriginal': coord_original,
+        })
+    return out
+
+
+def ranking_items(result: Dict[str, np.ndarray], names: Optional[List[Dict[str, str]]] = None) -> List[Dict]:
+    """JSON-ready items sorted by Zranking (desc), as consumed by the frontend."""
+    items = []
+    for i in result['order'].tolist():
+        item = {
+            'idx': i,
+            'id': i + 1,
+            'Zranking': float(result['Zranking'][i]),
+            's_Zrank': float(result['s_Zrank'][i]),
+            'nota': float(result['nota'][i]),
+            'margemErro': float(result['margemErro'][i]),
+        }
+        if names is not None:
+            info = names[i] if i < len(names) else {}
+            item['nome'] = info.get('nome') or f'Sol {i + 1}'
+            item['coordStr'] = info.get('coordStr', '')
+        items.append(item)
+    return items
+
+
+# ------------------ Cache de arquivos em data/ ------------------
+_file_cache: Dict[Tuple[str, str], Tuple[Tuple[float, int], object]] = {}
+
+
+def _cached(kind: str, path: Path, loader):
+    st = path.stat()
+    key = (kind, str(path))
+    stamp = (st.st_mtime, st.st_size)
+    hit = _file_cache.get(key)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    value = loader(path)
+    _file_cache[key] = (stamp, value)
+    return value
+
+
+def resolve_data_file(name: Optional[str], default: str) -> Path:
+    """Only plain file names inside data/ are accepted."""
+    path = DATA_DIR / Path(name or default).name
+    if not path.is_file():
+        raise FileNotFoundError(f'Arquivo não encontrado em data/: {path.name}')
+    return path
+
+
+def cached_zscores(name: Optional[str] = None) -> ZMatrix:
+    return _cached('z', resolve_data_file(name, DEFAULT_ZSCORES_CSV), load_zscores)
+
+
+def cached_names(name: Optional[str] = None) -> List[Dict[str, str]]:
+    return _cached('n', resolve_data_file(name, DEFAULT_NAMES_CSV), load_names)
@@ -0,0 +1,294 @@
+"""
+Precomputed ranking regions over the priority simplex.
+
+On the simplex b = 1 - r - g, so every alternative's score is an affine
+function of (r, g):
+
+    Zranking_i = r·(ZP_i - ZC_i) + g·(ZQ_i + ZP_i) - ZP_i
+
+The winner regions are therefore convex polygons (the triangle clipped by
+N-1 half-planes) and the regions of constant ranking order are the cells of
+the arrangement of the pairwise tie lines. Both are built once per matrix,
+stored as flat arrays plus a uniform bucket grid, and a clicked point is
+answered by point location instead of re-ranking.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import ranking
+import zscores
+
+CACHE_DIR = Path(__file__).resolve().parent / 'cache' / 'regions'
+MODES = ('winner', 'order')
+GRID_SIZE = 32
+AREA_EPS = 1e-14
+INSIDE_TOL = 1e-9
+# O arranjo tem O(N^4) células; acima disso só o mapa de vencedores é viável
+MAX_ORDER_ALTERNATIVES = 30
+MEMORY_CACHE_SIZE = 16
+
+TRIANGLE = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])  # (r, g): b=1, r=1, g=1
+
+
+def affine_scores(m: ranking.ZMatrix) -> np.ndarray:
+    """(N, 3) coefficients (alpha, beta, gamma) with score = alpha*r + beta*g + gamma."""
+    zc, zq, zp = m.z[:, 0], m.z[:, 1], m.z[:, 2]
+    return np.column_stack([zp - zc, zq + zp, -zp])
+
+
+# ------------------ Geometria ------------------
+def _area(poly: np.ndarray) -> float:
+    x, y = poly[:, 0], poly[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def _clip(poly: np.ndarray, line: np.ndarray) -> np.ndarray:
+    """Part of a convex polygon where line[0]*r + line[1]*g + line[2] >= 0."""
+    d = poly @ line[:2] + line[2]
+    out = []
+    n = len(poly)
+    for i in range(n):
+        p, q = poly[i], poly[(i + 1) % n]
+        dp, dq = d[i], d[(i + 1) % n]
+        if dp >= 0:
+            out.append(p)
+        if (dp >= 0) != (dq >= 0):
+            t = dp / (dp - dq)
+            out.append(p + t * (q - p))
+    return np.array(out) if len(out) >= 3 else np.zeros((0, 2))
+
+
+def _usable(poly: np.ndarray) -> bool:
+    return len(poly) >= 3 and _area(poly) > AREA_EPS
+
+
+def _tie_lines(coef: np.ndarray) -> List[Tuple[int, int, np.ndarray]]:
+    lines = []
+    n = len(coef)
+    for i in range(n):
+        for j in range(i + 1, n):
+            line = coef[i] - coef[j]
+            if np.abs(line[:2]).max() > 1e-12:  # paralelas ao simplex inteiro não cortam nada
+                lines.append((i, j, line))
+    return lines
+
+
+def _winner_cells(coef: np.ndarray) -> List[np.ndarray]:
+    cells = []
+    for i in range(len(coef)):
+        poly = TRIANGLE
+        for j in range(len(coef)):
+            if j == i:
+                continue
+            poly = _clip(poly, coef[i] - coef[j])
+            if not _usable(poly):
+                break
+        if _usable(poly):
+            cells.append(poly)
+    return cells
+
+
+def _order_cells(coef: np.ndarray) -> List[np.ndarray]:
+    cells = [TRIANGLE]
+    for _, _, line in _tie_lines(coef):
+        split = []
+        for poly in cells:
+            d = poly @ line[:2] + line[2]
+            if d.min() >= -INSIDE_TOL or d.max() <= INSIDE_TOL:
+                split.append(poly)
+                continue
+            for part in (_clip(poly, line), _clip(poly, -line)):
+                if _usable(part):
+                    split.append(part)
+        cells = split
+    return cells
+
+
+# ------------------ Estrutura de consulta ------------------
+class RegionMap:
+    """Flat, serializable region map with bucket-grid point location.
+
+    vertices:  (V, 2) polygon vertices in (r, g)
+    offsets:   (C+1,) cell c spans vertices[offsets[c]:offsets[c+1]]
+    winner:    (C,) top alternative per cell
+    order:     (C, N) ranking per cell (mode 'order' only)
+    grid:      bucket index; bucket k lists grid_cells[grid_offsets[k]:grid_offsets[k+1]]
+    """
+
+    def __init__(self, mode, coef, vertices, offsets, winner, order, grid_size, grid_offsets, grid_cells):
+        self.mode = mode
+        self.coef = coef
+        self.vertices = vertices
+        self.offsets = offsets
+        self.winner = winner
+        self.order = order
+        self.grid_size = int(grid_size)
+        self.grid_offsets = grid_offsets
+        self.grid_cells = grid_cells
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def cell(self, c: int) -> np.ndarray:
+        return self.vertices[self.offsets[c]:self.offsets[c + 1]]
+
+    def _bucket(self, r: float, g: float) -> int:
+        G = self.grid_size
+        i = min(max(int(r * G), 0), G - 1)
+        j = min(max(int(g * G), 0), G - 1)
+        return i * G + j
+
+    def locate(self, r: float, g: float, b: float = None) -> int:
+        """Cell containing the (normalized) point, or -1."""
+        if b is not None:
+            s = max(r + g + b, 1e-12)
+            r, g = r / s, g / s
+        k = self._bucket(r, g)
+        p = np.array([r, g])
+        for c in self.grid_cells[self.grid_offsets[k]:self.grid_offsets[k + 1]]:
+            poly = self.cell(c)
+            edges = np.roll(poly, -1, axis=0) - poly
+            rel = p - poly
+            cross = edges[:, 0] * rel[:, 1] - edges[:, 1] * rel[:, 0]
+            if (cross >= -INSIDE_TOL).all() or (cross <= INSIDE_TOL).all():
+                return int(c)
+        return -1
+
+    def _scores(self, r, g):
+        return self.coef[:, 0] * r + self.coef[:, 1] * g + self.coef[:, 2]
+
+    def winner_at(self, r: float, g: float, b: float) -> int:
+        c = self.locate(r, g, b)
+        if c >= 0:
+            return int(self.winner[c])
+        s = max(r + g + b, 1e-12)
+        return int(np.argmax(self._scores(r / s, g / s)))
+
+    def ranking_at(self, r: float, g: float, b: float) -> np.ndarray:
+        """Alternative indices from best to worst at this point."""
+        c = self.locate(r, g, b) if self.order is not None else -1
+        if c >= 0:
+            return self.order[c]
+        s = max(r + g + b, 1e-12)
+        return np.argsort(-self._scores(r / s, g / s), kind='stable')
+
+    def polygons_rgb(self) -> List[Dict]:
+        """Cells as JSON-ready polygons in (r, g, b)."""
+        out = []
+        for c in range(len(self)):
+            poly = self.cell(c)
+            rgb = np.column_stack([poly[:, 0], poly[:, 1], 1.0 - poly[:, 0] - poly[:, 1]])
+            item = {'winner': int(self.winner[c]), 'polygon': np.round(rgb, 6).tolist()}
+            if self.order is not None:
+                item['order'] = self.order[c].tolist()
+            out.append(item)
+        return out
+
+    # ----- persistência -----
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = dict(mode=np.array(self.mode), coef=self.coef, vertices=self.vertices,
+                      offsets=self.offsets, winner=self.winner, grid_size=np.array(self.grid_size),
+                      grid_offsets=self.grid_offsets, grid_cells=self.grid_cells)
+        if self.order is not None:
+            arrays['order'] = self.order
+        tmp = path.with_suffix('.tmp.npz')
+        np.savez_compressed(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'RegionMap':
+        with np.load(path) as f:
+            return cls(str(f['mode']), f['coef'], f['vertices'], f['offsets'], f['winner'],
+                       f['order'] if 'order' in f.files else None, int(f['grid_size']),
+                       f['grid_offsets'], f['grid_cells'])
+
+
+def _bucket_grid(cells: List[np.ndarray], G: int) -> Tuple[np.ndarray, np.ndarray]:
+    buckets: List[List[int]] = [[] for _ in range(G * G)]
+    for c, poly in enumerate(cells):
+        lo = np.clip((poly.min(axis=0) * G).astype(int), 0, G - 1)
+        hi = np.clip((poly.max(axis=0) * G).astype(int), 0, G - 1)
+        for i in range(lo[0], hi[0] + 1):
+            for j in range(lo[1], hi[1] + 1):
+                buckets[i * G + j].append(c)
+    offsets = np.zeros(G * G + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in buckets])
+    flat = np.fromiter((c for b in buckets for c in b), dtype=np.int32, count=int(offsets[-1]))
+    return offsets, flat
+
+
+def build_region_map(m: ranking.ZMatrix, mode: str = 'winner', grid_size: int = GRID_SIZE) -> RegionMap:
+    if mode not in MODES:
+        raise ValueError(f"mode deve ser um de {MODES}")
+    if len(m) == 0:
+        raise ValueError('Matriz sem alternativas.')
+    if mode == 'order' and len(m) > MAX_ORDER_ALTERNATIVES:
+        raise ValueError(f"mode='order' suporta até {MAX_ORDER_ALTERNATIVES} alternativas; use mode='winner'.")
+
+    coef = affine_scores(m)
+    cells = _winner_cells(coef) if mode == 'winner' else _order_cells(coef)
+
+    centroids = np.array([poly.mean(axis=0) for poly in cells])
+    scores = centroids @ coef[:, :2].T + coef[:, 2]
+    order = np.argsort(-scores, axis=1, kind='stable').astype(np.int32)
+    winner = order[:, 0].copy()
+
+    offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in cells])
+    vertices = np.concatenate(cells) if cells else np.zeros((0, 2))
+    grid_offsets, grid_cells = _bucket_grid(cells, grid_size)
+    return RegionMap(mode, coef, vertices, offsets, winner,
+                     order if mode == 'order' else None, grid_size, grid_offsets, grid_cells)
+
+
+# ------------------ Cache por arquivo de matriz ------------------
+_memory: 'OrderedDict[Tuple[str, str], RegionMap]' = OrderedDict()
+_memory_lock = threading.Lock()  # threads do waitress compartilham o LRU
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def region_map_for_bytes(data: bytes, mode: str = 'winner') -> RegionMap:
+    """Region map for a Z-score CSV, cached in memory and in cache/regions/ by content hash."""
+    key = (content_hash(data), mode)
+    with _memory_lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            _memory.move_to_end(key)
+            return hit
+
+    path = CACHE_DIR / f'{key[0]}-{mode}.npz'
+    region_map: Optional[RegionMap] = None
+    if path.exists():
+        try:
+            region_map = RegionMap.load(path)
+        except Exception as e:
+            print(f"⚠️ Cache de regiões inválido ({path.name}): {e}")
+    if region_map is None:
+        m = ranking.parse_zscores(data.decode('utf-8', errors='ignore'))
+        region_map = build_region_map(m, mode)
+        try:
+            region_map.save(path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar cache de regiões: {e}")
+
+    with _memory_lock:
+        _memory[key] = region_map
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+    return region_map
+
+
+def region_map_for_file(name: Optional[str] = None, mode: str = 'winner') -> RegionMap:
+    """Also accepts the raw matrix (converted by zscores)."""
+    _, data = zscores.matrix_source(name)
+    return region_map_for_bytes(data, mode)
@@ -0,0 +1,192 @@
+"""
+Content-addressed archive of generated report PDFs.
+
+Every PDF is stored once under blobs/<sha[:2]>/<sha256 of the bytes>, so a
+report regenerated with the same bytes (e.g. a retried request) shares the
+blob. The PDFs already have compressed page streams; a blob is kept gzipped
+only when that saves at least MIN_SAVINGS, otherwise it is stored as is and
+served straight from disk (send_file + ranges, sendfile where the WSGI
+server supports it).
+
+PDFs re-rendered from report_inputs records are kept here too, so with
+REPORT_STORE=inputs the archive works as a bounded cache of rendered reports.
+
+index.csv maps report_hash (the hash printed in the PDF and written to
+reports.csv) to its blob; it is append-only (a re-put of an unchanged entry,
+e.g. each re-render, writes nothing) and compacted when retention removes
+blobs. Retention keeps the blobs under MAX_BYTES on disk, dropping
+the least recently stored/read first.
+"""
+
+import csv
+import gzip
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+ARCHIVE_DIR = Path('tracking_data') / 'archive'  # relativo, como DATA_DIR no backend
+MAX_BYTES = int(float(os.getenv('REPORT_ARCHIVE_MAX_MB', '256')) * 1024 * 1024)
+MIN_SAVINGS = 0.10
+INDEX_FIELDS = ['hash', 'blob', 'size', 'stored_size', 'compressed', 'generated_at']
+
+_HASH_RE = re.compile(r'^[0-9a-f]{16}$')
+
+
+class ArchiveEntry(NamedTuple):
+    report_hash: str
+    blob: str            # sha256 do PDF
+    size: int            # bytes do PDF
+    stored_size: int     # bytes em disco
+    compressed: bool
+    generated_at: str
+
+    @property
+    def relpath(self) -> str:
+        return blob_relpath(self.blob, self.compressed)
+
+
+def blob_relpath(blob: str, compressed: bool) -> str:
+    return f"{blob[:2]}/{blob}.pdf{'.gz' if compressed else ''}"
+
+
+def is_report_hash(value: str) -> bool:
+    return bool(_HASH_RE.match(value or ''))
+
+
+class ReportArchive:
+    """Blob store plus report_hash index; thread-safe within one process."""
+
+    def __init__(self, root: Path = ARCHIVE_DIR, max_bytes: int = MAX_BYTES):
+        self.root = Path(root).absolute()  # send_file resolve caminhos relativos à raiz do app, não ao cwd
+        self.blob_dir = self.root / 'blobs'
+        self.index_file = self.root / 'index.csv'
+        self.max_bytes = max_bytes
+        self._index: Optional[Dict[str, ArchiveEntry]] = None
+        self._blob_bytes: Dict[str, int] = {}  # relpath -> bytes em disco
+        self._lock = threading.Lock()
+
+    # ------------------ Índice ------------------
+    def _load(self) -> Dict[str, ArchiveEntry]:
+        """Index and blob sizes, read once (caller holds the lock)."""
+        if self._index is not None:
+            return self._index
+        index = {}
+        if self.index_file.exists():
+            with open(self.index_file, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        index[row['hash']] = ArchiveEntry(row['hash'], row['blob'], int(row['size']),
+                                                          int(row['stored_size']), row['compressed'] == '1',
+                                                          row['generated_at'])
+                    except (KeyError, TypeError, ValueError):
+                        continue  # linha truncada (queda no meio de uma escrita)
+        self._blob_bytes = {str(p.relative_to(self.blob_dir)): p.stat().st_size
+                            for p in self.blob_dir.glob('*/*') if not p.name.endswith('.tmp')}
+        self._index = index
+        return index
+
+    def _append(self, entry: ArchiveEntry) -> None:
+        new_file = not self.index_file.exists()
+        with open(self.index_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(INDEX_FIELDS)
+            writer.writerow([entry.report_hash, entry.blob, entry.size, entry.stored_size,
+                             int(entry.compressed), entry.generated_at])
+
+    def _rewrite_index(self) -> None:
+        tmp = self.index_file.with_suffix('.tmp')
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(INDEX_FIELDS)
+            for e in self._index.values():
+                writer.writerow([e.report_hash, e.blob, e.size, e.stored_size, int(e.compressed), e.generated_at])
+        tmp.replace(self.index_file)
+
+    # ------------------ Escrita ------------------
+    def put(self, report_hash: str, pdf: bytes, generated_at: Optional[datetime] = None) -> ArchiveEntry:
+        """Store a report PDF (deduplicated by content) and index it under report_hash."""
+        blob = hashlib.sha256(pdf).hexdigest()
+        with self._lock:
+            self._load()
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            existing = next((rel for rel in (blob_relpath(blob, False), blob_relpath(blob, True))
+                             if rel in self._blob_bytes), None)
+            if existing is not None:
+                os.utime(self.blob_dir / existing)  # conta como uso recente para a retenção
+                compressed, stored = existing.endswith('.gz'), self._blob_bytes[existing]
+            else:
+                packed = gzip.compress(pdf, compresslevel=6, mtime=0)
+                compressed = len(packed) <= len(pdf) * (1 - MIN_SAVINGS)
+                data = packed if compressed else pdf
+                rel = blob_relpath(blob, compressed)
+                path = self.blob_dir / rel
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_name(path.name + '.tmp')
+                tmp.write_bytes(data)
+                tmp.replace(path)
+                stored = self._blob_bytes[rel] = len(data)
+
+            entry = ArchiveEntry(report_hash, blob, len(pdf), stored, compressed,
+                                 (generated_at or datetime.now()).isoformat())
+            if self._index.get(report_hash) != entry:  # re-put idêntico (ex.: re-renderização) não cresce o índice
+                self._index[report_hash] = entry
+                self._append(entry)
+            self._enforce_retention(keep=entry.relpath)
+        return entry
+
+    def _enforce_retention(self, keep: str) -> None:
+        """Delete least recently used blobs until under max_bytes (caller holds the lock)."""
+        total = sum(self._blob_bytes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._blob_bytes, key=lambda rel: (self.blob_dir / rel).stat().st_mtime)
+        removed = set()
+        for rel in by_age:
+            if total <= self.max_bytes:
+                break
+            if rel == keep:
+                continue
+            try:
+                (self.blob_dir / rel).unlink()
+            except FileNotFoundError:
+                pass
+            total -= self._blob_bytes.pop(rel)
+            removed.add(rel)
+        if removed:
+            self._index = {h: e for h, e in self._index.items() if e.relpath not in removed}
+            self._rewrite_index()
+
+    # ------------------ Leitura ------------------
+    def get(self, report_hash: str) -> Optional[ArchiveEntry]:
+        """Index entry of a report, or None if unknown or its blob was removed."""
+        with self._lock:
+            entry = self._load().get(report_hash)
+            if entry is None or entry.relpath not in self._blob_bytes:
+                return None
+        try:
+            os.utime(self.path(entry))
+        except FileNotFoundError:
+            return None
+        return entry
+
+    def path(self, entry: ArchiveEntry) -> Path:
+        return self.blob_dir / entry.relpath
+
+    def read(self, entry: ArchiveEntry) -> bytes:
+        """PDF bytes of an entry (decompressed when stored gzipped)."""
+        data = self.path(entry).read_bytes()
+        return gzip.decompress(data) if entry.compressed else data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            index = self._load()
+            return {'reports': len(index), 'blobs': len(self._blob_bytes),
+                    'bytes': sum(self._blob_bytes.values()), 'max_bytes': self.max_bytes}
+
+
+archive = ReportArchive()
@@ -0,0 +1,223 @@
+"""
+"Nota x Classificação" chart drawn natively in the report PDF.
+
+Vector port of renderClusterPlot in app.js (same 1000×380 layout, colors,
+legend and tier markers), built from the ranking table the report already
+receives, so the client no longer rasterizes the canvas and uploads it as a
+base64 PNG.
+
+Tier markers are defined once per document as PDF form XObjects and every
+point only references them; the glyph specs themselves are cached per
+(tier name, color).
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable
+
+import tiering
+
+# Geometria do canvas do app.js (px)
+CANVAS_W, CANVAS_H = 1000, 380
+PADDING = {'top': 90, 'right': 40, 'bottom': 55, 'left': 70}
+TIER_COLORS = ['#ffd700', '#c0c0c0', '#cd7f32', '#708090', '#8b4513', '#654321', '#2F4F2F', '#1c1c1c']
+OTHER_COLOR = '#888888'  # '#888' do canvas (HexColor não expande 3 dígitos)
+BACKGROUND = '#0e0e0e'
+GRID_COLOR = '#2a2a2a'
+DEFAULT_WIDTH = 6 * inch
+
+SQUARE_TIERS = ('Ferro', 'Barro')
+CROSS_TIERS = ('Lama', 'Nem Olhe', 'Olhe Menos')
+
+
+class Point(NamedTuple):
+    nota: float
+    margem: float
+    tier: int  # 1 = Ouro; 0 = sem tier
+
+
+class Glyph(NamedTuple):
+    shape: str          # 'circle' | 'square' | 'cross'
+    color: str
+    form: str           # nome do XObject no PDF
+
+
+def tier_of(categoria) -> int:
+    """Tier number for a category name (Ouro = 1, 'Cluster 9' = 9, unknown = 0)."""
+    name = str(categoria or '')
+    if name in tiering.TIER_NAMES:
+        return tiering.TIER_NAMES.index(name) + 1
+    m = re.fullmatch(r'Cluster (\d+)', name)
+    return int(m.group(1)) if m else 0
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+
+
+def points_from_table(ranking_table: Sequence[Dict]) -> List[Point]:
+    """Plot points from the report's rankingTable rows (formatted notes), best first."""
+    points = []
+    for row in ranking_table:
+        nota = _number(row.get('nota'))
+        if nota is None:
+            continue
+        points.append(Point(nota, _number(row.get('margemErro')) or 0.0, tier_of(row.get('categoria'))))
+    return sorted(points, key=lambda p: -p.nota)
+
+
+def decimals_of(ranking_table: Sequence[Dict], default: int = 2) -> int:
+    """Decimal places used in the formatted notes (toFixed(decimals) on the client)."""
+    for row in ranking_table:
+        text = str(row.get('nota', ''))
+        if _number(text) is not None:
+            return len(text.split('.', 1)[1]) if '.' in text else 0
+    return default
+
+
+@lru_cache(maxsize=None)
+def glyph(tier: int) -> Glyph:
+    """Marker style of a tier, as drawMarker in app.js."""
+    name = tiering.tier_name(tier)
+    color = TIER_COLORS[tier - 1] if 1 <= tier <= len(TIER_COLORS) else OTHER_COLOR
+    shape = 'square' if name in SQUARE_TIERS else 'cross' if name in CROSS_TIERS else 'circle'
+    return Glyph(shape, color, f'tier_{shape}_{color.lstrip("#")}')
+
+
+class ClusterPlot(Flowable):
+    """Nota x Classificação chart (vector), width-scaled from the 1000×380 canvas."""
+
+    def __init__(self, points: Sequence[Point], decimals: int = 2, priorities=None, width: float = DEFAULT_WIDTH):
+        super().__init__()
+        self.points = list(points)
+        self.decimals = decimals
+        self.priorities = priorities  # (r, g, b) em %
+        self.k = width / CANVAS_W
+        self.width = width
+        self.height = CANVAS_H * self.k
+
+    # coordenadas do canvas (origem em cima) -> pontos do PDF (origem embaixo)
+    def _x(self, x):
+        return x * self.k
+
+    def _y(self, y):
+        return (CANVAS_H - y) * self.k
+
+    def _font(self, size, bold=False):
+        self.canv.setFont('Helvetica-Bold' if bold else 'Helvetica', size * self.k)
+
+    def _line(self, x1, y1, x2, y2):
+        self.canv.line(self._x(x1), self._y(y1), self._x(x2), self._y(y2))
+
+    def _glyph_form(self, g: Glyph) -> str:
+        """Define the marker XObject on this document once; returns its name."""
+        c = self.canv
+        defined = c.__dict__.setdefault('_tier_glyphs', set())
+        if g.form in defined:
+            return g.form
+        k = self.k
+        c.beginForm(g.form, lowerx=-7 * k, lowery=-7 * k, upperx=7 * k, uppery=7 * k)
+        fill = colors.HexColor(g.color)
+        if g.shape == 'square':
+            c.setFillColor(fill); c.setStrokeColor(colors.black); c.setLineWidth(0.5 * k)
+            c.rect(-5 * k, -5 * k, 10 * k, 10 * k, stroke=1, fill=1)
+        elif g.shape == 'cross':
+            c.setStrokeColor(fill); c.setLineWidth(2 * k)
+            c.line(-6 * k, 6 * k, 6 * k, -6 * k)
+            c.line(6 * k, 6 * k, -6 * k, -6 * k)
+        else:
+            c.setFillColor(fill); c.setStrokeColor(colors.black); c.setLineWidth(0.5 * k)
+            c.circle(0, 0, 6 * k, stroke=1, fill=1)
+        c.endForm()
+        defined.add(g.form)
+        return g.form
+
+    def _marker(self, x, y, tier, alpha=1.0):
+        form = self._glyph_form(glyph(tier))
+        c = self.canv
+        c.saveState()
+        c.setFillAlpha(alpha); c.setStrokeAlpha(alpha)
+        c.translate(self._x(x), self._y(y))
+        c.doForm(form)
+        c.restoreState()
+
+    def draw(self):
+        c = self.canv
+        W, H, P = CANVAS_W, CANVAS_H, PADDING
+        plot_w = W - P['left'] - P['right']
+        c.saveState()
+        c.setFillColor(colors.HexColor(BACKGROUND))
+        c.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+
+        c.setFillColor(colors.HexColor('#cfcfcf')); self._font(16, bold=True)
+        c.drawCentredString(self._x(W / 2), self._y(22), 'Nota x Classificação')
+        if self.priorities:
+            r, g, b = self.priorities
+            c.setFillColor(colors.HexColor('#b8b8b8')); self._font(13)
+            c.drawCentredString(self._x(W / 2), self._y(42),
+                                f'com prioridades em: {r:.1f}% Custo, {g:.1f}% Qualidade e {b:.1f}% Prazo')
+
+        # legenda: um marcador por tier presente, quebrando linha como no canvas
+        c.setFillColor(colors.HexColor('#cfcfcf')); self._font(12, bold=True)
+        c.drawString(self._x(P['left']), self._y(60), 'Legenda:')
+        legend_x, legend_y = P['left'], 75
+        max_legend_y = legend_y
+        for tier in sorted({p.tier for p in self.points}, key=lambda t: (t == 0, t)):  # sem tier por último
+            self._marker(legend_x + 5, legend_y, tier)
+            c.setFillColor(colors.HexColor('#eaeaea')); self._font(11)
+            c.drawString(self._x(legend_x + 14), self._y(legend_y + 4), tiering.tier_name(tier))
+            legend_x += 85
+            if legend_x > W - 100:
+                legend_x, legend_y = P['left'], legend_y + 20
+            max_legend_y = max(max_legend_y, legend_y + 12)
+
+        top = max_legend_y + 15
+        plot_h = H - top - P['bottom']
+        max_x = max(len(self.points), 1)
+        y_of = lambda v: top + plot_h - (v / 10) * plot_h
+        x_of = lambda i: P['left'] + (i / max_x) * plot_w
+
+        c.setStrokeColor(colors.HexColor(GRID_COLOR)); c.setLineWidth(1 * self.k)
+        for v in range(11):
+            self._line(P['left'], y_of(v), P['left'] + plot_w, y_of(v))
+        ticks = min(20, max_x)
+        for i in range(ticks + 1):
+            x = P['left'] + plot_w * i / ticks
+            self._line(x, top, x, top + plot_h)
+
+        c.setFillColor(colors.HexColor('#b8b8b8')); self._font(13, bold=True)
+        for v in range(11):
+            c.drawRightString(self._x(P['left'] - 12), self._y(y_of(v) + 5), f'{v:.{self.decimals}f}')
+        step = max(1, max_x // 20)
+        for i in range(0, max_x + 1, step):
+            c.drawCentredString(self._x(x_of(i)), self._y(H - 20), str(i))
+
+        c.setFillColor(colors.HexColor('#eaeaea')); self._font(14, bold=True)
+        c.drawCentredString(self._x(W / 2), self._y(H - 8), 'Classificação')
+        c.saveState()
+        c.translate(self._x(18), self._y(top + plot_h / 2))
+        c.rotate(90)
+        c.drawCentredString(0, 0, 'Nota')
+        c.restoreState()
+
+        for i, p in enumerate(self.points):
+            x, y = x_of(i + 1), y_of(p.nota)
+            if p.margem > 0:
+                e = (p.margem / 10) * plot_h
+                c.saveState()
+                c.setStrokeColor(colors.HexColor(glyph(p.tier).color)); c.setStrokeAlpha(0.6)
+                c.setLineWidth(1.5 * self.k)
+                self._line(x, y - e, x, y + e)
+                c.setLineWidth(1 * self.k)
+                self._line(x - 3, y - e, x + 3, y - e)
+                self._line(x - 3, y + e, x + 3, y + e)
+                c.restoreState()
+            self._marker(x, y, p.tier, alpha=0.9)
+        c.restoreState()
@@ -0,0 +1,237 @@
+"""
+Compact, versioned records of each report's inputs, for re-rendering.
+
+Instead of the PDF, a report can be kept as the inputs report_pdf.render()
+needs: hash, timestamp, session/IP/city, priorities, ranking rows and podium.
+Records are one JSON line each in records.jsonl, keyed by report_hash; the
+podium solution descriptions are stored once per content digest under
+solutions/, since the same few descriptions repeat across reports. Each
+record carries the template and ReportLab versions and the sha256 of the PDF
+served originally, so a re-render can be checked byte for byte:
+
+    python report_inputs.py verify [HASH ...]
+    python report_inputs.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import reportlab
+
+import report_pdf
+import report_podium
+
+INPUTS_DIR = Path('tracking_data') / 'report_inputs'  # relativo, como DATA_DIR no backend
+RECORD_VERSION = 1
+
+
+class RenderMismatch(Exception):
+    """A re-rendered PDF whose sha256 differs from the one served originally."""
+
+    def __init__(self, report_hash: str, expected: str, actual: str):
+        super().__init__(f"Relatório {report_hash} re-renderizado difere do original "
+                         f"(sha256 {actual[:16]}, esperado {expected[:16]}).")
+        self.report_hash, self.expected, self.actual = report_hash, expected, actual
+
+
+class Verification(NamedTuple):
+    report_hash: str
+    status: str          # 'ok' | 'divergente' | 'template' (versão de template diferente)
+    expected: str
+    actual: Optional[str]
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+@lru_cache(maxsize=256)
+def _load_solution(path: str) -> Dict[str, Any]:
+    # endereçado por conteúdo: o arquivo de um ref nunca muda
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class InputStore:
+    """Append-only records.jsonl plus content-addressed solution descriptions."""
+
+    def __init__(self, root: Path = INPUTS_DIR):
+        self.root = Path(root).absolute()
+        self.records_file = self.root / 'records.jsonl'
+        self.solutions_dir = self.root / 'solutions'
+        self._offsets: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    # ------------------ Registros ------------------
+    def _scan(self) -> Dict[str, int]:
+        """report_hash -> byte offset of its record line (caller holds the lock)."""
+        if self._offsets is not None:
+            return self._offsets
+        offsets = {}
+        if self.records_file.exists():
+            with open(self.records_file, 'rb') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        offsets[json.loads(line)['hash']] = offset
+                    except (ValueError, KeyError, TypeError):
+                        pass  # linha truncada (queda no meio de uma escrita)
+                    offset += len(line)
+        self._offsets = offsets
+        return offsets
+
+    def _put_solution(self, solution_data: Dict[str, Any]) -> str:
+        ref = report_podium.version_key(solution_data)
+        path = self.solutions_dir / f'{ref}.json'
+        if not path.exists():
+            self.solutions_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + '.tmp')
+            tmp.write_text(_dumps(solution_data), encoding='utf-8')
+            tmp.replace(path)
+        return ref
+
+    def put(self, inputs: report_pdf.ReportInputs, pdf: bytes) -> Dict[str, Any]:
+        """Record the inputs of a rendered report (and the digest of its PDF)."""
+        with self._lock:
+            offsets = self._scan()
+            podium = []
+            for group in inputs.podium:
+                items = []
+                for item in group['items']:
+                    ref = self._put_solution(item['solutionData']) if item['solutionData'] else None
+                    items.append([item['nome'], item['coord'], item['nota'], item['margemErro'], ref])
+                podium.append([group['categoria'], items])
+            record = {
+                'v': RECORD_VERSION,
+                'template': report_pdf.TEMPLATE_VERSION,
+                'reportlab': reportlab.Version,
+                'hash': inputs.report_hash,
+                'generated_at': inputs.generated_at,
+                'session_id': inputs.session_id,
+                'ip': inputs.ip,
+                'city': inputs.city,
+                'priorities': inputs.priorities,
+                'ranking': [[r['position'], r['categoria'], r['name'], r['coord'], r['nota'], r['margemErro']]
+                            for r in inputs.ranking],
+                'podium': podium,
+                'pdf_sha256': hashlib.sha256(pdf).hexdigest(),
+                'pdf_size': len(pdf),
+            }
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.records_file, 'a+b') as f:
+                offset = f.seek(0, 2)
+                if offset:
+                    f.seek(offset - 1)
+                    if f.read(1) != b'\n':  # fecha uma linha truncada antes de anexar
+                        f.write(b'\n')
+                        offset += 1
+                f.write(_dumps(record).encode('utf-8') + b'\n')
+            offsets[inputs.report_hash] = offset
+        return record
+
+    def get(self, report_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            offset = self._scan().get(report_hash)
+        if offset is None:
+            return None
+        with open(self.records_file, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            hashes = list(self._scan())
+        for report_hash in hashes:
+            yield self.get(report_hash)
+
+    # ------------------ Re-renderização ------------------
+    def solution(self, ref: str) -> Dict[str, Any]:
+        return _load_solution(str(self.solutions_dir / f'{ref}.json'))
+
+    def inputs(self, record: Dict[str, Any]) -> report_pdf.ReportInputs:
+        """ReportInputs of a stored record (solution descriptions resolved by digest)."""
+        ranking = [dict(zip(('position', 'categoria', 'name', 'coord', 'nota', 'margemErro'), row))
+                   for row in record['ranking']]
+        podium = []
+        for categoria, items in record['podium']:
+            podium.append({'categoria': categoria, 'items': [
+                {'nome': nome, 'coord': coord, 'nota': nota, 'margemErro': margem,
+                 'solutionData': self.solution(ref) if ref else None, 'solutionVersion': ref}
+                for nome, coord, nota, margem, ref in items]})
+        return report_pdf.ReportInputs(record['hash'], record['generated_at'], record['session_id'],
+                                       record['ip'], record['city'], record['priorities'], ranking, podium)
+
+    def render(self, record: Dict[str, Any]) -> bytes:
+        """Re-render a record; ValueError if it was made with another template version."""
+        if record.get('template') != report_pdf.TEMPLATE_VERSION:
+            raise ValueError(f"Relatório {record.get('hash')} usa o template {record.get('template')}; "
+                             f"o renderizador atual é o {report_pdf.TEMPLATE_VERSION}.")
+        return report_pdf.render(self.inputs(record))
+
+    def render_verified(self, record: Dict[str, Any]) -> bytes:
+        """render() that raises RenderMismatch unless the PDF matches the original byte for byte."""
+        pdf = self.render(record)
+        actual = hashlib.sha256(pdf).hexdigest()
+        if actual != record['pdf_sha256']:
+            raise RenderMismatch(record['hash'], record['pdf_sha256'], actual)
+        return pdf
+
+    def verify(self, record: Dict[str, Any]) -> Verification:
+        """Re-render a record and compare the PDF digest with the one served originally."""
+        expected = record['pdf_sha256']
+        try:
+            actual = hashlib.sha256(self.render(record)).hexdigest()
+        except ValueError:
+            return Verification(record['hash'], 'template', expected, None)
+        return Verification(record['hash'], 'ok' if actual == expected else 'divergente', expected, actual)
+
+
+store = InputStore()
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Registros de entrada dos relatórios: verificação e tamanho.')
+    sub = p.add_subparsers(dest='command', required=True)
+    v = sub.add_parser('verify', help='re-renderiza e compara o sha256 do PDF original')
+    v.add_argument('hashes', nargs='*', help='hashes de relatório (padrão: todos)')
+    sub.add_parser('stats', help='espaço dos registros x PDFs originais')
+    args = p.parse_args()
+
+    if args.command == 'stats':
+        records: List[Dict[str, Any]] = list(store.records())
+        record_bytes = store.records_file.stat().st_size if store.records_file.exists() else 0
+        solution_bytes = sum(f.stat().st_size for f in store.solutions_dir.glob('*.json'))
+        pdf_bytes = sum(r.get('pdf_size', 0) for r in records)
+        stored = record_bytes + solution_bytes
+        print(f"relatórios: {len(records)}")
+        print(f"registros:  {record_bytes / 1024:10.1f} KB + descrições {solution_bytes / 1024:.1f} KB")
+        print(f"PDFs:       {pdf_bytes / 1024:10.1f} KB" + (f" ({pdf_bytes / stored:.1f}x)" if stored else ''))
+        sys.exit(0)
+
+    failed = 0
+    if args.hashes:
+        selected = [store.get(h) or {'hash': h} for h in args.hashes]
+    else:
+        selected = store.records()
+    for record in selected:
+        if 'pdf_sha256' not in record:
+            print(f"{record['hash']}  não encontrado")
+            failed += 1
+            continue
+        result = store.verify(record)
+        if result.status == 'ok':
+            print(f"{result.report_hash}  ok  {result.actual[:16]}")
+        elif result.status == 'template':
+            print(f"{result.report_hash}  ignorado: template {record.get('template')} "
+                  f"(atual {report_pdf.TEMPLATE_VERSION})")
+        else:
+            failed += 1
+            print(f"{result.report_hash}  DIVERGENTE  esperado {result.expected[:16]} obtido {result.actual[:16]} "
+                  f"(ReportLab {record.get('reportlab')} -> {reportlab.Version})")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,191 @@
+"""
+Deterministic PDF renderer of the Tribússula report.
+
+render() depends only on its ReportInputs and TEMPLATE_VERSION: the document
+is built with ReportLab's invariant mode (fixed creation date and document
+ID), so the same inputs produce byte-identical PDFs and a report can be
+re-rendered later from its stored inputs (see report_inputs). Any change to
+what is drawn must bump TEMPLATE_VERSION.
+"""
+
+from io import BytesIO
+from typing import Any, Dict, List, NamedTuple
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import report_chart
+import report_podium
+
+TEMPLATE_VERSION = 1
+
+
+class ReportInputs(NamedTuple):
+    report_hash: str
+    generated_at: str                # ISO, como em reports.csv
+    session_id: str
+    ip: str
+    city: str
+    priorities: Dict[str, Any]
+    ranking: List[Dict[str, Any]]    # linhas normalizadas (normalize_ranking)
+    podium: List[Dict[str, Any]]     # {'categoria', 'items': [{'nome', 'coord', 'nota', 'margemErro', 'solutionData', 'solutionVersion'}]}
+
+
+def normalize_ranking(ranking: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ranking rows reduced to what the report draws (legacy field fallbacks applied)."""
+    rows = []
+    for item in ranking:
+        rows.append({
+            'position': item.get('position', ''),
+            'categoria': item.get('categoria', item.get('cluster', 'N/A')),
+            'name': item.get('name') or item.get('nome') or 'N/A',
+            'coord': item.get('coord'),
+            'nota': item.get('nota', 'N/A'),
+            'margemErro': item.get('margemErro', 'N/A'),
+        })
+    return rows
+
+
+def normalize_podium(podium: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Podium groups reduced to what the report draws."""
+    groups = []
+    for group in podium or []:
+        items = [{
+            'nome': item.get('nome', 'N/A'),
+            'coord': item.get('coord', 'N/A'),
+            'nota': item.get('nota', 'N/A'),
+            'margemErro': item.get('margemErro', 'N/A'),
+            'solutionData': item.get('solutionData') or None,
+            'solutionVersion': item.get('solutionVersion'),
+        } for item in group.get('items', [])]
+        groups.append({'categoria': group.get('categoria', 'N/A'), 'items': items})
+    return groups
+
+
+def percentages(priorities: Dict[str, Any]):
+    """(r, g, b) in percent; priorities sent as fractions (0-1) are scaled."""
+    r_pct = priorities.get('r', 0)
+    g_pct = priorities.get('g', 0)
+    b_pct = priorities.get('b', 0)
+    # Se vier como decimal (0-1), converte para percentual
+    if r_pct <= 1 and g_pct <= 1 and b_pct <= 1:
+        r_pct = r_pct * 100
+        g_pct = g_pct * 100
+        b_pct = b_pct * 100
+    return r_pct, g_pct, b_pct
+
+
+def render(inputs: ReportInputs) -> bytes:
+    """PDF bytes of a report; identical for identical inputs and TEMPLATE_VERSION."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=72,
+                            invariant=1)  # sem data de criação/ID aleatório no PDF
+
+    # Container for the 'Flowable' objects
+    elements = []
+
+    # Define styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#000000'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#000000'),
+        spaceAfter=12
+    )
+
+    # Title
+    elements.append(Paragraph("Tribússula report", title_style))
+    elements.append(Spacer(1, 12))
+
+    # Hash
+    elements.append(Paragraph(f"<b>Hash:</b> {inputs.report_hash}", styles['Normal']))
+    elements.append(Spacer(1, 6))
+
+    # IP and City
+    elements.append(Paragraph(
+        f"Requisitado a partir de: {inputs.ip}, {inputs.city}",
+        styles['Normal']
+    ))
+    elements.append(Spacer(1, 20))
+
+    # Subtitle with priorities - converte r, g, b para percentuais
+    r_pct, g_pct, b_pct = percentages(inputs.priorities)
+    priorities_text = f"Ranking priorizando {r_pct:.1f}% custo, {g_pct:.1f}% qualidade e {b_pct:.1f}% prazo"
+    elements.append(Paragraph(priorities_text, styles['Normal']))
+    elements.append(Spacer(1, 30))
+
+    # Ranking table - Centralizada
+    table_data = [['#', 'Categoria', 'Nome', 'Nota', 'Margem de Erro']]
+    for row in inputs.ranking:
+        safe_name = row['name']
+        if row['coord']:
+            safe_name = f"{safe_name} ({row['coord']})"
+        table_data.append([
+            str(row['position']),
+            row['categoria'],
+            safe_name,
+            row['nota'],
+            row['margemErro']
+        ])
+
+    ranking_table = Table(table_data, colWidths=[0.5*inch, 1*inch, 3*inch, 0.8*inch, 1*inch])
+    ranking_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # TUDO CENTRALIZADO
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ]))
+
+    elements.append(ranking_table)
+    elements.append(Spacer(1, 20))
+
+    # Gráfico Nota x Classificação - vetorial, desenhado a partir da própria tabela
+    chart_points = report_chart.points_from_table(inputs.ranking)
+    if chart_points:
+        elements.append(report_chart.ClusterPlot(chart_points, report_chart.decimals_of(inputs.ranking),
+                                                 (r_pct, g_pct, b_pct)))
+
+    # Podium section - Ouro, Prata, Bronze (nova página)
+    if inputs.podium:
+        elements.append(PageBreak())
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph("Podium", heading_style))
+        elements.append(Spacer(1, 20))
+
+        for group in inputs.podium:
+            if not group['items']:
+                continue
+
+            # Título da categoria
+            elements.append(Paragraph(f"<b>{group['categoria']}</b>", styles['Heading3']))
+            elements.append(Spacer(1, 12))
+
+            # Para cada solução nesta categoria (detalhes estáticos vêm do cache por versão)
+            for solution_item in group['items']:
+                elements.extend(report_podium.podium_item(solution_item))
+
+    # Build PDF
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,166 @@
+"""
+Cached podium detail blocks for the PDF report.
+
+The detail of a podium solution (descrição, escopo, custo, prazos,
+qualidade objetiva, riscos, mitigações, quando escolher, benefícios) depends
+only on its description, so its flowables are built once per (solution id,
+description version) and reused. Paragraph parsing (markup -> frags) is the
+costly part; each report gets shallow copies of the cached flowables, which
+share the parsed frags but keep their own layout state, so concurrent builds
+do not interfere. Only the score line is built per report.
+
+The version key is the solutions_index ETag of the item when the report was
+hydrated server-side, or a digest of the solutionData sent by the client:
+either changes with the description file, which invalidates the entry.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Flowable, Paragraph, Spacer
+
+CACHE_SIZE = 256
+
+_styles = getSampleStyleSheet()
+_cache: 'OrderedDict[Tuple[str, str], List[Flowable]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def version_key(solution_data: Dict[str, Any]) -> str:
+    raw = json.dumps(solution_data, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def solution_block(solution_data: Dict[str, Any]) -> List[Flowable]:
+    """Static detail flowables of one solution (everything but the score line)."""
+    normal = _styles['Normal']
+    elements = []
+
+    # Nome e ID
+    elements.append(Paragraph(
+        f"<b>{solution_data.get('nome', 'N/A')}</b> ({solution_data.get('id', 'N/A')}) • Tronco {solution_data.get('tronco', 'N/A')}",
+        normal
+    ))
+    elements.append(Spacer(1, 6))
+
+    # Descrição
+    if solution_data.get('descricao'):
+        elements.append(Paragraph(f"<b>Descrição:</b> {solution_data.get('descricao')}", normal))
+        elements.append(Spacer(1, 6))
+
+    # Escopo
+    if solution_data.get('escopo') and isinstance(solution_data.get('escopo'), list):
+        elements.append(Paragraph("<b>Escopo:</b>", normal))
+        for escopo_item in solution_data.get('escopo', []):
+            elements.append(Paragraph(f"• {escopo_item}", normal))
+        elements.append(Spacer(1, 6))
+
+    # Custo
+    if solution_data.get('custo'):
+        custo = solution_data.get('custo', {})
+        custo_text = []
+        if custo.get('mensal_brl'):
+            custo_text.append(f"Mensal: R$ {custo.get('mensal_brl'):,.2f}")
+        if custo.get('anual_brl'):
+            custo_text.append(f"Anual: R$ {custo.get('anual_brl'):,.2f}")
+        if custo.get('setup_brl'):
+            custo_text.append(f"Setup: R$ {custo.get('setup_brl'):,.2f}")
+        if custo_text:
+            elements.append(Paragraph(f"<b>Custo:</b> {', '.join(custo_text)}", normal))
+            elements.append(Spacer(1, 6))
+
+    # Prazos
+    if solution_data.get('prazos_dias'):
+        prazos = solution_data.get('prazos_dias', {})
+        prazo_text = []
+        if prazos.get('total'):
+            prazo_text.append(f"Total: {prazos.get('total')} dias")
+        if prazos.get('sigma'):
+            prazo_text.append(f"σ (Incerteza): {prazos.get('sigma')} dias")
+        if prazo_text:
+            elements.append(Paragraph(f"<b>Prazo:</b> {', '.join(prazo_text)}", normal))
+            elements.append(Spacer(1, 6))
+
+    # Qualidade Objetiva
+    if solution_data.get('qualidade_objetiva'):
+        qualidade = solution_data.get('qualidade_objetiva', {})
+        qualidade_text = []
+        if qualidade.get('deduplicacao_top3_pct'):
+            qualidade_text.append(f"Deduplicação Top 3: {qualidade.get('deduplicacao_top3_pct')}")
+        if qualidade.get('latencia_seg'):
+            qualidade_text.append(f"Latência: {qualidade.get('latencia_seg')} seg")
+        if qualidade.get('cobertura_classificacao_pct'):
+            qualidade_text.append(f"Cobertura de Classificação: {qualidade.get('cobertura_classificacao_pct')}")
+        if qualidade_text:
+            elements.append(Paragraph(f"<b>Qualidade Objetiva:</b> {', '.join(qualidade_text)}", normal))
+            elements.append(Spacer(1, 6))
+
+    # Riscos
+    if solution_data.get('riscos') and isinstance(solution_data.get('riscos'), list):
+        elements.append(Paragraph("<b>Riscos:</b>", normal))
+        for risco in solution_data.get('riscos', []):
+            elements.append(Paragraph(f"⚠️ {risco}", normal))
+        elements.append(Spacer(1, 6))
+
+    # Mitigações
+    if solution_data.get('mitigacoes') and isinstance(solution_data.get('mitigacoes'), list):
+        elements.append(Paragraph("<b>Mitigações:</b>", normal))
+        for mit in solution_data.get('mitigacoes', []):
+            elements.append(Paragraph(f"✅ {mit}", normal))
+        elements.append(Spacer(1, 6))
+
+    # Quando Escolher
+    if solution_data.get('quando_escolher'):
+        elements.append(Paragraph(f"<b>Quando Escolher:</b> {solution_data.get('quando_escolher')}", normal))
+        elements.append(Spacer(1, 6))
+
+    # Benefícios
+    if solution_data.get('beneficios') and isinstance(solution_data.get('beneficios'), list):
+        elements.append(Paragraph("<b>Benefícios:</b>", normal))
+        for beneficio in solution_data.get('beneficios', []):
+            elements.append(Paragraph(f"💡 {beneficio}", normal))
+        elements.append(Spacer(1, 6))
+
+    return elements
+
+
+def cached_block(solution_data: Dict[str, Any], version: Optional[str] = None) -> List[Flowable]:
+    """Fresh copies of the cached detail flowables for (id, version)."""
+    key = (str(solution_data.get('id', '')), version or version_key(solution_data))
+    with _lock:
+        block = _cache.get(key)
+        if block is not None:
+            _cache.move_to_end(key)
+    if block is None:
+        block = solution_block(solution_data)
+        with _lock:
+            _cache[key] = block
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return [copy.copy(f) for f in block]
+
+
+def podium_item(solution_item: Dict[str, Any]) -> List[Flowable]:
+    """Flowables of one podium entry: cached detail block plus this report's score line."""
+    normal = _styles['Normal']
+    solution_data = solution_item.get('solutionData')
+    if not solution_data:
+        # Se não tem dados completos, mostra só o básico
+        return [
+            Paragraph(f"<b>{solution_item.get('nome', 'N/A')}</b> ({solution_item.get('coord', 'N/A')})", normal),
+            Paragraph(f"Nota: {solution_item.get('nota', 'N/A')} | Margem de Erro: {solution_item.get('margemErro', 'N/A')}", normal),
+            Spacer(1, 10),
+        ]
+    elements = cached_block(solution_data, solution_item.get('solutionVersion'))
+    # Nota e Margem de Erro
+    elements.append(Paragraph(
+        f"<b>Nota:</b> {solution_item.get('nota', 'N/A')} | <b>Margem de Erro:</b> {solution_item.get('margemErro', 'N/A')}",
+        normal
+    ))
+    elements.append(Spacer(1, 20))
+    return elements
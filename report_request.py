@@ -0,0 +1,142 @@
+"""
+Compact /api/generate-report requests.
+
+The legacy body carries the formatted ranking table and, for every podium
+item, the whole solution description (solutionData) found by app.js. The
+compact body carries only what the client actually decided:
+
+    {"format": "compact", "decimals": 2, "priorities": {"r", "g", "b"},
+     "items": [{"coord", "nome", "nota", "margemErro", "categoria"}, ...],   # ordem do ranking
+     "podium": [{"categoria": "Ouro", "items": [0, 3]}, ...],                  # índices em items
+     "solutions"?: "solution_description5.json", "sessionId"?}
+
+expand() turns it into the legacy rankingTable/podiumData shapes, with the
+notes formatted like Number.toFixed and solutionData hydrated from
+solutions_index, so the PDF code and the report hash see the same data for
+both formats.
+"""
+
+import argparse
+import json
+import time
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Optional, Tuple
+
+import solutions_index
+
+FORMAT = 'compact'
+
+
+def is_compact(data: Dict[str, Any]) -> bool:
+    return isinstance(data, dict) and data.get('format') == FORMAT
+
+
+def to_fixed(value, decimals: int) -> str:
+    """Number.prototype.toFixed: exact binary value, ties away from zero; non-numbers as text."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 'N/A' if value is None else str(value)
+    if value != value or value in (float('inf'), float('-inf')):
+        return str(value)
+    return str(Decimal(value).quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_UP))
+
+
+def solution_data(coord: str, nome: str, version=None) -> Tuple[Optional[Dict], Optional[str]]:
+    """(solutionData as app.js builds it, with nome_curto/linha aliases, and the item ETag), or (None, None)."""
+    found = solutions_index.store.find(coord, nome, version)
+    if found is None:
+        return None, None
+    payload, etag = found
+    item = payload['item']
+    return {**item, 'nome': item.get('nome_curto') or item.get('nome'), 'tronco': item.get('linha') or item.get('tronco')}, etag
+
+
+def expand(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Legacy request body (rankingTable, podiumData, ...) for a compact one; ValueError if malformed."""
+    items = data.get('items')
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ValueError('Relatório compacto: "items" deve ser uma lista de objetos.')
+    try:
+        decimals = int(data.get('decimals', 2))
+    except (TypeError, ValueError):
+        raise ValueError(f'Relatório compacto: "decimals" inválido: {data.get("decimals")!r}') from None
+    if not 0 <= decimals <= 100:  # mesmo intervalo de Number.toFixed
+        raise ValueError(f'Relatório compacto: "decimals" fora de 0..100: {decimals}')
+    podium_groups = data.get('podium') or []
+    if not isinstance(podium_groups, list) or not all(
+            isinstance(g, dict) and isinstance(g.get('items', []), list) for g in podium_groups):
+        raise ValueError('Relatório compacto: "podium" deve ser uma lista de objetos com "items" em lista.')
+    version = data.get('solutions')
+    if version is not None:
+        if not isinstance(version, str):
+            raise ValueError(f'Relatório compacto: "solutions" inválido: {version!r}')
+        try:
+            solutions_index.store.index(version)
+        except FileNotFoundError as e:
+            raise ValueError(f'Relatório compacto: {e}') from None
+
+    rows = []
+    for item in items:
+        nome = item.get('nome')
+        rows.append({
+            'nome': nome if nome not in (None, '') else 'N/A',
+            'coord': item.get('coord') or '',
+            'nota': to_fixed(item.get('nota'), decimals),
+            'margemErro': to_fixed(item.get('margemErro'), decimals),
+            'categoria': item.get('categoria') or 'N/A',
+        })
+
+    ranking_table = [{'position': n + 1, 'categoria': row['categoria'], 'name': row['nome'], 'coord': row['coord'],
+                      'nota': row['nota'], 'margemErro': row['margemErro']} for n, row in enumerate(rows)]
+
+    podium = []
+    for group in podium_groups:
+        members = []
+        for ref in group.get('items', []):
+            if isinstance(ref, bool) or not isinstance(ref, int) or not 0 <= ref < len(rows):
+                raise ValueError(f'Relatório compacto: índice de pódio inválido: {ref!r}')
+            row = rows[ref]
+            details, etag = solution_data(row['coord'], row['nome'], version)
+            # solutionVersion: chave do bloco de detalhes em cache (report_podium)
+            members.append({'nome': row['nome'], 'coord': row['coord'], 'nota': row['nota'],
+                            'margemErro': row['margemErro'], 'solutionData': details, 'solutionVersion': etag})
+        podium.append({'categoria': group.get('categoria', 'N/A'), 'items': members})
+
+    legacy = {k: v for k, v in data.items() if k not in ('format', 'items', 'podium', 'decimals', 'solutions')}
+    legacy['rankingTable'] = ranking_table
+    legacy['podiumData'] = podium
+    return legacy
+
+
+# ------------------ Benchmark ------------------
+def _sample(n_items: int) -> Dict[str, Any]:
+    ids = [payload['item']['id'] for payload, _ in solutions_index.store.index().by_coord.values()]
+    names = ['Ouro', 'Prata', 'Bronze', 'Ferro']
+    items = [{'coord': ids[i % len(ids)], 'nome': f'Solução {i + 1}', 'nota': round(9.7 - i * 0.37, 6),
+              'margemErro': 0.31, 'categoria': names[min(i // 3, 3)]} for i in range(n_items)]
+    podium = [{'categoria': names[c], 'items': list(range(3 * c, min(3 * c + 3, n_items)))} for c in range(3)]
+    return {'format': FORMAT, 'decimals': 2, 'priorities': {'r': 33.3, 'g': 33.3, 'b': 33.4},
+            'items': items, 'podium': podium, 'sessionId': 'bench'}
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Tamanho e tempo de leitura: relatório legado x compacto.')
+    p.add_argument('--items', type=int, default=12)
+    p.add_argument('--repeat', type=int, default=200)
+    args = p.parse_args()
+
+    compact = _sample(args.items)
+    legacy_body = json.dumps(expand(compact)).encode('utf-8')
+    compact_body = json.dumps(compact).encode('utf-8')
+
+    def best(fn):
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    t_legacy = best(lambda: json.loads(legacy_body))
+    t_compact = best(lambda: expand(json.loads(compact_body)))
+    print(f"legado:   {len(legacy_body) / 1024:8.1f} KB | json.loads {t_legacy * 1e3:.3f} ms")
+    print(f"compacto: {len(compact_body) / 1024:8.1f} KB | json.loads + expand {t_compact * 1e3:.3f} ms")
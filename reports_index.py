@@ -0,0 +1,248 @@
+"""
+Persistent hash index over tracking_data/reports.csv.
+
+reports.csv is append-only and is the record of every generated report;
+verifying a hash against it would mean scanning the whole file. The index
+(SQLite, next to the CSV) maps report_hash to the byte offset of its row
+plus the metadata a verifier needs (session, generated_at, priorities), so
+a lookup is one primary-key probe however many reports exist.
+
+Rows are appended through ReportIndex.append(), which writes the CSV row and
+its index entry under one lock. The index remembers how many CSV bytes it
+covers: rows appended by other means are picked up incrementally, and a
+missing index (or a CSV that shrank) is rebuilt from scratch.
+
+    python reports_index.py rebuild
+    python reports_index.py lookup HASH
+    python reports_index.py bench --rows 1000000
+"""
+
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+REPORTS_CSV = Path('tracking_data') / 'reports.csv'  # relativo, como DATA_DIR no backend
+INDEX_SUFFIX = '.idx.sqlite3'
+HEADER = ['hash', 'session_id', 'generated_at', 'ip', 'city', 'priorities']
+BATCH_ROWS = 10000
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    hash TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    session_id TEXT,
+    generated_at TEXT,
+    priorities TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+'''
+
+
+class ReportRecord(NamedTuple):
+    hash: str
+    offset: int          # byte da linha em reports.csv
+    session_id: str
+    generated_at: str
+    priorities: str      # JSON como gravado no CSV
+
+    def to_json(self) -> Dict[str, Any]:
+        try:
+            priorities = json.loads(self.priorities)
+        except (TypeError, ValueError):
+            priorities = self.priorities
+        return {'hash': self.hash, 'session_id': self.session_id, 'generated_at': self.generated_at,
+                'priorities': priorities}
+
+
+def _csv_line(row: List[Any]) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(row)
+    return buf.getvalue().encode('utf-8')
+
+
+def _rows(f, offset: int) -> Iterator[Tuple[int, int, List[str]]]:
+    """(row offset, end offset, fields) of the complete CSV rows from offset on."""
+    pos = [offset]
+
+    def lines():
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                return  # linha ainda sendo escrita: fica para a próxima sincronização
+            pos[0] += len(raw)
+            yield raw.decode('utf-8')
+
+    start = offset
+    for row in csv.reader(lines()):  # o reader não lê adiante: pos[0] é o fim desta linha
+        yield start, pos[0], row
+        start = pos[0]
+
+
+class ReportIndex:
+    """reports.csv plus its hash index; thread-safe within one process."""
+
+    def __init__(self, csv_path: Path = REPORTS_CSV, index_path: Optional[Path] = None):
+        self.csv_path = Path(csv_path).absolute()
+        self.index_path = Path(index_path) if index_path else self.csv_path.with_name(self.csv_path.stem + INDEX_SUFFIX)
+        self._db: Optional[sqlite3.Connection] = None
+        self._indexed = 0
+        self._lock = threading.Lock()
+
+    # ------------------ Índice ------------------
+    def _connect(self) -> sqlite3.Connection:
+        """Open (creating if needed) the index and catch up with the CSV (caller holds the lock)."""
+        if self._db is None:
+            db = sqlite3.connect(str(self.index_path), check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.executescript(_SCHEMA)
+            row = db.execute("SELECT value FROM meta WHERE key = 'indexed_bytes'").fetchone()
+            self._db, self._indexed = db, row[0] if row else 0
+        self._sync()
+        return self._db
+
+    def _sync(self) -> None:
+        """Index CSV rows past the covered offset; rebuild if the CSV shrank (caller holds the lock)."""
+        try:
+            size = self.csv_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size == self._indexed:
+            return
+        db = self._db
+        if size < self._indexed:
+            print(f"⚠️ {self.csv_path.name} menor que o índice; reconstruindo.")
+            db.execute('DELETE FROM reports')
+            self._indexed = 0
+        t0 = time.perf_counter()
+        count = 0
+        db.execute('BEGIN')
+        try:
+            with open(self.csv_path, 'rb') as f:
+                f.seek(self._indexed)
+                batch = []
+                end = self._indexed
+                for offset, end, row in _rows(f, self._indexed):
+                    if len(row) < len(HEADER) or row[0] == HEADER[0]:
+                        continue  # cabeçalho ou linha incompleta
+                    batch.append((row[0], offset, row[1], row[2], row[5]))
+                    if len(batch) >= BATCH_ROWS:
+                        db.executemany('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)', batch)
+                        count += len(batch)
+                        batch = []
+                db.executemany('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)', batch)
+                count += len(batch)
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('indexed_bytes', ?)", (end,))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self._indexed = end
+        if count > 1000:
+            print(f"📇 Índice de relatórios: {count} linhas em {time.perf_counter() - t0:.1f}s")
+
+    def sync(self) -> None:
+        """Bring the index up to date (e.g. at startup)."""
+        with self._lock:
+            self._connect()
+
+    # ------------------ Escrita ------------------
+    def append(self, report_hash: str, session_id: str, generated_at: str, ip: str, city: str,
+               priorities: str) -> ReportRecord:
+        """Append a row to reports.csv and index it."""
+        line = _csv_line([report_hash, session_id, generated_at, ip, city, priorities])
+        with self._lock:
+            db = self._connect()
+            with open(self.csv_path, 'a+b') as f:
+                size = f.seek(0, 2)
+                if size == 0:
+                    f.write(_csv_line(HEADER))
+                else:
+                    f.seek(size - 1)
+                    if f.read(1) != b'\n':  # fecha uma linha truncada antes de anexar
+                        f.write(b'\r\n')
+                offset = f.tell()
+                f.write(line)
+            record = ReportRecord(report_hash, offset, session_id, generated_at, priorities)
+            db.execute('BEGIN')
+            db.execute('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)', record)
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('indexed_bytes', ?)", (offset + len(line),))
+            db.execute('COMMIT')
+            self._indexed = offset + len(line)
+        return record
+
+    # ------------------ Leitura ------------------
+    def lookup(self, report_hash: str) -> Optional[ReportRecord]:
+        with self._lock:
+            row = self._connect().execute('SELECT * FROM reports WHERE hash = ?', (report_hash,)).fetchone()
+        return ReportRecord(*row) if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def rebuild(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            for suffix in ('', '-wal', '-shm'):
+                Path(str(self.index_path) + suffix).unlink(missing_ok=True)
+            self._connect()
+
+
+index = ReportIndex()
+
+
+# ------------------ Benchmark ------------------
+def _bench(rows: int, lookups: int) -> None:
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'reports.csv'
+        with open(path, 'wb') as f:
+            f.write(_csv_line(HEADER))
+            for i in range(rows):
+                f.write(_csv_line([f'{i:016x}', f'session_{i // 7}', f'2025-11-02T09:{i % 60:02d}:00',
+                                   '127.0.0.1', '', json.dumps({'r': 33.3, 'g': 33.3, 'b': 33.4})]))
+        idx = ReportIndex(path)
+        t0 = time.perf_counter()
+        idx.sync()
+        t_build = time.perf_counter() - t0
+        probes = [f'{(i * 2654435761) % rows:016x}' for i in range(lookups)]
+        t0 = time.perf_counter()
+        for h in probes:
+            assert idx.lookup(h) is not None
+        t_lookup = (time.perf_counter() - t0) / lookups
+        t0 = time.perf_counter()
+        idx.append('f' * 16, 'bench', '2025-11-02T10:00:00', '', '', '{}')
+        t_append = time.perf_counter() - t0
+        print(f"{rows} linhas ({path.stat().st_size / 2**20:.0f} MB): reconstrução {t_build:.1f}s | "
+              f"consulta {t_lookup * 1e6:.1f} µs | append {t_append * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Índice por hash de tracking_data/reports.csv.')
+    sub = p.add_subparsers(dest='command', required=True)
+    sub.add_parser('rebuild', help='reconstrói o índice a partir do CSV')
+    lk = sub.add_parser('lookup', help='metadados de um relatório')
+    lk.add_argument('hash')
+    b = sub.add_parser('bench', help='reconstrução e consulta num CSV sintético')
+    b.add_argument('--rows', type=int, default=1000000)
+    b.add_argument('--lookups', type=int, default=10000)
+    args = p.parse_args()
+
+    if args.command == 'rebuild':
+        index.rebuild()
+        print(f"{index.count()} relatórios indexados em {index.index_path}")
+    elif args.command == 'lookup':
+        record = index.lookup(args.hash)
+        print(json.dumps(record._asdict() if record else None, ensure_ascii=False, indent=2))
+        sys.exit(0 if record else 1)
+    else:
+        _bench(args.rows, args.lookups)
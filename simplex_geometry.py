@@ -0,0 +1,107 @@
+"""
+Array versions of the triangle geometry used by the priority picker.
+
+Same formulas, vertex order (top, left, right) and tolerance as the scalar
+helpers of dashboard_entradaV8 (which now wrap these), applied to whole
+arrays of points at once: mapping recorded clicks to priorities or
+rasterizing the triangle costs a handful of NumPy passes instead of a
+Python call per point.
+
+    w = barycentric(px, py, top, left, right)   # (N, 3), colunas top/left/right
+    ok = is_inside_simplex(w)                   # (N,) bool
+    rgb = bary_to_rgb(w, ("B", "R", "G"))       # (N, 3) normalizado
+    xy = to_cartesian(w, top, left, right)      # (N, 2)
+"""
+
+import argparse
+import time
+from typing import Sequence, Tuple
+
+import numpy as np
+
+DEGENERATE_AREA = 1e-9
+INSIDE_TOL = 1e-4
+SUM_FLOOR = 1e-12
+CHANNELS = {"R": 0, "G": 1, "B": 2}
+
+Point = Tuple[float, float]
+
+
+def barycentric(px, py, a: Point, b: Point, c: Point) -> np.ndarray:
+    """(..., 3) weights of vertices a, b, c for points (px, py); zeros if the triangle is degenerate."""
+    px = np.asarray(px, dtype=float)
+    py = np.asarray(py, dtype=float)
+    (x1, y1), (x2, y2), (x3, y3) = a, b, c
+    denom = (x2 - x1)*(y3 - y1) - (x3 - x1)*(y2 - y1)
+    w = np.zeros(np.broadcast(px, py).shape + (3,))
+    if abs(denom) < DEGENERATE_AREA:
+        return w
+    # mesma ordem de operações de _area, para bater bit a bit com a versão escalar
+    w[..., 0] = ((x2 - px)*(y3 - py) - (x3 - px)*(y2 - py)) / denom   # peso de 'a' (top)
+    w[..., 1] = ((x3 - px)*(y1 - py) - (x1 - px)*(y3 - py)) / denom   # peso de 'b' (left)
+    w[..., 2] = 1.0 - w[..., 0] - w[..., 1]                          # peso de 'c' (right)
+    return w
+
+
+def is_inside_simplex(w, tol: float = INSIDE_TOL) -> np.ndarray:
+    """(...) True where every weight is >= -tol."""
+    return (np.asarray(w) >= -tol).all(axis=-1)
+
+
+def to_cartesian(w, a: Point, b: Point, c: Point) -> np.ndarray:
+    """(..., 2) points for barycentric weights (..., 3) of a, b, c."""
+    w = np.asarray(w, dtype=float)
+    x = w[..., 0]*a[0] + w[..., 1]*b[0] + w[..., 2]*c[0]
+    y = w[..., 0]*a[1] + w[..., 1]*b[1] + w[..., 2]*c[1]
+    return np.stack([x, y], axis=-1)
+
+
+def channel_index(vertex_to_channel: Sequence[str]) -> np.ndarray:
+    """Channel column (R=0, G=1, B=2) of each vertex (top, left, right)."""
+    return np.array([CHANNELS[label] for label in vertex_to_channel])
+
+
+def bary_to_rgb(w, vertex_to_channel: Sequence[str]) -> np.ndarray:
+    """(..., 3) weights (top, left, right) -> (r, g, b) per the mapping, normalized to sum 1."""
+    w = np.asarray(w, dtype=float)
+    out = np.zeros_like(w)
+    out[..., channel_index(vertex_to_channel)] = w
+    s = np.maximum(out[..., 0] + out[..., 1] + out[..., 2], SUM_FLOOR)
+    return out / s[..., None]
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Throughput das transformações do simplex (pontos/s).')
+    p.add_argument('--n', type=int, default=2_000_000)
+    p.add_argument('--repeat', type=int, default=5)
+    args = p.parse_args()
+
+    top, left, right = (458.0, 0.0), (0.0, 978.0), (916.0, 978.0)
+    rng = np.random.default_rng(0)
+    px = rng.uniform(0, 917, args.n)
+    py = rng.uniform(0, 979, args.n)
+
+    def best(fn):
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    w = barycentric(px, py, top, left, right)
+    steps = [
+        ('barycentric', lambda: barycentric(px, py, top, left, right)),
+        ('is_inside_simplex', lambda: is_inside_simplex(w)),
+        ('bary_to_rgb', lambda: bary_to_rgb(w, ('B', 'R', 'G'))),
+        ('to_cartesian', lambda: to_cartesian(w, top, left, right)),
+    ]
+    for name, fn in steps:
+        t = best(fn)
+        print(f'{name:18s} {args.n / t / 1e6:8.1f} M pontos/s')
+
+    def pipeline():
+        ww = barycentric(px, py, top, left, right)
+        return bary_to_rgb(ww[is_inside_simplex(ww)], ('B', 'R', 'G'))
+    t = best(pipeline)
+    print(f'{"clique -> rgb":18s} {args.n / t / 1e6:8.1f} M pontos/s')
@@ -0,0 +1,156 @@
+"""
+Indexed access to the solution descriptions (solution_description*.json).
+
+Every version file is parsed and validated once into an immutable
+SolutionIndex: items by normalized coordinate (III.1a -> iii.1.a) and by
+name, each with the ETag of its JSON payload. Lookups follow
+findSolutionById/findSolutionByName in app.js (case-insensitive id, then
+I.1 -> I.1.a..d, then exact name).
+
+Files are re-checked at most every RELOAD_INTERVAL seconds; a changed mtime
+rebuilds that version in a background thread and swaps the snapshot
+reference, so readers never wait on a reload. A file that fails to parse or
+validate (e.g. caught mid-write) keeps serving its previous snapshot.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+FILE_PATTERN = 'solution_description*.json'
+DEFAULT_VERSION = 'solution_description5.json'  # mesma versão que o app.js carrega
+RELOAD_INTERVAL = 2.0
+
+_ROMAN_SECTION_RE = re.compile(r'^[ivxlcdm]+\.\d+$')
+SUFFIXES = ('a', 'b', 'c', 'd')
+
+
+class SolutionIndex(NamedTuple):
+    file: str
+    versao: str
+    mtime: float
+    etag: str                                  # do arquivo inteiro
+    by_coord: Dict[str, Tuple[Dict, str]]      # coordenada normalizada -> (payload, etag)
+    by_name: Dict[str, Tuple[Dict, str]]       # nome/nome_curto -> (payload, etag)
+
+
+def normalize_coord(coord: str) -> str:
+    """Index key for a coordinate: III.1a -> iii.1.a (as the names CSV is normalized)."""
+    coord = re.sub(r'(\d+)([a-z])', r'\1.\2', str(coord).strip(), count=1, flags=re.I)
+    return coord.lower()
+
+
+def _digest(obj) -> str:
+    raw = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def build_index(path: Path) -> SolutionIndex:
+    """Parse and validate one version file; raises ValueError on invalid content."""
+    mtime = path.stat().st_mtime
+    raw = path.read_bytes()
+    data = json.loads(raw.decode('utf-8'))
+    if not isinstance(data, dict) or not isinstance(data.get('itens'), list):
+        raise ValueError(f'{path.name}: esperado objeto com lista "itens".')
+
+    versao = str(data.get('versao', ''))
+    by_coord, by_name = {}, {}
+    for n, item in enumerate(data['itens']):
+        if not isinstance(item, dict) or not isinstance(item.get('id'), str) or not item['id'].strip():
+            raise ValueError(f'{path.name}: item {n} sem "id".')
+        payload = {'arquivo': path.name, 'versao': versao, 'item': item}
+        entry = (payload, _digest(payload))
+        by_coord.setdefault(normalize_coord(item['id']), entry)  # duplicado: vale o primeiro, como o find do JS
+        for key in ('nome_curto', 'nome'):
+            if isinstance(item.get(key), str):
+                by_name.setdefault(item[key], entry)
+    return SolutionIndex(path.name, versao, mtime, hashlib.sha256(raw).hexdigest()[:16], by_coord, by_name)
+
+
+class SolutionStore:
+    """Snapshots of every version file, hot-reloaded by mtime."""
+
+    def __init__(self, base_dir: Path = BASE_DIR, pattern: str = FILE_PATTERN,
+                 reload_interval: float = RELOAD_INTERVAL):
+        self.base_dir = Path(base_dir)
+        self.pattern = pattern
+        self.reload_interval = reload_interval
+        self._snapshots: Optional[Dict[str, SolutionIndex]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _reload(self) -> None:
+        """Rebuild changed files and swap the snapshot dict (caller holds the lock)."""
+        try:
+            old = self._snapshots or {}
+            new = {}
+            for path in sorted(self.base_dir.glob(self.pattern)):
+                current = old.get(path.name)
+                try:
+                    if current is not None and path.stat().st_mtime == current.mtime:
+                        new[path.name] = current
+                        continue
+                    new[path.name] = build_index(path)
+                except (OSError, ValueError) as e:  # JSONDecodeError é ValueError
+                    print(f"⚠️ Descrições de soluções: {e}")
+                    if current is not None:
+                        new[path.name] = current
+            self._snapshots = new
+            self._checked = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def snapshots(self) -> Dict[str, SolutionIndex]:
+        if self._snapshots is None:
+            self._lock.acquire()
+            if self._snapshots is None:
+                self._reload()
+            else:
+                self._lock.release()
+        elif time.monotonic() - self._checked >= self.reload_interval and self._lock.acquire(blocking=False):
+            # leitores seguem com o snapshot atual enquanto a releitura roda
+            threading.Thread(target=self._reload, daemon=True).start()
+        return self._snapshots
+
+    def index(self, version: Optional[str] = None) -> SolutionIndex:
+        name = version or DEFAULT_VERSION
+        if not name.endswith('.json'):
+            name = f'solution_description{name}.json'  # ?version=5
+        snapshot = self.snapshots().get(name)
+        if snapshot is None:
+            raise FileNotFoundError(f'Versão de descrições não encontrada: {name}')
+        return snapshot
+
+    def find(self, coord: Optional[str] = None, nome: Optional[str] = None,
+             version: Optional[str] = None) -> Optional[Tuple[Dict, str]]:
+        """(payload, etag) by coordinate, falling back to name; None if absent."""
+        idx = self.index(version)
+        if coord:
+            key = normalize_coord(coord)
+            candidates = [key]
+            if _ROMAN_SECTION_RE.match(key):
+                candidates += [f'{key}.{s}' for s in SUFFIXES]
+            for c in candidates:
+                if c in idx.by_coord:
+                    return idx.by_coord[c]
+        if nome:
+            return idx.by_name.get(nome)
+        return None
+
+    def listing(self, version: Optional[str] = None) -> Tuple[Dict, str]:
+        """Compact listing (id and names per item) and its ETag."""
+        idx = self.index(version)
+        items = []
+        for payload, _ in idx.by_coord.values():
+            item = payload['item']
+            items.append({'id': item['id'], 'nome_curto': item.get('nome_curto'), 'nome': item.get('nome')})
+        listing = {'arquivo': idx.file, 'versao': idx.versao, 'versoes': sorted(self.snapshots()), 'itens': items}
+        return listing, _digest(listing)
+
+
+store = SolutionStore()
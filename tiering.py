@@ -0,0 +1,190 @@
+"""
+Optimal 1-D tiering of the ranking notes (podium clusters).
+
+The browser version (gmmCluster/smartCluster in app.js) places k evenly spaced
+centroids and scores them with BIC, so the tiers are only approximate and can
+jump between close priority vectors. Here the partition of the sorted notes
+into k contiguous groups is the exact minimum of the (optionally weighted)
+within-group sum of squares, as in Ckmeans.1d.dp:
+
+    D[k][i] = min_j  D[k-1][j-1] + SSE(j..i)
+
+The optimal split j is monotone in i, so each layer is solved by divide and
+conquer in O(N log N); all midpoints of one recursion level are evaluated
+together with NumPy. k = 1..MAX_TIERS is chosen by BIC of the matching
+Gaussian mixture. Tier 1 holds the highest notes and takes the first name of
+TIER_NAMES, as in getClusterName.
+"""
+
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import ranking
+
+TIER_NAMES = ['Ouro', 'Prata', 'Bronze', 'Ferro', 'Barro', 'Lama', 'Nem Olhe', 'Olhe Menos']
+MAX_TIERS = len(TIER_NAMES)
+VAR_FLOOR = 1e-3  # mesma variância mínima do calculateBIC em app.js (notas de 0 a 10)
+CACHE_SIZE = 256
+
+
+def tier_name(tier: int) -> str:
+    if tier < 1:
+        return 'N/A'
+    return TIER_NAMES[tier - 1] if tier <= len(TIER_NAMES) else f'Cluster {tier}'
+
+
+# ------------------ Programação dinâmica ------------------
+class _Prefix:
+    """Prefix sums for O(1) weighted SSE of any contiguous run x[j..i]."""
+
+    def __init__(self, x: np.ndarray, w: np.ndarray):
+        xc = x - np.average(x, weights=w)  # centraliza para reduzir cancelamento
+        self.w = np.concatenate([[0.0], np.cumsum(w)])
+        self.wx = np.concatenate([[0.0], np.cumsum(w * xc)])
+        self.wxx = np.concatenate([[0.0], np.cumsum(w * xc * xc)])
+
+    def sse(self, j: np.ndarray, i: np.ndarray) -> np.ndarray:
+        W = self.w[i + 1] - self.w[j]
+        S = self.wx[i + 1] - self.wx[j]
+        Q = self.wxx[i + 1] - self.wxx[j]
+        return np.maximum(Q - S * S / W, 0.0)
+
+
+def _layer(prev: np.ndarray, pre: _Prefix, k: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Layer k (k >= 2) of the DP: best cost and split for every prefix end i >= k-1."""
+    cur = np.full(n, np.inf)
+    arg = np.zeros(n, dtype=np.int64)
+    big = np.iinfo(np.int64).max
+
+    # tarefas: i em [ilo, ihi], divisão ótima em [jlo, jhi]
+    ilo = np.array([k - 1]); ihi = np.array([n - 1])
+    jlo = np.array([k - 1]); jhi = np.array([n - 1])
+    while ilo.size:
+        mid = (ilo + ihi) // 2
+        top = np.minimum(jhi, mid)
+        lengths = top - jlo + 1
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        seg = np.repeat(np.arange(ilo.size), lengths)
+        j = jlo[seg] + np.arange(seg.size) - offsets[seg]
+        i = mid[seg]
+        val = prev[j - 1] + pre.sse(j, i)
+
+        best = np.minimum.reduceat(val, offsets)
+        opt = np.minimum.reduceat(np.where(val == best[seg], j, big), offsets)
+        cur[mid] = best
+        arg[mid] = opt
+
+        left = mid > ilo
+        right = mid < ihi
+        ilo, ihi, jlo, jhi = (np.concatenate([ilo[left], mid[right] + 1]),
+                              np.concatenate([mid[left] - 1, ihi[right]]),
+                              np.concatenate([jlo[left], opt[right]]),
+                              np.concatenate([opt[left], jhi[right]]))
+    return cur, arg
+
+
+def optimal_partitions(x_sorted: np.ndarray, w: np.ndarray, k_max: int) -> List[np.ndarray]:
+    """For k = 1..k_max, the start index of every group in the optimal k-partition."""
+    n = x_sorted.size
+    pre = _Prefix(x_sorted, w)
+    idx = np.arange(n)
+    cost = pre.sse(np.zeros(n, dtype=np.int64), idx)
+    args = [np.zeros(n, dtype=np.int64)]
+    for k in range(2, k_max + 1):
+        cost, arg = _layer(cost, pre, k, n)
+        args.append(arg)
+
+    starts = []
+    for k in range(1, k_max + 1):
+        s = np.zeros(k, dtype=np.int64)
+        i = n - 1
+        for kk in range(k, 1, -1):
+            s[kk - 1] = args[kk - 1][i]
+            i = s[kk - 1] - 1
+        starts.append(s)
+    return starts
+
+
+def _bic(x: np.ndarray, w: np.ndarray, groups: np.ndarray, k: int) -> float:
+    """BIC of a k-component 1-D Gaussian mixture fitted to the partition (weights sum to n)."""
+    n = x.size
+    W = np.bincount(groups, weights=w, minlength=k)
+    mean = np.bincount(groups, weights=w * x, minlength=k) / W
+    resid = x - mean[groups]
+    ss = np.bincount(groups, weights=w * resid * resid, minlength=k)
+    var = np.maximum(ss / W, VAR_FLOOR)
+    loglik = np.sum(W * np.log(W / n) - 0.5 * W * np.log(2 * math.pi * var) - ss / (2 * var))
+    return float(-2 * loglik + (3 * k - 1) * math.log(n))
+
+
+def tiers(nota, margem_erro=None, weighted: bool = False, k: Optional[int] = None,
+          k_max: int = MAX_TIERS) -> Dict:
+    """Optimal tiers for the notes; tier 1 = best.
+
+    weighted=True weights each point by 1 / margemErro² (normalized to mean 1);
+    k fixes the number of tiers instead of choosing it by BIC.
+    Returns labels (1-based, original order), k, names, bic (per k) and centers.
+    """
+    x = np.asarray(nota, dtype=float).ravel()
+    n = x.size
+    if n == 0:
+        return {'labels': np.zeros(0, dtype=np.int64), 'k': 0, 'names': [], 'bic': [], 'centers': []}
+
+    if weighted:
+        if margem_erro is None:
+            raise ValueError('weighted=True exige margem_erro.')
+        me = np.asarray(margem_erro, dtype=float).ravel()
+        w = 1.0 / np.maximum(me, 1e-9) ** 2
+        w *= n / w.sum()
+    else:
+        w = np.ones(n)
+
+    order = np.argsort(x, kind='stable')
+    xs, ws = x[order], w[order]
+    k_max = max(1, min(k_max, n) if k is None else min(k, n))
+    starts = optimal_partitions(xs, ws, k_max)
+
+    def groups_for(s):
+        g = np.zeros(n, dtype=np.int64)
+        g[s[1:]] = 1
+        return np.cumsum(g)
+
+    bic = [_bic(xs, ws, groups_for(s), len(s)) for s in starts]
+    k_used = k_max if k is not None else int(np.argmin(bic)) + 1  # empate -> menor k
+    groups = groups_for(starts[k_used - 1])
+
+    tier_sorted = k_used - groups  # grupo com as maiores notas = tier 1
+    labels = np.empty(n, dtype=np.int64)
+    labels[order] = tier_sorted
+    centers = np.bincount(groups, weights=ws * xs, minlength=k_used) / np.bincount(groups, weights=ws, minlength=k_used)
+    return {
+        'labels': labels,
+        'k': k_used,
+        'names': [tier_name(t) for t in range(1, k_used + 1)],
+        'bic': bic,
+        'centers': centers[::-1].tolist(),
+    }
+
+
+# ------------------ Cache por (matriz, prioridades) ------------------
+_cache: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+
+
+def cached_tiers(m: ranking.ZMatrix, r: float, g: float, b: float,
+                 result: Optional[Dict] = None, weighted: bool = False) -> Dict:
+    """tiers() for compute_ranking(m, r, g, b), memoized per (matrix, priorities, weighted)."""
+    key = (ranking.matrix_key(m), round(r, 12), round(g, 12), round(b, 12), bool(weighted))
+    hit = _cache.get(key)
+    if hit is not None:
+        _cache.move_to_end(key)
+        return hit
+    if result is None:
+        result = ranking.compute_ranking(m, r, g, b)
+    out = tiers(result['nota'], result['margemErro'], weighted=weighted)
+    _cache[key] = out
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return out
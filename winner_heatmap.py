@@ -0,0 +1,169 @@
+"""
+Winner heatmap over the priority triangle.
+
+Every pixel of the triangle image (or every point of a ternary grid) is a
+priority triple; its top-ranked alternative and score margin (Zranking of the
+winner minus the runner-up) are computed once for the whole simplex with the
+score product of ranking.rank_batch, in batches of bounded size. The raster is cached per
+(matrix hash, resolution, vertices), in memory and under cache/heatmap/, so
+hovering over the triangle is a single array lookup instead of a ranking.
+
+Pixels use the same integer coordinates and barycentric mapping as a click
+in dashboard_entradaV8, so the hovered winner is exactly the one a click there
+would rank first.
+"""
+
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+import ranking
+import simplex_geometry
+
+CACHE_DIR = Path(__file__).resolve().parent / 'cache' / 'heatmap'
+MEMORY_CACHE_SIZE = 8
+BATCH_ELEMENTS = 1 << 22  # prioridades × alternativas por lote de rank_batch
+OVERLAY_ALPHA = 110
+GRID_STEPS = 60
+
+
+class WinnerRaster(NamedTuple):
+    winner: np.ndarray  # (h, w) int32: índice da alternativa em 1º, -1 fora do triângulo
+    margin: np.ndarray  # (h, w) float32: Zranking do 1º menos o do 2º (NaN fora ou com 1 alternativa)
+
+    def at(self, x: int, y: int) -> Optional[Tuple[int, float]]:
+        """(winner, margin) at pixel (x, y), or None outside the raster/triangle."""
+        h, w = self.winner.shape
+        if not (0 <= x < w and 0 <= y < h):
+            return None
+        k = int(self.winner[y, x])
+        return None if k < 0 else (k, float(self.margin[y, x]))
+
+
+# ------------------ Cálculo em lote ------------------
+def winners_for(m: ranking.ZMatrix, P: np.ndarray,
+                batch_elements: int = BATCH_ELEMENTS) -> Tuple[np.ndarray, np.ndarray]:
+    """(winner, margin) for K priority triples (K, 3), evaluated in bounded batches."""
+    P = np.asarray(P, dtype=float).reshape(-1, 3)
+    K, N = P.shape[0], len(m)
+    winner = np.full(K, -1, dtype=np.int32)
+    margin = np.full(K, np.nan, dtype=np.float32)
+    if N == 0:
+        return winner, margin
+    step = max(1, batch_elements // N)
+    for start in range(0, K, step):
+        # mesmo produto de rank_batch, sem as variâncias (o vencedor só depende do Zranking)
+        scores = (P[start:start + step] * ranking.CRITERIA_SIGNS) @ m.z.T
+        best = ranking.winners(scores)  # empate -> menor índice, como no ranking
+        winner[start:start + step] = best
+        if N > 1:
+            rows = np.arange(best.size)
+            top = scores[rows, best]
+            scores[rows, best] = -np.inf
+            margin[start:start + step] = top - scores.max(axis=1)
+    return winner, margin
+
+
+def rasterize(m: ranking.ZMatrix, size: Tuple[int, int], vertices: Sequence[Tuple[float, float]],
+              vertex_to_channel: Sequence[str], origin: Tuple[int, int] = (0, 0)) -> WinnerRaster:
+    """Winner/margin for every pixel of a (w, h) image with triangle vertices (top, left, right).
+
+    Vertices are in the coordinates of the events (e.g. canvas); origin is
+    where the image's pixel (0, 0) sits in them.
+    """
+    w, h = size
+    ys, xs = np.mgrid[0:h, 0:w]
+    bary = simplex_geometry.barycentric(xs.ravel() + origin[0], ys.ravel() + origin[1], *vertices)
+    inside = simplex_geometry.is_inside_simplex(bary)
+    winner = np.full(w * h, -1, dtype=np.int32)
+    margin = np.full(w * h, np.nan, dtype=np.float32)
+    rgb = simplex_geometry.bary_to_rgb(bary[inside], vertex_to_channel)
+    winner[inside], margin[inside] = winners_for(m, rgb)
+    return WinnerRaster(winner.reshape(h, w), margin.reshape(h, w))
+
+
+def ternary_grid(m: ranking.ZMatrix, steps: int = GRID_STEPS) -> Dict[str, np.ndarray]:
+    """Winner/margin on the lattice r + g + b = 1 with spacing 1/steps (for Plotly ternary)."""
+    i, j = np.triu_indices(steps + 1)
+    r = (steps - j) / steps
+    g = (j - i) / steps
+    b = i / steps
+    winner, margin = winners_for(m, np.column_stack([r, g, b]))
+    return {'r': r, 'g': g, 'b': b, 'winner': winner, 'margin': margin}
+
+
+# ------------------ Cores ------------------
+def palette(n: int) -> np.ndarray:
+    """(n, 3) uint8 distinct colors (golden-ratio hues), stable per alternative index."""
+    hue = (np.arange(n) * 0.618033988749895) % 1.0
+    k = (np.array([5.0, 3.0, 1.0]) + hue[:, None] * 6) % 6
+    rgb = 0.85 - 0.6 * np.clip(np.minimum(k, 4 - k), 0, 1)  # HSV com s=0.7, v=0.85
+    return np.round(rgb * 255).astype(np.uint8)
+
+
+def overlay_image(raster: WinnerRaster, n: int, alpha: int = OVERLAY_ALPHA) -> Image.Image:
+    """RGBA overlay: winner color inside the triangle, transparent outside."""
+    colors = np.zeros((n + 1, 4), dtype=np.uint8)
+    colors[:n, :3] = palette(n)
+    colors[:n, 3] = alpha
+    return Image.fromarray(colors[raster.winner], mode='RGBA')  # -1 -> última linha (transparente)
+
+
+# ------------------ Cache ------------------
+_memory: 'OrderedDict[str, object]' = OrderedDict()
+
+
+def _remember(key: str, value):
+    _memory[key] = value
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_CACHE_SIZE:
+        _memory.popitem(last=False)
+    return value
+
+
+def raster_key(m: ranking.ZMatrix, size: Tuple[int, int], vertices, vertex_to_channel,
+               origin: Tuple[int, int] = (0, 0)) -> str:
+    h = hashlib.sha256(f'{ranking.matrix_key(m)}|{tuple(size)}|{tuple(map(tuple, vertices))}|'
+                       f'{"".join(vertex_to_channel)}|{tuple(origin)}'.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def cached_raster(m: ranking.ZMatrix, size: Tuple[int, int], vertices: Sequence[Tuple[float, float]],
+                  vertex_to_channel: Sequence[str], origin: Tuple[int, int] = (0, 0)) -> WinnerRaster:
+    """rasterize() memoized in memory and in cache/heatmap/<key>.npz."""
+    key = raster_key(m, size, vertices, vertex_to_channel, origin)
+    hit = _memory.get(key)
+    if hit is not None:
+        _memory.move_to_end(key)
+        return hit
+
+    path = CACHE_DIR / f'{key}.npz'
+    try:
+        with np.load(path) as f:
+            return _remember(key, WinnerRaster(f['winner'], f['margin']))
+    except (OSError, KeyError, ValueError):
+        pass
+
+    raster = rasterize(m, size, vertices, vertex_to_channel, origin)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp.npz')
+        np.savez_compressed(tmp, winner=raster.winner, margin=raster.margin)
+        tmp.replace(path)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar cache do mapa de vencedores: {e}")
+    return _remember(key, raster)
+
+
+def cached_grid(m: ranking.ZMatrix, steps: int = GRID_STEPS) -> Dict[str, np.ndarray]:
+    """ternary_grid() memoized in memory per (matrix hash, steps)."""
+    key = f'grid:{ranking.matrix_key(m)}:{steps}'
+    hit = _memory.get(key)
+    if hit is not None:
+        _memory.move_to_end(key)
+        return hit
+    return _remember(key, ternary_grid(m, steps))
@@ -0,0 +1,249 @@
+"""
+Z-score preparation from the raw decision matrix.
+
+Input: 'Matriz de Decisão - só nomes e coordenadas.csv' (Custo Anual, Qualidade,
+prazo and their sigmas, Brazilian decimal commas). Output: the dash-ready CSV
+read by ranking.parse_zscores (ZCusto, s_ZCusto, ..., cov(...)).
+
+For each criterion the reference is the inverse-variance weighted mean
+("MED pond" in the dash CSV headers), and each difference is scaled by its
+own sigma combined with the standard error of that mean, as in the offline
+Z-score files in data/:
+
+    w_i = 1 / s_i²,   a_i = w_i / Σw,   mu = Σ a_i x_i,   s_mu² = 1 / Σw
+    d_i = sqrt(s_i² + s_mu²),   Z_i = (x_i - mu) / d_i
+
+so positive Z means above the pooled mean (higher cost / quality / deadline;
+ranking.zranking applies the signs). Sigmas and covariances are propagated to
+first order, including the shared dependence on mu (a_i s_i² = s_mu²):
+
+    dZ_i/dx_j = (δ_ij - a_j) / d_i   =>   var(Z_i) = (s_i² - s_mu²) / d_i²
+
+Cross-criterion covariances need the correlation between the raw measurements
+of two criteria (not present in the raw CSV, 0 by default):
+
+    cov(ZA_i, ZB_i) = ρ_AB · [sA_i sB_i (1 - aA_i - aB_i) + Σ_j aA_j aB_j sA_j sB_j] / (dA_i dB_i)
+
+Z matches the shipped files (compare() / --compare checks it); the sigmas do
+not. The files' s_Z (up to about 1.7) and covariances are not derivable from
+the raw matrix -- most rows carry the same cov(Zcusto,Zqual), often larger
+than s_ZCusto·s_ZQual -- so margins, stability and tiers from a raw matrix
+differ from those of the shipped files. sigma_model() tells callers which
+model a matrix uses ('propagated' or 'file').
+
+Every Z depends on mu and s_mu, i.e. on all rows, so editing one row changes
+the whole output: there is no per-row reuse. The whole conversion is a few
+vectorized passes; outputs are cached by the content hash of the raw file (and
+MODEL_VERSION), in memory and under cache/zscores/.
+"""
+
+import argparse
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import ranking
+
+CACHE_DIR = Path(__file__).resolve().parent / 'cache' / 'zscores'
+MEMORY_CACHE_SIZE = 16
+SIGMA_FLOOR = 1e-12
+
+CRITERIA = ('custo', 'qualidade', 'prazo')
+OUTPUT_HEADER = ['ZCusto', 's_ZCusto', 'ZQualidade', 's_ZQual', 'ZPrazo', 's_ZPrazo',
+                 'cov(Zcusto,Zqual)', 'cov(Zcusto,Zprazo)', 'cov(Zqual,Zprazo)']
+PAIRS = ((0, 1), (0, 2), (1, 2))  # mesma ordem das colunas cov(...)
+DECIMALS = 11
+MODEL_VERSION = 2  # entra na chave do cache: muda quando a fórmula muda
+COMPARE_Z_TOLERANCE = 0.1  # |ΔZ| máximo aceito contra os arquivos de Zscores em data/
+
+# Origem das incertezas (s_Z, cov) de uma matriz
+SIGMA_PROPAGATED = 'propagated'  # propagadas da matriz bruta (s_Z <= 1, cov = 0 sem ρ)
+SIGMA_FILE = 'file'              # lidas do CSV de Zscores
+
+
+# ------------------ Entrada bruta ------------------
+def _columns(header: Sequence[str], key: str) -> Tuple[Optional[str], Optional[str]]:
+    """(value column, sigma column) for a criterion: 'Qualidade' and 's Qualidade'."""
+    sigma = ranking.header_like(header, ('s' + key, 'sigma' + key))
+    value = next((h for h in header if h != sigma and key in ranking._norm(h)), None)
+    return value, sigma
+
+
+def is_raw_matrix(header: Sequence[str]) -> bool:
+    return (ranking.header_like(header, ranking.ZC_KEYS) is None
+            and all(all(_columns(header, k)) for k in CRITERIA))
+
+
+def parse_raw(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(x, s), both (N, 3) in CRITERIA order, from the raw CSV text."""
+    header, rows = ranking.parse_csv(text)
+    x_cols, s_cols = [], []
+    for key in CRITERIA:
+        value, sigma = _columns(header, key)
+        if not value or not sigma:
+            raise KeyError(f"Matriz bruta sem colunas de '{key}' e 's {key}'.")
+        x_cols.append(ranking.coerce_num([row.get(value, '') for row in rows]))
+        s_cols.append(ranking.coerce_num([row.get(sigma, '') for row in rows]))
+    if not rows:
+        return np.zeros((0, 3)), np.zeros((0, 3))
+    return np.column_stack(x_cols), np.column_stack(s_cols)
+
+
+# ------------------ Cálculo ------------------
+def compute_zscores(x: np.ndarray, s: np.ndarray,
+                    correlations: Sequence[float] = (0.0, 0.0, 0.0)) -> Dict[str, np.ndarray]:
+    """Z (N, 3), s_Z (N, 3) and cov (N, 3) for raw values x and sigmas s.
+
+    correlations: raw measurement correlation for (custo, qualidade),
+    (custo, prazo) and (qualidade, prazo).
+    """
+    x = np.asarray(x, dtype=float)
+    s = np.maximum(np.asarray(s, dtype=float), SIGMA_FLOOR)
+    if x.shape[0] == 0:
+        return {'z': np.zeros((0, 3)), 's': np.zeros((0, 3)), 'cov': np.zeros((0, 3)), 'mu': np.zeros(3),
+                'sigma_mu': np.zeros(3)}
+
+    w = 1.0 / (s * s)
+    a = w / w.sum(axis=0)
+    mu = (a * x).sum(axis=0)
+    var_mu = 1.0 / w.sum(axis=0)
+    d = np.sqrt(s * s + var_mu)
+    z = (x - mu) / d
+    sz = np.sqrt(np.maximum(s * s - var_mu, 0.0)) / d
+
+    cov = np.zeros_like(z)
+    for col, ((p, q), rho) in enumerate(zip(PAIRS, correlations)):
+        if rho:
+            shared = np.sum(a[:, p] * a[:, q] * s[:, p] * s[:, q])
+            cov[:, col] = rho * (s[:, p] * s[:, q] * (1.0 - a[:, p] - a[:, q]) + shared) / (d[:, p] * d[:, q])
+    return {'z': z, 's': sz, 'cov': cov, 'mu': mu, 'sigma_mu': np.sqrt(var_mu)}
+
+
+def to_csv(result: Dict[str, np.ndarray]) -> str:
+    """Dash-ready CSV (same layout as 'Zscores dash covs' in data/)."""
+    table = np.column_stack([result['z'][:, 0], result['s'][:, 0],
+                             result['z'][:, 1], result['s'][:, 1],
+                             result['z'][:, 2], result['s'][:, 2],
+                             result['cov']])
+    lines = [','.join(f'"{h}"' if ',' in h else h for h in OUTPUT_HEADER)]
+    lines.extend(','.join(f'"{v:.{DECIMALS}f}"' for v in row) for row in table)
+    return '\n'.join(lines) + '\n'
+
+
+# ------------------ Cache por conteúdo ------------------
+_memory: 'OrderedDict[str, Tuple[ranking.ZMatrix, bytes]]' = OrderedDict()
+_memory_lock = threading.Lock()  # threads do waitress compartilham o LRU
+
+
+def content_key(data: bytes, correlations: Sequence[float]) -> str:
+    h = hashlib.sha256(data)
+    h.update(np.asarray(correlations, dtype=float).tobytes())
+    h.update(str(MODEL_VERSION).encode())
+    return h.hexdigest()[:16]
+
+
+def prepare_bytes(data: bytes, correlations: Sequence[float] = (0.0, 0.0, 0.0)) -> Tuple[ranking.ZMatrix, bytes]:
+    """(ZMatrix, dash CSV bytes) for a raw matrix, cached by content hash."""
+    key = content_key(data, correlations)
+    with _memory_lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            _memory.move_to_end(key)
+            return hit
+
+    path = CACHE_DIR / f'{key}.csv'
+    csv_bytes = None
+    if path.exists():
+        csv_bytes = path.read_bytes()
+    else:
+        x, s = parse_raw(data.decode('utf-8', errors='ignore'))
+        csv_bytes = to_csv(compute_zscores(x, s, correlations)).encode('utf-8')
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(csv_bytes)
+            tmp.replace(path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar cache de Zscores: {e}")
+
+    # a matriz vem sempre da saída em CSV, igual a quem ler o arquivo gerado
+    entry = (ranking.parse_zscores(csv_bytes.decode('utf-8')), csv_bytes)
+    with _memory_lock:
+        _memory[key] = entry
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+    return entry
+
+
+def _is_raw_file(path: Path) -> bool:
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        first = f.readline()
+    header, _ = ranking.parse_csv(first)
+    return is_raw_matrix(header)
+
+
+def matrix_source(name: Optional[str] = None) -> Tuple[ranking.ZMatrix, bytes]:
+    """(ZMatrix, Z-score CSV bytes) for a file in data/: Z-score CSVs as is, raw matrices through the pipeline."""
+    path = ranking.resolve_data_file(name, ranking.DEFAULT_ZSCORES_CSV)
+    data = path.read_bytes()
+    if _is_raw_file(path):
+        return prepare_bytes(data)
+    return ranking.cached_zscores(path.name), data
+
+
+def cached_matrix(name: Optional[str] = None) -> ranking.ZMatrix:
+    """Drop-in for ranking.cached_zscores that also accepts the raw matrix."""
+    path = ranking.resolve_data_file(name, ranking.DEFAULT_ZSCORES_CSV)
+    if _is_raw_file(path):
+        return prepare_bytes(path.read_bytes())[0]
+    return ranking.cached_zscores(path.name)
+
+
+def sigma_model(name: Optional[str] = None) -> str:
+    """Uncertainty model of cached_matrix(name): SIGMA_PROPAGATED for raw matrices, else SIGMA_FILE."""
+    path = ranking.resolve_data_file(name, ranking.DEFAULT_ZSCORES_CSV)
+    return SIGMA_PROPAGATED if _is_raw_file(path) else SIGMA_FILE
+
+
+def compare(raw: bytes, reference: ranking.ZMatrix) -> Dict[str, np.ndarray]:
+    """Per-criterion max |ΔZ| and |Δs_Z| between the pipeline output for raw and a Z-score matrix (same rows)."""
+    x, s = parse_raw(raw.decode('utf-8', errors='ignore'))
+    if x.shape[0] != len(reference):
+        raise ValueError(f'Matriz bruta com {x.shape[0]} linhas, Zscores com {len(reference)}.')
+    result = compute_zscores(x, s)
+    return {'z': np.abs(result['z'] - reference.z).max(axis=0, initial=0.0),
+            's': np.abs(result['s'] - reference.s).max(axis=0, initial=0.0)}
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Gera o CSV de Zscores (dash) a partir da matriz bruta.')
+    p.add_argument('raw', nargs='?', default=str(ranking.DATA_DIR / ranking.DEFAULT_NAMES_CSV))
+    p.add_argument('--out', help='arquivo de saída (padrão: cache/zscores/<hash>.csv)')
+    p.add_argument('--rho', type=float, nargs=3, default=(0.0, 0.0, 0.0),
+                   metavar=('CQ', 'CP', 'QP'), help='correlações entre medidas brutas')
+    p.add_argument('--compare', action='store_true',
+                   help=f'compara com os CSVs de Zscores em data/ (falha se |ΔZ| > {COMPARE_Z_TOLERANCE})')
+    args = p.parse_args()
+
+    raw = Path(args.raw).read_bytes()
+    if args.compare:
+        failed = False
+        for path in sorted(ranking.DATA_DIR.glob('*.csv')):
+            if _is_raw_file(path):
+                continue
+            diff = compare(raw, ranking.parse_zscores(path.read_text(encoding='utf-8', errors='ignore')))
+            ok = bool(np.all(diff['z'] <= COMPARE_Z_TOLERANCE))
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} {path.name}: |ΔZ| máx {np.round(diff['z'], 4).tolist()} | "
+                  f"|Δs_Z| máx {np.round(diff['s'], 2).tolist()} (custo, qualidade, prazo)")
+        raise SystemExit(1 if failed else 0)
+    _, csv_bytes = prepare_bytes(raw, args.rho)
+    if args.out:
+        Path(args.out).write_bytes(csv_bytes)
+        print(f"✅ Zscores gravados em {args.out}")
+    else:
+        print(f"✅ Zscores gravados em {CACHE_DIR / (content_key(raw, args.rho) + '.csv')}")